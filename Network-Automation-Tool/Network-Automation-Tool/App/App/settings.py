@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -37,6 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'myapp.apps.MyappConfig',
 ]
 
 MIDDLEWARE = [
@@ -139,3 +141,15 @@ CSRF_COOKIE_SAMESITE = 'Lax'
 # settings.py
 
 DATA_UPLOAD_MAX_MEMORY_SIZE = 104857600  # 10 MB
+
+# Background refresh of every firewall in firewall_passwords.txt; 0 disables it
+# and snapshots are then loaded on demand by the queries that need them. The
+# poller runs in each serving process (runserver's child, every WSGI worker),
+# as each one keeps its own snapshots; never in other manage.py commands.
+FLEET_POLL_INTERVAL = int(os.environ.get("FLEET_POLL_INTERVAL", "0"))  # seconds
+FLEET_POLL_WORKERS = int(os.environ.get("FLEET_POLL_WORKERS", "8"))
+FLEET_POLL_TIMEOUT = int(os.environ.get("FLEET_POLL_TIMEOUT", "180"))  # seconds per device
+
+# Directory of saved firewall configs (<firewall>[_<ip>].xml) loaded at startup
+# instead of fetching them over SSH.
+OFFLINE_CONFIG_DIR = os.environ.get("OFFLINE_CONFIG_DIR", "")
@@ -11,6 +11,7 @@ from panos.objects import ServiceObject
 from panos.policies import PreRulebase, PostRulebase, SecurityRule
 from panos.objects import Tag
 from .validations import PanoramaValidator
+from .panorama_rulebases import device_group_tree
 from panos.network import Zone
 
 logger = logging.getLogger(__name__)
@@ -226,6 +227,29 @@ class RuleManager:
                 'applications': sorted(comprehensive_apps)
             }
         
+    def device_hostnames(self):
+        """Serial to hostname of every firewall Panorama manages"""
+        op_cmd = '<show><devices><all></all></devices></show>'
+        url = f'https://{self.PANORAMA_IP}/api/?type=op&cmd={op_cmd}&key={self.API_KEY}'
+        response = requests.get(url, verify=False, timeout=30)
+        response.raise_for_status()
+        
+        serial_to_hostname = {}
+        root = ET.fromstring(response.text)
+        for fw in root.findall(".//result/devices/entry"):
+            serial = fw.findtext('serial') or fw.get('name')
+            hostname = fw.findtext('hostname') or fw.get('hostname')
+            if serial and hostname:
+                serial_to_hostname[serial] = hostname
+        return serial_to_hostname
+
+    def export_config(self):
+        """Full Panorama configuration export as XML text"""
+        config_url = f'https://{self.PANORAMA_IP}/api/?type=export&category=configuration&key={self.API_KEY}'
+        config_response = requests.get(config_url, verify=False, timeout=30)
+        config_response.raise_for_status()
+        return config_response.text
+
     def get_hierarchy(self):
         """Get the full hierarchy of device groups and firewalls"""
         try:
@@ -234,42 +258,11 @@ class RuleManager:
             if 'error' in discovery:
                 return discovery
 
-            # Fetch firewall info
-            op_cmd = '<show><devices><all></all></devices></show>'
-            url = f'https://{self.PANORAMA_IP}/api/?type=op&cmd={op_cmd}&key={self.API_KEY}'
-            response = requests.get(url, verify=False, timeout=30)
-            response.raise_for_status()
-            
-            # Parse firewall info
-            serial_to_hostname = {}
-            root = ET.fromstring(response.text)
-            for fw in root.findall(".//result/devices/entry"):
-                serial = fw.findtext('serial') or fw.get('name')
-                hostname = fw.findtext('hostname') or fw.get('hostname')
-                if serial and hostname:
-                    serial_to_hostname[serial] = hostname
-            
-            # Fetch full config
-            config_url = f'https://{self.PANORAMA_IP}/api/?type=export&category=configuration&key={self.API_KEY}'
-            config_response = requests.get(config_url, verify=False, timeout=30)
-            config_response.raise_for_status()
+            serial_to_hostname = self.device_hostnames()
+            config_text = self.export_config()
             
             # Parse device groups
-            dg_parents = {}
-            fw_to_dg = {}
-            config_root = ET.fromstring(config_response.text)
-            
-            dg_entries = config_root.findall(".//devices/entry[@name='localhost.localdomain']/device-group/entry")
-            for dg in dg_entries:
-                name = dg.get('name')
-                parent = dg.findtext('parent-dg') if dg.find('parent-dg') is not None else 'shared'
-                dg_parents[name] = parent
-                
-                devices = dg.find('devices')
-                if devices is not None:
-                    for fw in devices.findall('entry'):
-                        serial = fw.get('name')
-                        fw_to_dg[serial] = name
+            dg_parents, fw_to_dg = device_group_tree(ET.fromstring(config_text))
             
             # Build hierarchy tree structure
             hierarchy_tree = self._build_hierarchy_tree(dg_parents)
@@ -1,6 +1,3 @@
-import pandas as pd
-app_defaults = pd.read_csv(r"C:\Users\gopiprashanth.raju\OneDrive - Providence St. Joseph Health\Desktop\Network-Automation-Tool-Gopi (3)\Network-Automation-Tool-Gopi\Network-Automation-Tool-Gopi\App\Compare_final\applipedia_data_cleaned.csv")
+from app_catalog import app_catalog
 
-# Convert the app_defaults to a dictionary for faster access
-app_defaults_dict = app_defaults.set_index('Name').T.to_dict('list')
-print(app_defaults_dict["ssl"])
\ No newline at end of file
+print(app_catalog.get()["ssl"].to_dict())
\ No newline at end of file
@@ -1,309 +1,86 @@
-import ipaddress
-import socket
-from netmiko import ConnectHandler
-import pandas as pd
-import time
-from ipaddress import ip_network
-import os
 import concurrent.futures
-
-def resolve_fqdn_to_ip(fqdn):
-    try:
-        ip_addresses = socket.gethostbyname_ex(fqdn)[2]
-        return ip_addresses[0]
-    except socket.gaierror:
-        return fqdn
-    
-
-
-
-import threading
-from queue import Queue
-import ipaddress
-from copy import deepcopy
-
+import hashlib
+import logging
 import xml.etree.ElementTree as ET
-import time
-import socket
-from collections import OrderedDict
-# Measure start time
-# start_time = time.time()
-
-def rules_write(firewall,ET):
-    f=open("firewall_passwords.txt","r")
-    lines=f.readlines()
-    f.close()
-    for i in lines:
-        firewall_name,host,name,password=i.strip().split(",")
+
+from .fqdn_resolver import fqdn_resolver, fqdn_names, expand_fqdns
+from .app_catalog import app_catalog, CONTAINER
+from .compiled_rules import compile_rule, compile_rules, compile_address, address_flag, compile_ports, service_flags
+from .address_index import AddressIndex
+from .query_cache import query_cache, normalize_query
+from .snapshot_cache import SnapshotCache
+from .fleet_poller import FleetPoller
+from .config_loader import load_config_string
+from .ssh_capture import CapturedSession, xml_response
+from .rule_model import compact_rulebase
+from .object_closure import resolve_closures
+from .config_diff import entry_hashes, dirty_rules
+
+logger = logging.getLogger(__name__)
+
+def _password_entries():
+    with open("firewall_passwords.txt","r") as f:
+        return [line.strip().split(",") for line in f if line.strip()]
+
+def firewall_names():
+    """Every firewall listed in firewall_passwords.txt."""
+    return [entry[0] for entry in _password_entries()]
+
+def firewall_device(firewall):
+    """netmiko connection settings of a firewall listed in firewall_passwords.txt."""
+    for firewall_name,host,name,password in _password_entries():
         if firewall==firewall_name:
-            device = {
+            return {
         "device_type": "autodetect",
         "host": host,
         "username": name,
         "password": password,
         "timeout": 20,
         "global_delay_factor": 4,
-        'session_log': 'session.log'
 
             }
-            conn = ConnectHandler(**device)
-            prompt = conn.find_prompt()
-            conn.send_command("set cli pager off", delay_factor=5)
-            conn.send_command("set cli op-command-xml-output on", delay_factor=5)
-            conn.send_command("show config effective-running")
-            conn.disconnect()
-            f=open("session.log","r")
-            content=f.read()
-            content=content[content.index("show config effective-running"):]
-            xml_content=(content[content.index("<response"):content.index("</response>")+len("</response>")])
-
-
-            root = ET.fromstring(xml_content)
-
-            def print_rulebase(element, rules):
-                if element.tag == "rulebase":
-                    rules.append(ET.tostring(element, encoding='unicode'))
-                else:
-                    for child in element:
-                        print_rulebase(child, rules)
-
-            rules = []
-            print_rulebase(root, rules)
-            rules = ET.fromstring(rules[0])
-
-        # Function to store rulebase in a dictionary
-            def store_rule_in_dict(element):
-                index=1
-                if element.tag == "rulebase":
-                    rule_dict = {}
-                    for entry in element.findall(".//entry"):
-                        entry_dict = {}
-                        for child in entry:
-                            entry_dict[child.tag] = [subchild.text.strip() if subchild.text is not None else '' for subchild in child]
-                            if child.tag=="action":
-                                entry_dict[child.tag]=child.text
-                            if child.tag=="negate-destination" or child.tag=="negate-source":
-                                entry_dict[child.tag]=child.text
-                            entry_dict["index"]=index
-                        rule_dict[entry.attrib['name']] = entry_dict
-                        index+=1
-                    return rule_dict
-
-            rule_dict = store_rule_in_dict(rules)
-            def print_address(element, address):
-                if element.tag == "address-group" or element.tag == "address":
-                    address.append(ET.tostring(element, encoding='unicode'))
-                else:
-                    for child in element:
-                        print_address(child, address)
-
-            address = []
-            print_address(root, address)
-
-            # Convert all collected address strings to elements
-            address_elements = [ET.fromstring(addr) for addr in address]
-
-        # Function to store addresses in a dictionary
-    def store_rule_in_dict(element):
-        index=1
-        if element.tag == "rulebase":
-            rule_dict = {}
-            for entry in element.findall(".//entry"):
-                entry_dict = {}
-                for child in entry:
-                    entry_dict[child.tag] = [subchild.text.strip() if subchild.text is not None else '' for subchild in child]
-                    if child.tag=="action":
-                        entry_dict[child.tag]=child.text
-                    if child.tag=="negate-destination" or child.tag=="negate-source":
-                        entry_dict[child.tag]=child.text
-                    entry_dict["index"]=index
-                rule_dict[entry.attrib['name']] = entry_dict
-                index+=1
-            return rule_dict
-
-    rule_dict = store_rule_in_dict(rules)
-    def print_address(element, address):
-        if element.tag == "address-group" or element.tag == "address":
-            address.append(ET.tostring(element, encoding='unicode'))
-        else:
-            for child in element:
-                print_address(child, address)
-
-    address = []
-    print_address(root, address)
-
-    # Convert all collected address strings to elements
-    address_elements = [ET.fromstring(addr) for addr in address]
-
-    # Function to store addresses in a dictionary
-    def store_address_in_dict(elements):
-        address_dict = {}
-        for element in elements:
-            if element.tag == "address-group" or element.tag == "address":
-                for entry in element.findall(".//entry"):
-                    entry_dict = {}
-                    for child in entry:
-                        if child.tag == "ip-netmask":
-                            entry_dict[child.tag] = child.text.strip()
-                        elif child.tag == "fqdn":
-                            entry_dict[child.tag] = child.text.strip()
-                        elif child.tag=="ip-range":
-                            entry_dict[child.tag] = child.text.strip()
-                        else:
-                            entry_dict[child.tag] = [subchild.text.strip() for subchild in child]
-                    address_dict[entry.attrib['name']] = entry_dict
-        return address_dict
-
-    address_dict = store_address_in_dict(address_elements)
-
-    memo = {}
-    fq_ad={}
-    def address_check(add):
-        # If the address is already processed, return to avoid reprocessing and infinite loops
-        if add in memo:
-            return
-        # Initialize the address in memo with an empty set
-        memo[add] = set()
-
-        # Process static addresses
-        if "static" in address_dict[add]:
-            for a in address_dict[add]["static"]:
-                if a in address_dict:
-                    if a not in memo:
-                        address_check(a)
-                    # Update the memo entry with addresses found in the static address check
-                    memo[add].update(memo[a])
-                else:
-                    memo[add].add(a)
-                    
-        # Process IP-Netmask addresses
-        if "ip-netmask" in address_dict[add]:
-            for ip in address_dict[add]["ip-netmask"].split(","):
-                memo[add].add(ip)
-        
-        # Process FQDN addresses and resolve to IP addresses
-        if "fqdn" in address_dict[add]:
-            for fq in address_dict[add]["fqdn"].split(","):
-                fq_ad[fq]=[fq]
-                memo[add].add(fq)
-        if "ip-range" in address_dict[add]:
-            for ip in address_dict[add]["ip-range"].split(","):
-                memo[add].add(ip)
-    f=open("memo.txt","w")
-    f.write(str(memo))
-    f.close()
-    for add in address_dict:
-        address_check(add)
-
-    # # Function to gather application-group elements
-    def print_application_group(element, application_group):
-        if element.tag == "application-group":
-            application_group.append(ET.tostring(element, encoding='unicode'))
-        else:
-            for child in element:
-                print_application_group(child, application_group)
-
-    application_group = []
-    print_application_group(root, application_group)
-    application_group = ET.fromstring(application_group[0])
-
-    # Function to store application-group in a dictionary
-    def store_application_group_in_dict(element):
-        if element.tag == "application-group":
-            application_group_dict = {}
-            for entry in element.findall(".//entry"):
-                entry_dict = {}
-                for child in entry:
-                    if child.tag == "members":
-                        entry_dict[child.tag] = [subchild.text.strip() for subchild in child]
-                    else:
-                        entry_dict[child.tag] = child.text.strip()
-                application_group_dict[entry.attrib['name']] = entry_dict
-            return application_group_dict
-
-    application_group_dict = store_application_group_in_dict(application_group)
-    import xml.etree.ElementTree as ET
-
-    def print_service_group(element, service_group):
-        if element.tag in ["service-group", "service"]:
-            service_group.append(ET.tostring(element, encoding='unicode'))
-        else:
-            for child in element:
-                print_service_group(child, service_group)
-
-    service_group = []
-    print_service_group(root, service_group)
-    service_group = [ET.fromstring(sg) for sg in service_group]
-
-    # Function to store service-group and service in a dictionary
-    def store_service_group_in_dict(elements):
-        service_group_dict = {}
-
-        for element in elements:
-            if element.tag in ["service-group", "service"]:
-                for entry in element.findall(".//entry"):
-                    entry_dict = {}
-
-                    for child in entry:
-                        if child.tag == "members":
-                            entry_dict[child.tag] = {}
-                            for subchild in child:
-                                entry_dict[child.tag][subchild.text] = []
-                        elif child.tag == "protocol":
-                            for protocol in child:
-                                port = protocol.find("port")
-                                if port is not None:
-                                    entry_dict["protocol"] = protocol.tag
-                                    entry_dict["port"] = port.text
-                    service_group_dict[entry.attrib['name']] = entry_dict
-        return service_group_dict
-
-    # Example usage
-    service_group_dict = store_service_group_in_dict(service_group)
-    memo1 = {}
-
-
-    memo1 = {}
-
-
-    def serv_objects(ser):
-        if ser in memo1:
-            return
-        memo1[ser] = {"port": [], "protocol": [],"service":[]}
-
-        if "members" in service_group_dict[ser]:
-            for a in service_group_dict[ser]["members"]:
-                if a in service_group_dict:
-                    if a not in memo1:
-                        serv_objects(a)
-                    memo1[ser]["service"].append(a)
-                    memo1[ser]["port"].extend(memo1[a]["port"])
-                    memo1[ser]["protocol"].extend(memo1[a]["protocol"])
-                else:
-                    memo1[ser]["service"].append(a)
-        if "protocol" in service_group_dict[ser]:
-            for protocol in service_group_dict[ser]["protocol"].split(","):
-                memo1[ser]["protocol"].append(protocol)
-        if "port" in service_group_dict[ser]:
-            for port in service_group_dict[ser]["port"].split(","):
-                memo1[ser]["port"].append(port)
-    for s in service_group_dict:
-        serv_objects(s)
-    f=open("memowriter.txt","w")
-    f.write(str(memo1))
-    f.close()
-    import pandas as pd
-
-    # Load the app defaults from the CSV
-    app_defaults = pd.read_csv( r"Compare_final\applipedia_data_cleaned.csv"
-    )
-
-    # Convert the app_defaults to a dictionary for faster access
-    app_defaults_dict = app_defaults.set_index('Name').T.to_dict('list')
+    raise ValueError(f"Firewall {firewall} not found in firewall_passwords.txt")
+
+def fetch_config(firewall):
+    """Effective running config (the <response> XML) of a firewall listed in firewall_passwords.txt."""
+    with CapturedSession(firewall_device(firewall)) as session:
+        session.run("set cli pager off", delay_factor=5)
+        session.run("set cli op-command-xml-output on", delay_factor=5)
+        content=session.run("show config effective-running")
+    return xml_response(content)
+
+def fetch_config_version(firewall):
+    """Hash of the config audit info, a short output that changes with every commit."""
+    device=firewall_device(firewall)
+    device["global_delay_factor"]=1
+    with CapturedSession(device) as session:
+        session.run("set cli pager off")
+        output=session.run("show config audit info")
+    return config_hash(output)
+
+def config_hash(xml_content):
+    return hashlib.sha256(xml_content.encode()).hexdigest()
+
+def rules_write(firewall,ET,xml_content=None,config=None,only=None,fqdns=None):
+    if xml_content is None:
+        xml_content=fetch_config(firewall)
+    if config is None:
+        config = load_config_string(xml_content)
+    rule_dict = config["rules"]
+    address_dict = config["addresses"]
+    if fqdns is None:
+        fqdns = fqdn_resolver.resolve_all(fqdn_names(address_dict))
+    application_group_dict = config["application_groups"]
+    service_group_dict = config["services"]
+
+    memo,memo1=resolve_closures(firewall, config_hash(xml_content), address_dict, service_group_dict)
+    catalog = app_catalog.get()
     rules = {}
 
     res=[]
     for rule_name, rule in rule_dict.items():
+        if only is not None and rule_name not in only:
+            continue
         store_apps=[]
         if "application" in rule:
             for a in rule["application"]:
@@ -327,7 +104,7 @@ def rules_write(firewall,ET):
                     source_address.extend(memo[add])
                 else:
                     source_address.append(add)
-        rules[rule_name]["source"] = list(set(source_address))
+        rules[rule_name]["source"] = list(set(expand_fqdns(source_address, fqdns)))
 
         # Process destination addresses
         destination_address = []
@@ -337,7 +114,7 @@ def rules_write(firewall,ET):
                     destination_address.extend(memo[add])
                 else:
                     destination_address.append(add)
-        rules[rule_name]["destination"] = list(set(destination_address))
+        rules[rule_name]["destination"] = list(set(expand_fqdns(destination_address, fqdns)))
 
         # Process ports and protocols
         rules[rule_name]["entries"]=[]
@@ -347,7 +124,6 @@ def rules_write(firewall,ET):
                 ports = []
                 protocols = []
                 services = []
-                apps=[]
                 if ser in memo1:
                     ports.extend(memo1[ser]["port"])
                     protocols.extend(memo1[ser]["protocol"])
@@ -357,21 +133,15 @@ def rules_write(firewall,ET):
                         if app=="any" and (ser=="application-default" or ser=='any'):
                             protocols.append("any")
                             ports.append("any")
-                        if app in app_defaults_dict:
-                            
-                            ports.extend(app_defaults_dict[app][9].strip("[]").replace("'", "").split(","))
-                            protocols.extend(app_defaults_dict[app][8].strip("[]").replace("'", "").split(","))
-                            # Check OnClick_Last_Digit and handle accordingly
-                            last_digit = int(app_defaults_dict[app][7])  # Assuming this column represents OnClick_Last_Digit
-                            if last_digit == 1:
-                                idx = app_defaults[app_defaults['Name'] == app].index[0] + 1
-                                while idx < len(app_defaults) and int(app_defaults.iloc[idx, 8]) not in [0, 1]:
-                                    next_app = app_defaults.iloc[idx, 1]
-                                    apps.append(next_app)
-                                    ports.extend(app_defaults_dict[next_app][9].strip("[]").replace("'", "").split(","))
-                                    protocols.extend(app_defaults_dict[next_app][8].strip("[]").replace("'", "").split(","))
-                                    idx += 1
-                                rule["application"].extend(apps)
+                        if app in catalog:
+                            # A container brings in its children's defaults
+                            # too, and the children themselves get entries
+                            # when the loop reaches them.
+                            record = catalog[app]
+                            ports.extend(record.expanded_ports)
+                            protocols.extend(record.expanded_protocols)
+                            if record.level == CONTAINER:
+                                rule["application"].extend(child for child in record.children if child not in rule["application"])
                         if "service-https" ==ser:
                             ports.append("443")
                             protocols.append("tcp")
@@ -379,8 +149,8 @@ def rules_write(firewall,ET):
                             ports.append("80")
                             ports.append("8080")
                             protocols.append("tcp")
-                        for port in ports:
-                            for protocol in protocols:
+                        for port in dict.fromkeys(ports):
+                            for protocol in dict.fromkeys(protocols):
                                 entry = {
                                         "application": app,
                                         "protocol": protocol,
@@ -388,17 +158,6 @@ def rules_write(firewall,ET):
                                     }
                                 
                                 rules[rule_name]["entries"].append(entry)
-                        
-        # if "service-https" in services:
-        #     ports.append("443")
-        #     protocols.append("tcp")
-        # if "service-http" in services:
-        #     ports.append("80")
-        #     ports.append("8080")
-        #     protocols.append("tcp")
-        # rules[rule_name]["port"] = ports
-        # rules[rule_name]["protocol"] = protocols
-        # rules[rule_name]["service"] = services
 
         # Process other attributes
         for attr in ["action", "application", "category"]:
@@ -406,15 +165,7 @@ def rules_write(firewall,ET):
                 rules[rule_name][attr] = rule[attr]
 
         # Generate entries
-        # if "service-http" in rule["service"]:
-        #     protocols.append("tcp")
-        #     ports.append("80")
-        #     ports.append("8080")
-        # if "service-https" in rule["service"]:
-        #     protocols.append("tcp")
-        #     ports.append("443")
         r = rules[rule_name]
-        # r["entries"] = []
         if "application" not in r:
             r["application"] = []
         if "port" not in r:
@@ -426,24 +177,11 @@ def rules_write(firewall,ET):
             if "" in rules[rule_name][at]:
                 rules[rule_name][at].remove("")
             rules[rule_name][at]=list(set(rules[rule_name][at]))
-        # for application in r["application"]:
-        #     for protocol in r["protocol"]:
-
-        #         entry = {
-        #             "application": application,
-        #             "protocol": protocol,
-        #             "destination_port": port
-        #         }
-        #         r["entries"].append(entry)
         if "service" in r and "application-default" in r["service"]:
             for app in r["application"]:
-                if app in app_defaults_dict:
-                    n=10
-                    if len(app_defaults_dict[app])<=10:
-                        n=len(app_defaults_dict[app])-1
-
-                    for port in app_defaults_dict[app][n].strip("[]").replace("'", "").split(","):
-                        for protocol in app_defaults_dict[app][9].strip("[]").replace("'", "").split(","):
+                if app in catalog:
+                    for port in catalog[app].ports:
+                        for protocol in catalog[app].protocols:
                             entry = {
                                 "application": app,
                                 "protocol": protocol,
@@ -456,128 +194,12 @@ def rules_write(firewall,ET):
             if "" in rules[rule_name][at]:
                 rules[rule_name][at].remove("")
             rules[rule_name][at]=list(set(rules[rule_name][at]))
-            r=rules[rule_name]
-            r["name"]=rule_name
-            res.append(r)
-        if "entries" in rule:
-            for entry in rule["entries"]:
-                    if "service" in entry:
-                            del entry[service]
-    # Save rules to file
-    with open("rules_check.txt", "w") as f:
-        f.write(str(res))
-    rules=res
-    # Write rules to file
-    return rules,memo,memo1
-# def parse_palo_alto_rule(rule):
-#     parsed_entries = []
-#     # Split the rule into individual entries
-#     if "[" in rule:
-#         entries = rule[rule.index("[")+1:rule.index("]")].strip().split(" ")
-#     else:
-#         rule = rule[rule.index("application/service")+len("application/service"):]
-#         rule = rule[rule.index(" "):rule.index(";")]
-#         entries = rule.strip().split()
-
-#     # Iterate over each entry
-#     for entry in entries:
-#         if entry.strip() == "...":
-#             continue
-#         # Split the entry into components
-#         val = entry.split('/')
-#         application, protocol, src_port, dst_port = val[:4]
-
-#         # Further split the app_protocol into application and protocol
-#         x, app_protocol = application.split(':')
-
-#         # Create a dictionary for the parsed entry
-#         parsed_entry = {
-#             'application': app_protocol,
-#             'protocol': protocol,
-#             'source_port': src_port,
-#             'destination_port': dst_port
-#         }
-#         parsed_entries.append(parsed_entry)
-#     return parsed_entries
-
-# def parse_firewall_rules(raw_rules):
-#     from copy import deepcopy
-
-#     rules = []
-#     current_rule = {
-#         "name": "",
-#         "source": "",
-#         "destination": "",
-#         "action": "",
-#         "src_negate": False,
-#         "dest_negate": False,
-#     }
-
-#     for line in raw_rules.strip().split('\n'):
-#         if not current_rule["name"] and "{" in line:
-#             current_rule = {
-#                 "name": "",
-#                 "source": "",
-#                 "destination": "",
-#                 "action": "",
-#                 "src_negate": False,
-#                 "dest_negate": False,
-#             }
-#             current_rule["name"] = line[:line.index(";")][1:]
-#         if "index:" in line:
-#             line = line[line.index("index"):]
-#             current_rule["index"] = int(line[line.index("index:")+len("index: "):line.index('"')])+1
-#         if not current_rule["source"] and "source" in line:
-#             src = line[line.index("source")+6:line.index(";")].strip()
-#             if "(negate)" in src:
-#                 current_rule["src_negate"] = True
-#                 src = src.replace("(negate)", "").strip()
-#             if "[" in src:
-#                 src = src[src.index("[")+1:src.index("]")]
-#             current_rule["source"] = []
-#             for s in src.strip().split():
-#                 current_rule["source"].append(s)
-#         if not current_rule["destination"] and "destination" in line:
-#             dest = line[line.index("destination")+11:line.index(";")].strip()
-#             if "(negate)" in dest:
-#                 current_rule["dest_negate"] = True
-#                 dest = dest.replace("(negate)", "").strip()
-#             if "[" in dest:
-#                 dest = dest[dest.index("[")+1:dest.index("]")]
-#             current_rule["destination"] = []
-#             for d in dest.strip().split():
-#                 current_rule["destination"].append(d)
-#         if not current_rule["action"] and "action" in line:
-#             current_rule["action"] = line[line.index("action")+6:line.index(";")].strip()
-#         if "from" in line:
-#             current_rule["from"] = []
-#             fr = line[line.index("from")+4:line.index(";")].strip()
-#             if "[" in fr:
-#                 fr = fr[fr.index("[")+1:fr.index("]")]
-#             for f in fr.strip().split():
-#                 current_rule["from"].append(f)
-#         if "to" in line and "to" not in current_rule:
-#             current_rule["to"] = []
-#             to = line[line.index("to")+2:line.index(";")].strip()
-#             if "[" in to:
-#                 to = to[to.index("[")+1:to.index("]")]
-#             for t in to.strip().split():
-#                 current_rule["to"].append(t)
-#         if "application/service" in line:
-#             current_rule["entries"] = parse_palo_alto_rule(line)
-#         if "}" in line:
-#             rules.append(deepcopy(current_rule))
-#             current_rule["name"] = ""
-#             current_rule["action"] = ""
-#             current_rule["source"] = ""
-#             current_rule["destination"] = ""
-#             current_rule["src_negate"] = False
-#             current_rule["dest_negate"] = False
-#     return rules
-# import concurrent.futures
-# import ipaddress
-
-def match_rule(rule, src, dest, src_zone, dest_zone, port, Protocol, action, application):
+        r=rules[rule_name]
+        r["name"]=rule_name
+        res.append(r)
+    return res,memo,memo1
+
+def match_rule(rule, src, dest, src_zone, dest_zone, port, Protocol, action, application, compiled=None):
     src_flag = False
     dest_flag = False
     dest_zone_flag = False
@@ -589,67 +211,13 @@ def match_rule(rule, src, dest, src_zone, dest_zone, port, Protocol, action, app
     for i in arr:
         if i not in rule:
                 return False, rule["name"], []
-    for s in rule["source"]:
-        if src_flag:
-            continue
-        if s == "...":
-            continue
-        try:
-            if "-" in s:
-                start_ip, end_ip = s.split("-")
-                start_ip = ipaddress.ip_address(start_ip)
-                end_ip = ipaddress.ip_address(end_ip)
-                # Check if IP falls within the range
-                if src == "any" or ("/" not in src and start_ip <= ipaddress.ip_address(src) <= end_ip):
-                        src_flag = True
-                else:
-                        subnet = ipaddress.ip_network(src, strict=False)
-                        # Check if IP falls within the subnet
-                        for ip in subnet.hosts():  
-                            if start_ip <= ip <= end_ip and start_ip <= ip <= end_ip:
-                                    src_flag = True
-            else:
-                src_flag = (s == "any" or src == "any" or
-                                (ipaddress.ip_network(s, strict=False).version == ipaddress.ip_network(src, strict=False).version and
-                                (ipaddress.ip_network(s, strict=False).subnet_of(ipaddress.ip_network(src, strict=False)) or
-                                ipaddress.ip_network(s, strict=False).supernet_of(ipaddress.ip_network(src, strict=False)) or
-                                ipaddress.ip_network(src, strict=False).subnet_of(ipaddress.ip_network(s, strict=False)))))
-        except Exception as e:
-            continue
-    if 'negate-source' in rule and rule['negate-source'] and src!="any":
+    if compiled is None:
+        compiled = compile_rule(rule)
+    src_flag = address_flag(compiled["source"], compile_address(src))
+    if compiled["negate_source"] and src!="any":
          src_flag=not src_flag
-    for d in rule["destination"]:
-        if dest_flag:
-            continue
-        if d == "...":
-            continue
-        try:
-            if "-" in d:
-                start_ip,end_ip=d.split("-")
-                start_ip = ipaddress.ip_address(start_ip)
-                end_ip = ipaddress.ip_address(end_ip)
-        
-                # Check if IP falls within the range
-                
-                if dest == "any" or ("/" not in dest and start_ip <= ipaddress.ip_address(dest) <= end_ip):
-                        dest_flag = True
-                else:
-                        subnet = ipaddress.ip_network(dest, strict=False)
-                        # Check if IP falls within the subnet
-                        for ip in subnet.hosts():  
-                            if start_ip <= ip <= end_ip and start_ip <= ip <= end_ip:
-                                    dest_flag = True
-
-            else:
-                dest_flag = (d == "any" or dest == "any" or
-                                (ipaddress.ip_network(d, strict=False).version == ipaddress.ip_network(dest, strict=False).version and
-                                (ipaddress.ip_network(d, strict=False).supernet_of(ipaddress.ip_network(dest, strict=False)) or
-                                ipaddress.ip_network(dest, strict=False).subnet_of(ipaddress.ip_network(d, strict=False)))))
-        except Exception as e:
-            if rule["name"]=="Pyxis CIISafe to FileShares":
-                print(e)
-            continue
-    if 'negate-destination' in rule and rule['negate-destination']=="yes" and dest!="any":
+    dest_flag = address_flag(compiled["destination"], compile_address(dest), within=True)
+    if compiled["negate_destination"] and dest!="any":
          dest_flag=not dest_flag
     for s in rule["from"]:
         if src_zone_flag:
@@ -663,114 +231,14 @@ def match_rule(rule, src, dest, src_zone, dest_zone, port, Protocol, action, app
         if d.lower() == dest_zone.lower() or d.lower() == "any" or dest_zone.lower() == "any":
                 dest_zone_flag = d
 
-    for entry in rule["entries"]:
-        try:
-
-                if isinstance(port,list):
-                        p=port
-                        for port in p:
-                                if "-" in port:
-                                        s1,e1=port.split("-")
-                                        s1=int(s1)
-                                        e1=int(e1)
-                                        if "-" in entry["destination_port"]:
-                                                start_port,end_port=entry["destination_port"].split("-")
-                                                start_port = int(start_port)
-                                                end_port = int(end_port)
-                                                if s1>=start_port and e1<=end_port:
-                                                        if (entry["protocol"] == "any" or Protocol == "any" or entry["protocol"] == Protocol) and (entry["application"] == "any" or application == "any" or entry["application"] == application):
-                                                                protocol_flag = entry["protocol"]
-                                                                port_flag=entry["destination_port"]
-                                                                application_flag = entry["application"]
-                                        else:
-                                                if (entry["destination_port"] == "any" or port == "any" or entry["destination_port"] == port or s1<=int(entry["destination_port"])<=e1) and (entry["protocol"] == "any" or Protocol == "any" or entry["protocol"] == Protocol) and (entry["application"] == "any" or application == "any" or entry["application"] == application):
-                                                        port_flag = entry["destination_port"]
-                                                        protocol_flag = entry["protocol"]
-                                                        application_flag = entry["application"]
-                                                
-
-
-
-                                if "-" in entry["destination_port"] and entry["destination_port"]!="app-default" and port!="any":
-                                        start_port,end_port=entry["destination_port"].split("-")
-                                        start_port = int(start_port)
-                                        end_port = int(end_port)
-                                        # Check if IP falls within the range
-                                        check_port=int(port)
-                                        if start_port <=  check_port <= end_port:
-                                                if (entry["protocol"] == "any" or Protocol == "any" or entry["protocol"] == Protocol) and \
-                                                        (entry["application"] == "any" or application == "any" or entry["application"] == application):
-                                                        protocol_flag = entry["protocol"]
-                                                        port_flag=entry["destination_port"]
-                                                        application_flag = entry["application"]
-                                else:
-                                        if port_flag:
-                                                continue
-                                        if (entry["destination_port"] == "any" or port == "any" or entry["destination_port"] == port) and (entry["protocol"] == "any" or Protocol == "any" or entry["protocol"] == Protocol) and \
-                                                (entry["application"] == "any" or application == "any" or entry["application"] == application):
-                                                port_flag = entry["destination_port"]
-                                                protocol_flag = entry["protocol"]
-                                                application_flag = entry["application"]
-                else:
-                        if not isinstance(port,list) and  "-" in port:
-                                s1,e1=port.split("-")
-                                s1=int(s1)
-                                e1=int(e1)
-                                if "-" in entry["destination_port"]:
-                                        start_port,end_port=entry["destination_port"].split("-")
-                                        start_port = int(start_port)
-                                        end_port = int(end_port)
-                                        if s1>=start_port and e1<=end_port:
-                                                if (entry["protocol"] == "any" or Protocol == "any" or entry["protocol"] == Protocol) and \
-                                                (entry["application"] == "any" or application == "any" or entry["application"] == application):
-                                                        protocol_flag = entry["protocol"]
-                                                        port_flag=entry["destination_port"]
-                                                        application_flag = entry["application"]
-                                else:
-                                        if (entry["destination_port"] == "any" or port == "any" or entry["destination_port"] == port or s1<=int(entry["destination_port"])<=e1) and (entry["protocol"] == "any" or Protocol == "any" or entry["protocol"] == Protocol) and  (entry["application"] == "any" or application == "any" or entry["application"] == application):
-                                                port_flag = entry["destination_port"]
-                                                protocol_flag = entry["protocol"]
-                                                application_flag = entry["application"]
-                                        
-
-
-                        else:
-                                if "-" in entry["destination_port"] and entry["destination_port"]!="app-default" and port!="any":
-                                        start_port,end_port=entry["destination_port"].split("-")
-                                        start_port = int(start_port)
-                                        end_port = int(end_port)
-                                        # Check if IP falls within the range
-                                        check_port=int(port)
-                                        if start_port <=  check_port <= end_port:
-                                                if (entry["protocol"] == "any" or Protocol == "any" or entry["protocol"] == Protocol) and (entry["application"] == "any" or application == "any" or entry["application"] == application):
-                                                        protocol_flag = entry["protocol"]
-                                                        port_flag=entry["destination_port"]
-                                                        application_flag = entry["application"]
-                                else:
-                                        if rule["name"]=="LAN1_to_LAN2_Single_to_Single":
-                                            print("Entries",entry,port,application,Protocol)
-                                        if port_flag:
-                                                continue
-                                        if (entry["destination_port"] == "any" or port == "any" or entry["destination_port"] == port) and (entry["protocol"] == "any" or Protocol == "any" or entry["protocol"] == Protocol) and (entry["application"] == "any" or application == "any" or entry["application"] == application):
-                                                port_flag = entry["destination_port"]
-                                                protocol_flag = entry["protocol"]
-                                                application_flag = entry["application"]
-        except Exception as e:
-                if rule["name"]=="LAN1_to_LAN2_Single_to_Single":
-                    print("Error",e)
-                # print(f"Invalid port: {entry}", " Error", e)
-                pass
-    print("RULENAME",rule["name"])
-    if rule["name"]=="LAN1_to_LAN2_Single_to_Single":
-        print("RULEr",rule)
-        print([src_flag, dest_flag, src_zone_flag, dest_zone_flag, port_flag, protocol_flag, application_flag])
+    port_flag, protocol_flag, application_flag = service_flags(compiled["services"], compile_ports(port), Protocol, application)
     if src_flag and dest_flag and src_zone_flag and dest_zone_flag and port_flag and application_flag and (rule["action"].strip() == action or action == "any"):
         return True, rule["name"], [src_flag, dest_flag, src_zone_flag, dest_zone_flag, port_flag, protocol_flag, application_flag]
     else:
         return False, rule["name"], []
 
-def check_if_rule_exists(rule, src, dest, src_zone, dest_zone, port, protocol, action, application):
-    result, rule_name, result_arr = match_rule(rule, src, dest, src_zone, dest_zone, port, protocol, action, application)
+def check_if_rule_exists(rule, src, dest, src_zone, dest_zone, port, protocol, action, application, compiled=None):
+    result, rule_name, result_arr = match_rule(rule, src, dest, src_zone, dest_zone, port, protocol, action, application, compiled)
     r = {}
 
     if rule_name:
@@ -778,58 +246,215 @@ def check_if_rule_exists(rule, src, dest, src_zone, dest_zone, port, protocol, a
     if result:
         for k in rule:
             r[k] = rule[k]
-        # r["source"] = [result_arr[0]]
-        # r["destination"] = [result_arr[1]]
-        # r["from"] = [result_arr[2]]
-        # r["to"] = [result_arr[3]]
-        # r["destination_port"] = [result_arr[4]]
-        # r["protocol"] = [result_arr[5]]
-        # r["application"] = [result_arr[6]]
     return result, rule_name, r
 
-def parallel_check_rules(rules, source_ip, dest_ip, src_zone, dest_zone, port, protocol, action, application):
+def parallel_check_rules(rules, source_ip, dest_ip, src_zone, dest_zone, port, protocol, action, application, compiled_rules=None):
     res = []
+    if compiled_rules is None:
+        compiled_rules = compile_rules(rules)
     
     with concurrent.futures.ThreadPoolExecutor() as executor:
         futures = [executor.submit(check_if_rule_exists, rule, source_ip, dest_ip,
                                    src_zone, dest_zone,
                                    port, protocol,
                                    action,
-                                   application) for rule in rules]
+                                   application, compiled) for rule, compiled in zip(rules, compiled_rules)]
         
-        for future in concurrent.futures.as_completed(futures):
+        # Collect in submission order so matches stay in policy order
+        for future in futures:
             exists, rule_name, rule = future.result()
             if exists:
                 res.append(rule)
     
     return res
 
-def main(firewall, source_ip, dest_ip, src_zone, dest_zone, port, protocol, action, application, q):
-    firewall_name= firewall
-    res = []
-    rules,memo,memo1=rules_write(firewall_name,ET)
-    res = parallel_check_rules(rules,
-                                       source_ip,
-                                       dest_ip,
-                                       src_zone,
-                                       dest_zone,
-                                       port,
-                                       protocol,
-                                       action,
-                                       application)
+def first_match_rule(rules, source_ip, dest_ip, src_zone, dest_zone, port, protocol, application, compiled_rules=None):
+    """Walks the rules top-down like PAN-OS and stops at the first one the traffic hits.
+
+    rules must be in policy order (rules_write output is). The returned rule
+    carries the effective "verdict", None means no rule matched.
+    """
+    if compiled_rules is None:
+        compiled_rules = compile_rules(rules)
+    for rule, compiled in zip(rules, compiled_rules):
+        exists, rule_name, r = check_if_rule_exists(rule, source_ip, dest_ip, src_zone, dest_zone,
+                                                   port, protocol, "any", application, compiled)
+        if exists:
+            r["verdict"] = r["action"].strip()
+            return r
+    return None
+
+def load_rulebase(firewall, xml_content=None, config=None):
+    """Fetches and compiles one firewall's rulebase so it can answer many queries."""
+    if xml_content is None:
+        xml_content=fetch_config(firewall)
+    if config is None:
+        config=load_config_string(xml_content)
+    fqdns=fqdn_resolver.resolve_all(fqdn_names(config["addresses"]))
+    hashes=entry_hashes(config, fqdns)
+    rules,memo,memo1=compact_rulebase(*rules_write(firewall,ET,xml_content,config,fqdns=fqdns))
+    compiled_rules=compile_rules(rules)
+    names=[rule["name"] for rule in rules]
+    return {
+        "firewall": firewall,
+        "config_hash": config_hash(xml_content),
+        "hashes": hashes,
+        "rules": rules,
+        "positions": {name: pos for pos, name in enumerate(names)},
+        "memo": memo,
+        "memo1": memo1,
+        "compiled": compiled_rules,
+        "index": AddressIndex(compiled_rules, names),
+        "fqdns": fqdns,
+    }
+
+def fqdns_stale(rulebase):
+    """Whether an FQDN used by the rulebase now resolves to other addresses than it was built with.
+
+    Cheap while the resolver's entries are fresh; once one expires this is
+    where it gets looked up again.
+    """
+    resolved=rulebase.get("fqdns")
+    if not resolved:
+        return False
+    return fqdn_resolver.resolve_all(resolved)!=resolved
+
+def update_rulebase(firewall, previous, xml_content=None):
+    """load_rulebase that keeps what did not change since a previous snapshot.
+
+    Only rules that are new, edited or reference an object whose entry (or a
+    nested group's) changed, or an FQDN that now resolves differently, go
+    through rules_write and compile_rule again; the others are reused,
+    renumbered if they moved. A copy of the previous snapshot's address
+    index is patched instead of rebuilding it; the previous snapshot itself
+    is left untouched, as it keeps serving queries until the new one is
+    published (or for good, if the new one is discarded).
+    """
+    if xml_content is None:
+        xml_content=fetch_config(firewall)
+    version=config_hash(xml_content)
+    if previous is None or "hashes" not in previous:
+        return load_rulebase(firewall, xml_content)
+    if version==previous["config_hash"] and not fqdns_stale(previous):
+        return previous
+    config=load_config_string(xml_content)
+    fqdns=fqdn_resolver.resolve_all(fqdn_names(config["addresses"]))
+    hashes=entry_hashes(config, fqdns)
+    dirty=dirty_rules(previous["hashes"], hashes, config)
+    written,memo,memo1=compact_rulebase(*rules_write(firewall,ET,xml_content,config,dirty,fqdns))
+    written={rule["name"]: rule for rule in written}
+    old={rule["name"]: (rule, compiled) for rule, compiled in zip(previous["rules"], previous["compiled"])}
+    rules=[]
+    compiled_rules=[]
+    added=[]
+    for name, entry in config["rules"].items():
+        if name in written:
+            rule=written[name]
+            compiled=compile_rule(rule)
+            added.append((name, compiled))
+        else:
+            rule, compiled=old[name]
+            index=entry.get("index")
+            if rule["index"]!=index:
+                rule=rule.moved(index)
+                compiled=dict(compiled, index=index)
+        rules.append(rule)
+        compiled_rules.append(compiled)
+    names=[rule["name"] for rule in rules]
+    address_index=previous["index"].copy()
+    for name in old.keys()-config["rules"].keys():
+        address_index.remove_rule(name)
+    for name, compiled in added:
+        address_index.add_rule(name, compiled)
+    address_index.reorder(names)
+    logger.info(f"{firewall}: recompiled {len(added)} of {len(rules)} rules")
+    return {
+        "firewall": firewall,
+        "config_hash": version,
+        "hashes": hashes,
+        "rules": rules,
+        "positions": {name: pos for pos, name in enumerate(names)},
+        "memo": memo,
+        "memo1": memo1,
+        "compiled": compiled_rules,
+        "index": address_index,
+        "fqdns": fqdns,
+    }
+
+def check_rulebase(rulebase, source_ip, dest_ip, src_zone, dest_zone, port, protocol, action, application, mode="all"):
+    rules=rulebase["rules"]
+    compiled_rules=rulebase["compiled"]
+    candidates=rulebase["index"].candidates(source_ip,dest_ip,rulebase.get("positions"))
+    candidate_rules=[rules[i] for i in candidates]
+    candidate_compiled=[compiled_rules[i] for i in candidates]
+    if mode=="first":
+        first=first_match_rule(candidate_rules,
+                               source_ip,
+                               dest_ip,
+                               src_zone,
+                               dest_zone,
+                               port,
+                               protocol,
+                               application,
+                               candidate_compiled)
+        res=[first] if first else []
+    else:
+        res = parallel_check_rules(candidate_rules,
+                                           source_ip,
+                                           dest_ip,
+                                           src_zone,
+                                           dest_zone,
+                                           port,
+                                           protocol,
+                                           action,
+                                           application,
+                                           candidate_compiled)
     res1=[]
+    seen=set()
     for i in res:
-        if i not in res1:
+        if i["name"] not in seen:
+                seen.add(i["name"])
                 res1.append(i)
-    res=res1
-    for i in memo1:
-        memo[i]=memo1[i]
-    f=open("memo.txt","w")
-    f.write(str(memo))
-    f.close()
+    return res1
+
+snapshot_cache = SnapshotCache(load_rulebase, fetch_config_version, updater=update_rulebase, stale=fqdns_stale)
+fleet_poller = FleetPoller(snapshot_cache, firewall_names)
+
+def _payload(rulebase, firewall_name, res):
+    """Queue item for views.firewall: the matches, the object memo and every rule in dict form."""
+    memo={name: address.to_list() for name, address in rulebase["memo"].items()}
+    memo.update({name: service.to_dict() for name, service in rulebase["memo1"].items()})
     if res:
-        q.put([firewall_name, res,memo,rules])
-    else:
-        print(23)
-        q.put([firewall_name, "No rule Found",memo])
+        return [firewall_name, res, memo, [rule.to_dict() for rule in rulebase["rules"]]]
+    return [firewall_name, "No rule Found", memo]
+
+def query_version(rulebase):
+    """query_cache version of a snapshot: its config hash plus what its FQDNs resolved to.
+
+    A DNS change publishes a new snapshot under the same config hash, so the
+    hash alone would keep serving results for the old addresses.
+    """
+    fqdns=rulebase.get("fqdns") or {}
+    return (rulebase["config_hash"], tuple(sorted((name, tuple(addresses)) for name, addresses in fqdns.items())))
+
+def main(firewall, source_ip, dest_ip, src_zone, dest_zone, port, protocol, action, application, q, mode="all"):
+    firewall_name= firewall
+    rulebase=snapshot_cache.get(firewall_name)
+    version=query_version(rulebase)
+    query=normalize_query(source_ip, dest_ip, src_zone, dest_zone, port, protocol, action, application, mode)
+    res=query_cache.get(firewall_name, version, query)
+    if res is None:
+        res = check_rulebase(rulebase,
+                             source_ip,
+                             dest_ip,
+                             src_zone,
+                             dest_zone,
+                             port,
+                             protocol,
+                             action,
+                             application,
+                             mode)
+        query_cache.put(firewall_name, version, query, res)
+    result=_payload(rulebase, firewall_name, res)
+    q.put(result)
     return res or ["No rule Found"]
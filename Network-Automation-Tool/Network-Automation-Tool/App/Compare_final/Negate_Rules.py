@@ -8,11 +8,8 @@ import os
 import concurrent.futures
 
 def resolve_fqdn_to_ip(fqdn):
-    try:
-        ip_addresses = socket.gethostbyname_ex(fqdn)[2]
-        return ip_addresses[0]
-    except socket.gaierror:
-        return fqdn
+    ip_addresses = fqdn_resolver.resolve(fqdn)
+    return ip_addresses[0] if ip_addresses else fqdn
     
 
 
@@ -26,6 +23,8 @@ import xml.etree.ElementTree as ET
 import time
 import socket
 from collections import OrderedDict
+from .rule_evaluator import evaluate_rules, select, is_match
+from .fqdn_resolver import fqdn_resolver
 # def parse_palo_alto_rule(rule):
 #     parsed_entries = []
 #     # Split the rule into individual entries
@@ -134,225 +133,9 @@ from collections import OrderedDict
 # import concurrent.futures
 # import ipaddress
 
-def match_rule(rule, src, dest, src_zone, dest_zone, port, Protocol, action, application):
-    src_flag = False
-    dest_flag = False
-    dest_zone_flag = False
-    src_zone_flag = False
-    port_flag = False
-    protocol_flag = False
-    application_flag = False
-    arr=["source","destination","to","from"]
-    for i in arr:
-        if i not in rule:
-                return False, rule["name"], []
-    for s in rule["source"]:
-        if src_flag:
-            continue
-        if s == "...":
-            continue
-        try:
-            if "-" in s:
-                start_ip, end_ip = s.split("-")
-                start_ip = ipaddress.ip_address(start_ip)
-                end_ip = ipaddress.ip_address(end_ip)
-                # Check if IP falls within the range
-                if src == "any" or ("/" not in src and start_ip <= ipaddress.ip_address(src) <= end_ip):
-                        src_flag = True
-                else:
-                        subnet = ipaddress.ip_network(src, strict=False)
-                        # Check if IP falls within the subnet
-                        if start_ip <= subnet.network_address <= end_ip and start_ip <= subnet.broadcast_address <= end_ip:
-                                src_flag = True
-            else:
-                src_flag = (s == "any" or src == "any" or
-                                (ipaddress.ip_network(s, strict=False).version == ipaddress.ip_network(src, strict=False).version and
-                                (ipaddress.ip_network(s, strict=False).subnet_of(ipaddress.ip_network(src, strict=False)) or
-                                ipaddress.ip_network(s, strict=False).supernet_of(ipaddress.ip_network(src, strict=False)) or
-                                ipaddress.ip_network(src, strict=False).subnet_of(ipaddress.ip_network(s, strict=False)))))
-        except Exception as e:
-            continue
-    if 'negate-source' in rule and rule['negate-source'] and src!="any":
-         src_flag=not src_flag
-    for d in rule["destination"]:
-        if dest_flag:
-            continue
-        if d == "...":
-            continue
-        try:
-            if "-" in d:
-                start_ip,end_ip=d.split("-")
-                start_ip = ipaddress.ip_address(start_ip)
-                end_ip = ipaddress.ip_address(end_ip)
-        
-                # Check if IP falls within the range
-                
-                if dest=="any" or start_ip <=  ipaddress.ip_address(dest) <= end_ip:
-                        dest_flag=True
-            else:
-                dest_flag = (d == "any" or dest == "any" or
-                                (ipaddress.ip_network(d, strict=False).version == ipaddress.ip_network(dest, strict=False).version and
-                                (ipaddress.ip_network(d, strict=False).supernet_of(ipaddress.ip_network(dest, strict=False)) or
-                                ipaddress.ip_network(dest, strict=False).subnet_of(ipaddress.ip_network(d, strict=False)))))
-        except Exception as e:
-            continue
-    if 'negate-destination' in rule and rule['negate-destination']=="yes" and dest!="any":
-         dest_flag=not dest_flag
-    for s in rule["from"]:
-        if src_zone_flag:
-            continue
-        if s.lower() == src_zone.lower() or s.lower() == "any" or src_zone.lower() == "any":
-                src_zone_flag = s
-
-    for d in rule["to"]:
-        if dest_zone_flag:
-            continue
-        if d.lower() == dest_zone.lower() or d.lower() == "any" or dest_zone.lower() == "any":
-                dest_zone_flag = d
-
-    for entry in rule["entries"]:
-        try:
-                if isinstance(port,list):
-                        p=port
-                        for port in p:
-                                if "-" in port:
-                                        s1,e1=port.split("-")
-                                        s1=int(s1)
-                                        e1=int(e1)
-                                        if "-" in entry["destination_port"]:
-                                                start_port,end_port=entry["destination_port"].split("-")
-                                                start_port = int(start_port)
-                                                end_port = int(end_port)
-                                                if s1>=start_port and e1<=end_port:
-                                                        if (entry["protocol"] == "any" or Protocol == "any" or entry["protocol"] == Protocol) and (entry["application"] == "any" or application == "any" or entry["application"] == application):
-                                                                protocol_flag = entry["protocol"]
-                                                                port_flag=entry["destination_port"]
-                                                                application_flag = entry["application"]
-                                        else:
-                                                if (entry["destination_port"] == "any" or port == "any" or entry["destination_port"] == port or s1<=int(entry["destination_port"])<=e1) and (entry["protocol"] == "any" or Protocol == "any" or entry["protocol"] == Protocol) and (entry["application"] == "any" or application == "any" or entry["application"] == application):
-                                                        port_flag = entry["destination_port"]
-                                                        protocol_flag = entry["protocol"]
-                                                        application_flag = entry["application"]
-                                                
-
-
-
-                                if "-" in entry["destination_port"] and entry["destination_port"]!="app-default" and port!="any":
-                                        start_port,end_port=entry["destination_port"].split("-")
-                                        start_port = int(start_port)
-                                        end_port = int(end_port)
-                                        # Check if IP falls within the range
-                                        check_port=int(port)
-                                        if start_port <=  check_port <= end_port:
-                                                if (entry["protocol"] == "any" or Protocol == "any" or entry["protocol"] == Protocol) and \
-                                                        (entry["application"] == "any" or application == "any" or entry["application"] == application):
-                                                        protocol_flag = entry["protocol"]
-                                                        port_flag=entry["destination_port"]
-                                                        application_flag = entry["application"]
-                                else:
-                                        if port_flag:
-                                                continue
-                                        if (entry["destination_port"] == "any" or port == "any" or entry["destination_port"] == port) and (entry["protocol"] == "any" or Protocol == "any" or entry["protocol"] == Protocol) and \
-                                                (entry["application"] == "any" or application == "any" or entry["application"] == application):
-                                                port_flag = entry["destination_port"]
-                                                protocol_flag = entry["protocol"]
-                                                application_flag = entry["application"]
-                else:
-                        if not isinstance(port,list) and  "-" in port:
-                                s1,e1=port.split("-")
-                                s1=int(s1)
-                                e1=int(e1)
-                                if "-" in entry["destination_port"]:
-                                        start_port,end_port=entry["destination_port"].split("-")
-                                        start_port = int(start_port)
-                                        end_port = int(end_port)
-                                        if s1>=start_port and e1<=end_port:
-                                                if (entry["protocol"] == "any" or Protocol == "any" or entry["protocol"] == Protocol) and \
-                                                (entry["application"] == "any" or application == "any" or entry["application"] == application):
-                                                        protocol_flag = entry["protocol"]
-                                                        port_flag=entry["destination_port"]
-                                                        application_flag = entry["application"]
-                                else:
-                                        if (entry["destination_port"] == "any" or port == "any" or entry["destination_port"] == port or s1<=int(entry["destination_port"])<=e1) and (entry["protocol"] == "any" or Protocol == "any" or entry["protocol"] == Protocol) and  (entry["application"] == "any" or application == "any" or entry["application"] == application):
-                                                port_flag = entry["destination_port"]
-                                                protocol_flag = entry["protocol"]
-                                                application_flag = entry["application"]
-                                        
-
-
-                        else:
-                                if "-" in entry["destination_port"] and entry["destination_port"]!="app-default" and port!="any":
-                                        start_port,end_port=entry["destination_port"].split("-")
-                                        start_port = int(start_port)
-                                        end_port = int(end_port)
-                                        # Check if IP falls within the range
-                                        check_port=int(port)
-                                        if start_port <=  check_port <= end_port:
-                                                if (entry["protocol"] == "any" or Protocol == "any" or entry["protocol"] == Protocol) and (entry["application"] == "any" or application == "any" or entry["application"] == application):
-                                                        protocol_flag = entry["protocol"]
-                                                        port_flag=entry["destination_port"]
-                                                        application_flag = entry["application"]
-                                else:
-                                        if port_flag:
-                                                continue
-                                        if (entry["destination_port"] == "any" or port == "any" or entry["destination_port"] == port) and (entry["protocol"] == "any" or Protocol == "any" or entry["protocol"] == Protocol) and \
-                                                (entry["application"] == "any" or application == "any" or entry["application"] == application):
-                                                port_flag = entry["destination_port"]
-                                                protocol_flag = entry["protocol"]
-                                                application_flag = entry["application"]
-        except Exception as e:
-                print(f"Invalid port: {entry}", " Error", e)
-    if src_flag and dest_flag and src_zone_flag and dest_zone_flag and port_flag and application_flag and (rule["action"].strip() == action or action == "any"):
-        return True, rule["name"], [src_flag, dest_flag, src_zone_flag, dest_zone_flag, port_flag, protocol_flag, application_flag]
-    else:
-        return False, rule["name"], []
-
-def check_if_rule_exists(rule, src, dest, src_zone, dest_zone, port, protocol, action, application):
-    result, rule_name, result_arr = match_rule(rule, src, dest, src_zone, dest_zone, port, protocol, action, application)
-    r = OrderedDict()
-
-    if rule_name:
-        rule_name = rule_name[1:]
-    if result:
-        for k in rule:
-            r[k] = rule[k]
-        # r["source"] = [result_arr[0]]
-        # r["destination"] = [result_arr[1]]
-        # r["from"] = [result_arr[2]]
-        # r["to"] = [result_arr[3]]
-        # r["destination_port"] = [result_arr[4]]
-        # r["protocol"] = [result_arr[5]]
-        # r["application"] = [result_arr[6]]
-    return result, rule_name, r
-
-def parallel_check_rules(rules, source_ip, dest_ip, src_zone, dest_zone, port, protocol, action, application):
-    res = []
-    
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        futures = [executor.submit(check_if_rule_exists, rule, source_ip, dest_ip,
-                                   src_zone, dest_zone,
-                                   port, protocol,
-                                   action,
-                                   application) for rule in rules]
-        
-        for future in concurrent.futures.as_completed(futures):
-            exists, rule_name, rule = future.result()
-            if exists:
-                res.append(rule)
-    
-    return res
-
 def main( source_ip, dest_ip, src_zone, dest_zone, port, protocol, action, application,rules):
-    res = []
-    res = parallel_check_rules(rules,
-                                       source_ip,
-                                       dest_ip,
-                                       src_zone,
-                                       dest_zone,
-                                       port,
-                                       protocol,
-                                       action,
-                                       application)
+    results = evaluate_rules(rules, source_ip, dest_ip, src_zone, dest_zone, port, protocol, application)
+    res = select(results, is_match, action)
     res1=[]
     for i in res:
         if i not in res1:
@@ -0,0 +1,197 @@
+import copy
+import threading
+
+from .compiled_rules import compile_address
+
+
+class IntervalTree:
+    """Static centered interval tree over (start, end, value) triples."""
+
+    def __init__(self, intervals):
+        self.root = self._build(list(intervals))
+
+    def _build(self, intervals):
+        if not intervals:
+            return None
+        points = sorted(p for start, end, value in intervals for p in (start, end))
+        center = points[len(points) // 2]
+        left, right, here = [], [], []
+        for interval in intervals:
+            if interval[1] < center:
+                left.append(interval)
+            elif interval[0] > center:
+                right.append(interval)
+            else:
+                here.append(interval)
+        return {
+            "center": center,
+            "by_start": sorted(here, key=lambda i: i[0]),
+            "by_end": sorted(here, key=lambda i: i[1], reverse=True),
+            "left": self._build(left),
+            "right": self._build(right),
+        }
+
+    def overlapping(self, start, end):
+        """Values of every interval that overlaps [start, end]."""
+        found = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            if end < node["center"]:
+                for interval in node["by_start"]:
+                    if interval[0] > end:
+                        break
+                    found.append(interval[2])
+                stack.append(node["left"])
+            elif start > node["center"]:
+                for interval in node["by_end"]:
+                    if interval[1] < start:
+                        break
+                    found.append(interval[2])
+                stack.append(node["right"])
+            else:
+                found.extend(interval[2] for interval in node["by_start"])
+                stack.append(node["left"])
+                stack.append(node["right"])
+        return found
+
+
+class AddressIndex:
+    """Per-firewall index from source/destination address ranges to rule positions.
+
+    Rules are stored under a key (their position unless keys are given) and
+    can be added or removed after the build: removed rules are tombstoned and
+    new ones kept in an overflow list that is scanned linearly, until enough
+    of either has piled up to rebuild the trees.
+    """
+
+    def __init__(self, compiled_rules, keys=None, rebuild_ratio=0.25, rebuild_min=64):
+        keys = range(len(compiled_rules)) if keys is None else keys
+        self.rebuild_ratio = rebuild_ratio
+        self.rebuild_min = rebuild_min
+        self.lock = threading.Lock()
+        self.next_slot = 0
+        self._build(dict(zip(keys, compiled_rules)))
+
+    def _build(self, compiled):
+        self.compiled = compiled
+        self.position = {key: pos for pos, key in enumerate(compiled)}
+        self.slot_of = {}
+        self.key_of = {}
+        for key in compiled:
+            self.slot_of[key] = self.next_slot
+            self.key_of[self.next_slot] = key
+            self.next_slot += 1
+        self.tombstones = set()
+        self.overflow = 0
+        self.size = len(compiled)
+        self.source = self._side("source", "negate_source")
+        self.destination = self._side("destination", "negate_destination")
+
+    def _side(self, key, negate_key):
+        intervals = []
+        side = {"always": set(), "wild": set(), "extra": []}
+        for rule_key, compiled in self.compiled.items():
+            intervals.extend(self._place(side, self.slot_of[rule_key], compiled, key, negate_key))
+        side["tree"] = IntervalTree(intervals)
+        return side
+
+    def _place(self, side, slot, compiled, key, negate_key):
+        members = compiled[key]
+        # A literal any matches every query and a negated side can match
+        # anything outside its members, so neither can be pruned.
+        if members["any"] or compiled[negate_key]:
+            side["always"].add(slot)
+        if members["wild"]:
+            side["wild"].add(slot)
+        return [(start, end, slot) for start, end in members["networks"] + members["ranges"]]
+
+    def _lookup(self, side, address):
+        query = compile_address(address)
+        if query is None:
+            return side["wild"] | side["always"]
+        found = set(side["always"])
+        for start, end in query:
+            found.update(side["tree"].overlapping(start, end))
+            found.update(slot for first, last, slot in side["extra"] if first <= end and start <= last)
+        return found - self.tombstones
+
+    def add_rule(self, key, compiled):
+        """Indexes one more rule, replacing any rule already stored under key."""
+        with self.lock:
+            self._remove(key)
+            slot = self.next_slot
+            self.next_slot += 1
+            self.slot_of[key] = slot
+            self.key_of[slot] = key
+            self.compiled[key] = compiled
+            self.position.setdefault(key, len(self.position))
+            for side, name, negate_key in ((self.source, "source", "negate_source"),
+                                           (self.destination, "destination", "negate_destination")):
+                side["extra"].extend(self._place(side, slot, compiled, name, negate_key))
+            self.overflow += 1
+            self.size = len(self.compiled)
+            self._maybe_rebuild()
+
+    def remove_rule(self, key):
+        with self.lock:
+            self._remove(key)
+            self.position.pop(key, None)
+            self.size = len(self.compiled)
+            self._maybe_rebuild()
+
+    def _remove(self, key):
+        slot = self.slot_of.pop(key, None)
+        if slot is None:
+            return
+        del self.compiled[key]
+        self.tombstones.add(slot)
+        for side in (self.source, self.destination):
+            side["always"].discard(slot)
+            side["wild"].discard(slot)
+
+    def copy(self):
+        """Independent index over the same rules, for patching while this one keeps serving queries.
+
+        The trees are never modified after they are built, so they are shared.
+        """
+        with self.lock:
+            clone = copy.copy(self)
+            clone.lock = threading.Lock()
+            clone.compiled = dict(self.compiled)
+            clone.position = dict(self.position)
+            clone.slot_of = dict(self.slot_of)
+            clone.key_of = dict(self.key_of)
+            clone.tombstones = set(self.tombstones)
+            clone.source, clone.destination = (
+                {"always": set(side["always"]), "wild": set(side["wild"]), "extra": list(side["extra"]), "tree": side["tree"]}
+                for side in (self.source, self.destination)
+            )
+        return clone
+
+    def reorder(self, keys):
+        """Sets the policy order of the stored rules, e.g. after rules were inserted or moved."""
+        with self.lock:
+            self.position = {key: pos for pos, key in enumerate(keys)}
+
+    def _maybe_rebuild(self):
+        if len(self.tombstones) + self.overflow > max(self.rebuild_min, self.rebuild_ratio * len(self.compiled)):
+            order = sorted(self.compiled, key=lambda key: self.position.get(key, len(self.position)))
+            self._build({key: self.compiled[key] for key in order})
+
+    def candidate_keys(self, src, dest):
+        """Keys of the rules whose source and destination can both overlap the query."""
+        with self.lock:
+            slots = self._lookup(self.source, src) & self._lookup(self.destination, dest)
+            return [self.key_of[slot] for slot in slots]
+
+    def candidates(self, src, dest, positions=None):
+        """Rule positions whose source and destination can both overlap the query, in policy order.
+
+        positions maps keys to positions; by default the index's own order.
+        """
+        keys = self.candidate_keys(src, dest)
+        positions = self.position if positions is None else positions
+        return sorted(positions[key] for key in keys if key in positions)
@@ -0,0 +1,88 @@
+import ipaddress
+from bisect import bisect_right
+from functools import lru_cache
+
+# IPv6 addresses are shifted past the IPv4 space so both families share one
+# integer axis and an IPv4 interval can never overlap an IPv6 one.
+IPV6_OFFSET = 1 << 32
+IPV4_SPACE = (0, IPV6_OFFSET - 1)
+IPV6_SPACE = (IPV6_OFFSET, IPV6_OFFSET + (1 << 128) - 1)
+
+
+def _to_int(ip):
+    if ip.version == 6:
+        return int(ip) + IPV6_OFFSET
+    return int(ip)
+
+
+@lru_cache(maxsize=65536)
+def parse_range(address):
+    """Turns an ip, subnet or start-end range into an inclusive (start, end) integer interval."""
+    if "-" in address:
+        start_ip, end_ip = address.split("-")
+        start_ip = ipaddress.ip_address(start_ip.strip())
+        end_ip = ipaddress.ip_address(end_ip.strip())
+        if start_ip.version != end_ip.version:
+            raise ValueError(f"Mixed address families in range {address}")
+        return _to_int(start_ip), _to_int(end_ip)
+    network = ipaddress.ip_network(address.strip(), strict=False)
+    return _to_int(network.network_address), _to_int(network.broadcast_address)
+
+
+def family_space(interval):
+    if interval[0] >= IPV6_OFFSET:
+        return IPV6_SPACE
+    return IPV4_SPACE
+
+
+def contains(outer, inner):
+    return outer[0] <= inner[0] and inner[1] <= outer[1]
+
+
+def overlaps(a, b):
+    return a[0] <= b[1] and b[0] <= a[1]
+
+
+def union(intervals):
+    """Sorted, disjoint intervals covering the same addresses; adjacent ones are joined."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def complement(intervals, spaces=(IPV4_SPACE, IPV6_SPACE)):
+    """Addresses of the given spaces that none of the intervals cover."""
+    result = []
+    merged = union(intervals)
+    for space_start, space_end in spaces:
+        cursor = space_start
+        for start, end in merged:
+            if end < space_start or start > space_end:
+                continue
+            if start > cursor:
+                result.append((cursor, start - 1))
+            cursor = max(cursor, end + 1)
+        if cursor <= space_end:
+            result.append((cursor, space_end))
+    return result
+
+
+def starts_of(merged):
+    return [start for start, end in merged]
+
+
+def any_overlaps(merged, starts, interval):
+    """O(log n) overlap test against a union() result and its starts_of()."""
+    i = bisect_right(starts, interval[1]) - 1
+    return i >= 0 and merged[i][1] >= interval[0]
+
+
+def any_contains(merged, starts, interval):
+    """O(log n) test that one union() interval holds the whole interval."""
+    i = bisect_right(starts, interval[0]) - 1
+    return i >= 0 and merged[i][1] >= interval[1]
@@ -0,0 +1,333 @@
+import ast
+import csv
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+from collections.abc import Mapping
+
+logger = logging.getLogger(__name__)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CSV_PATH = os.path.join(HERE, "applipedia_data_cleaned.csv")
+DB_PATH = os.path.join(HERE, "applipedia_catalog.db")
+# Bumped whenever the tables below change; an older file is rebuilt from the CSV.
+FORMAT_VERSION = 1
+# OnClick_Last_Digit: a plain application, a container of the rows that
+# follow it, or one of those children.
+STANDALONE, CONTAINER, CHILD = 0, 1, 2
+DYNAMIC_PORTS = (49152, 65535)
+FIELDS = ("app_id", "name", "category", "subcategory", "risk", "technology", "standard_ports", "level")
+COLUMNS = ("App ID", "Name", "Category", "Subcategory", "Risk", "Technology", "Standard Ports", "OnClick_Last_Digit")
+# The scraped export (applipedia_data_with_onclick_fixed.csv) and the cleaned
+# CSV the catalog is built from.
+RAW_COLUMNS = ("App ID", "Name", "Category", "Subcategory", "Risk", "Technology", "Standard Ports", "OnClick")
+CLEANED_COLUMNS = RAW_COLUMNS + ("OnClick_Last_Digit", "Protocol", "Ports")
+ONCLICK = re.compile(r"ShowApplicationDetail\('(\d+)',\s*'([^']*)',\s*'(\d*)'\)")
+
+
+def _list(text):
+    """The items of a stringified Python list such as "['443', '80']"."""
+    text = (text or "").strip()
+    if not text:
+        return ()
+    try:
+        items = ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        items = text.strip("[]").replace("'", "").split(",")
+    return tuple(str(item).strip() for item in items if str(item).strip())
+
+
+def _port_range(port):
+    low, sep, high = port.partition("-")
+    return int(low), int(high if sep else low)
+
+
+def standard_port_ranges(standard_ports):
+    """(protocol, low, high) of an Applipedia "Standard Ports" value such as "tcp/80,8090, udp/dynamic".
+
+    Ports listed after a ", " belong to the last protocol named; dynamic is
+    the ephemeral range, any and non-numeric values are left out.
+    """
+    ranges = []
+    protocol = None
+    for group in (standard_ports or "").split(" "):
+        if "/" in group:
+            protocol, group = group.split("/", 1)
+        if protocol is None:
+            continue
+        for port in group.split(","):
+            port = port.strip()
+            if port == "dynamic":
+                ranges.append((protocol, *DYNAMIC_PORTS))
+                continue
+            match = re.fullmatch(r"(\d+)(?:-(\d+))?", port)
+            if match:
+                low = int(match.group(1))
+                ranges.append((protocol, low, int(match.group(2) or low)))
+    return tuple(sorted(set(ranges)))
+
+
+def clean_row(row):
+    """A scraped row with the columns the catalog reads added: the OnClick level and the Protocol and Ports lists."""
+    match = ONCLICK.search(row.get("OnClick") or "")
+    ranges = standard_port_ranges(row["Standard Ports"])
+    protocols = list(dict.fromkeys(protocol for protocol, low, high in ranges))
+    ports = list(dict.fromkeys(str(low) if low == high else f"{low}-{high}" for protocol, low, high in ranges))
+    return dict(row, OnClick_Last_Digit=match.group(3) if match and match.group(3) else "",
+                Protocol=str(protocols), Ports=str(ports))
+
+
+def write_csv(path, columns, rows):
+    """Writes rows (dicts) to a CSV that is swapped in atomically."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore", lineterminator="\n")
+            writer.writeheader()
+            writer.writerows(rows)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+
+
+def write_cleaned_csv(raw_rows, csv_path=CSV_PATH):
+    write_csv(csv_path, CLEANED_COLUMNS, [clean_row(row) for row in raw_rows])
+
+
+class AppRecord:
+    """One Applipedia application with its default protocols and ports already parsed.
+
+    ports/protocols are the Ports and Protocol columns of the cleaned CSV,
+    port_ranges the same ports as integers and protocol_ranges the
+    (protocol, low, high) pairs of the Standard Ports column. For a
+    container, children lists the applications it stands for and
+    expanded_ports/expanded_protocols merge its own defaults with theirs;
+    for any other application they are just its own.
+    """
+
+    __slots__ = FIELDS + ("protocols", "ports", "port_ranges", "protocol_ranges",
+                          "expanded_ports", "expanded_protocols", "children")
+
+    def __init__(self, app_id, name, category, subcategory, risk, technology, standard_ports, level,
+                 protocols, ports, protocol_ranges):
+        values = dict(app_id=app_id, name=name, category=category, subcategory=subcategory, risk=risk,
+                      technology=technology, standard_ports=standard_ports, level=int(level or 0),
+                      protocols=tuple(protocols), ports=tuple(ports), protocol_ranges=tuple(protocol_ranges))
+        port_ranges = []
+        for port in values["ports"]:
+            try:
+                port_ranges.append(_port_range(port))
+            except ValueError:
+                continue
+        values.update(port_ranges=tuple(sorted(port_ranges)), expanded_ports=values["ports"],
+                      expanded_protocols=values["protocols"], children=())
+        for key, value in values.items():
+            object.__setattr__(self, key, value)
+
+    @classmethod
+    def from_row(cls, row):
+        """Record of one row of applipedia_data_cleaned.csv."""
+        return cls(*(row[column] or "" for column in COLUMNS), _list(row["Protocol"]), _list(row["Ports"]),
+                   standard_port_ranges(row["Standard Ports"]))
+
+    def __setattr__(self, key, value):
+        raise AttributeError("AppRecord is read-only")
+
+    def to_dict(self):
+        return {key: list(value) if isinstance(value, tuple) else value
+                for key, value in ((key, getattr(self, key)) for key in self.__slots__)}
+
+
+class Catalog(Mapping):
+    """Read-only name -> AppRecord mapping of the whole Applipedia export, in file order."""
+
+    def __init__(self, records):
+        by_name = {}
+        container = None
+        children = {}
+        for record in records:
+            by_name.setdefault(record.name, record)
+            # Children are the rows after a container up to the next
+            # standalone application or container.
+            if record.level == CHILD and container is not None:
+                children[container].append(record.name)
+            elif record.level == CONTAINER:
+                container = record.name
+                children[container] = []
+            else:
+                container = None
+        for name, members in children.items():
+            record = by_name[name]
+            merged = [record] + [by_name[member] for member in members]
+            object.__setattr__(record, "children", tuple(members))
+            object.__setattr__(record, "expanded_ports",
+                               tuple(dict.fromkeys(port for app in merged for port in app.ports)))
+            object.__setattr__(record, "expanded_protocols",
+                               tuple(dict.fromkeys(protocol for app in merged for protocol in app.protocols)))
+        self.records = by_name
+        self.names = tuple(by_name)
+
+    def __getitem__(self, name):
+        return self.records[name]
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __len__(self):
+        return len(self.records)
+
+
+def source_digest(csv_path=CSV_PATH):
+    """SHA-256 of the CSV a catalog is built from; None when the file is missing."""
+    try:
+        with open(csv_path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def read_csv_records(csv_path=CSV_PATH):
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        return [AppRecord.from_row(row) for row in csv.DictReader(f)]
+
+
+def write_catalog(records, db_path=DB_PATH, source=None):
+    """Writes the records to a fresh catalog database next to the CSV.
+
+    Lists are stored comma-joined and the Standard Ports ranges as integer
+    rows, so loading needs no parsing. source is the source_digest of the
+    CSV the records came from. The database is written to a temporary file
+    of its own and swapped in atomically, so processes rebuilding it at the
+    same time never see each other's half-written file.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(db_path)), suffix=".tmp")
+    os.close(fd)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        with conn:
+            conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            conn.execute(f"""
+                CREATE TABLE apps (
+                    position INTEGER PRIMARY KEY,
+                    {", ".join(f"{field} {'INTEGER' if field == 'level' else 'TEXT'} NOT NULL" for field in FIELDS)},
+                    protocols TEXT NOT NULL,
+                    ports TEXT NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE app_ports (
+                    position INTEGER NOT NULL,
+                    protocol TEXT NOT NULL,
+                    low INTEGER NOT NULL,
+                    high INTEGER NOT NULL
+                )
+            """)
+            conn.executemany("INSERT INTO meta VALUES (?, ?)",
+                             [("format_version", str(FORMAT_VERSION)), ("source_sha256", source or "")])
+            conn.executemany(f"INSERT INTO apps VALUES ({', '.join('?' * (len(FIELDS) + 3))})", [
+                (position, *(getattr(record, field) for field in FIELDS),
+                 ",".join(record.protocols), ",".join(record.ports))
+                for position, record in enumerate(records)
+            ])
+            conn.executemany("INSERT INTO app_ports VALUES (?, ?, ?, ?)", [
+                (position, protocol, low, high)
+                for position, record in enumerate(records)
+                for protocol, low, high in record.protocol_ranges
+            ])
+    except BaseException:
+        conn.close()
+        os.remove(tmp_path)
+        raise
+    conn.close()
+    os.replace(tmp_path, db_path)
+
+
+def read_catalog(db_path=DB_PATH, source=None):
+    """Records of a catalog database, or None when it is unreadable, of another format version
+    or (when source is given) built from another CSV."""
+    conn = sqlite3.connect(db_path)
+    try:
+        meta = dict(conn.execute("SELECT key, value FROM meta"))
+        if int(meta.get("format_version", -1)) != FORMAT_VERSION:
+            return None
+        if source is not None and meta.get("source_sha256") != source:
+            return None
+        ranges = {}
+        for position, protocol, low, high in conn.execute("SELECT position, protocol, low, high FROM app_ports ORDER BY rowid"):
+            ranges.setdefault(position, []).append((protocol, low, high))
+        rows = conn.execute(f"SELECT position, {', '.join(FIELDS)}, protocols, ports FROM apps ORDER BY position").fetchall()
+    except (sqlite3.DatabaseError, ValueError):
+        return None
+    finally:
+        conn.close()
+    return [AppRecord(*fields, protocols.split(",") if protocols else (), ports.split(",") if ports else (),
+                      ranges.get(position, ()))
+            for position, *fields, protocols, ports in rows]
+
+
+def build_catalog(csv_path=CSV_PATH, db_path=DB_PATH):
+    """Converts the cleaned CSV into the catalog database; returns the number of applications."""
+    records = read_csv_records(csv_path)
+    write_catalog(records, db_path, source_digest(csv_path))
+    return len(records)
+
+
+class AppCatalog:
+    """Process-wide Applipedia catalog, loaded on first use and again only when a source file changes.
+
+    Records come from the catalog database, which is rebuilt from the CSV
+    when it is missing, was built from different CSV contents or is of
+    another format version (file times are not trusted: a checkout sets
+    them in any order). get() is thread-safe and cheap: two stat() calls
+    while nothing changed. Readers share the same immutable Catalog.
+    """
+
+    def __init__(self, csv_path=CSV_PATH, db_path=DB_PATH):
+        self.csv_path = csv_path
+        self.db_path = db_path
+        self.catalog = None
+        self.signature = None
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _stat(path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _signature(self):
+        return self._stat(self.csv_path), self._stat(self.db_path)
+
+    def _records(self):
+        source = source_digest(self.csv_path)
+        records = None
+        if self._stat(self.db_path) is not None:
+            records = read_catalog(self.db_path, source)
+        if records is None:
+            records = read_csv_records(self.csv_path)
+            try:
+                write_catalog(records, self.db_path, source)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Could not write the application catalog {self.db_path}: {e}")
+        return records
+
+    def get(self):
+        signature = self._signature()
+        if self.catalog is not None and signature == self.signature:
+            return self.catalog
+        with self.lock:
+            if self.catalog is None or signature != self.signature:
+                catalog = Catalog(self._records())
+                logger.info(f"Loaded {len(catalog)} applications")
+                self.catalog, self.signature = catalog, self._signature()
+            return self.catalog
+
+
+app_catalog = AppCatalog()
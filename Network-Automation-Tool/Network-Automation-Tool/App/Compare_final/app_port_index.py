@@ -0,0 +1,72 @@
+import threading
+
+from .address_index import IntervalTree
+from .app_catalog import app_catalog
+from .compiled_rules import compile_ports
+
+
+class AppPortIndex:
+    """Reverse index from (protocol, port range) to the applications that default to it.
+
+    Built from the Standard Ports ranges of the catalog, one interval tree
+    per protocol, so a lookup costs O(log n + k) whatever the ranges' sizes.
+    """
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.order = {name: position for position, name in enumerate(catalog.names)}
+        intervals = {}
+        for name in catalog.names:
+            for protocol, low, high in catalog[name].protocol_ranges:
+                intervals.setdefault(protocol, []).append((low, high, (name, low, high)))
+        self.trees = {protocol: IntervalTree(items) for protocol, items in intervals.items()}
+
+    def protocols(self):
+        return sorted(self.trees)
+
+    def lookup(self, port, protocol="any"):
+        """Applications whose default ports overlap the query, in catalog order.
+
+        port is anything compile_ports accepts ("443", "8000-8100", a list
+        of them), protocol a name in any case or "any". Each match is
+        (name, covered): covered when, for one protocol, every requested
+        range lies inside one of the application's default ranges of that
+        protocol, i.e. application-default alone would allow the traffic.
+        With protocol "any", tcp holding one port and udp another is not
+        covered.
+        """
+        query = compile_ports(port)
+        if query is None:
+            return []
+        protocol = (protocol or "any").lower()
+        protocols = self.protocols() if protocol == "any" else [protocol]
+        found = {}
+        for proto in protocols:
+            tree = self.trees.get(proto)
+            if tree is None:
+                continue
+            for start, end in query:
+                for name, low, high in tree.overlapping(start, end):
+                    hits = found.setdefault(name, {}).setdefault(proto, [False] * len(query))
+                    for i, (q_start, q_end) in enumerate(query):
+                        if low <= q_start and q_end <= high:
+                            hits[i] = True
+        return [(name, any(all(hits) for hits in found[name].values()))
+                for name in sorted(found, key=self.order.get)]
+
+
+_lock = threading.Lock()
+_index = None
+
+
+def port_index():
+    """Index of the current catalog, rebuilt when the catalog is reloaded."""
+    global _index
+    catalog = app_catalog.get()
+    index = _index
+    if index is not None and index.catalog is catalog:
+        return index
+    with _lock:
+        if _index is None or _index.catalog is not catalog:
+            _index = AppPortIndex(catalog)
+        return _index
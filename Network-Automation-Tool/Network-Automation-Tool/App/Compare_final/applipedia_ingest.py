@@ -0,0 +1,233 @@
+import concurrent.futures
+import csv
+import json
+import logging
+import os
+import re
+import sys
+import time
+from collections import Counter
+
+from bs4 import BeautifulSoup
+
+from .app_catalog import HERE, CSV_PATH, DB_PATH, ONCLICK, RAW_COLUMNS, build_catalog, write_csv, write_cleaned_csv
+
+logger = logging.getLogger(__name__)
+
+RAW_CSV_PATH = os.path.join(HERE, "applipedia_data_with_onclick_fixed.csv")
+DETAIL_SUFFIXES = (".html", ".htm", ".txt")
+CHECKPOINT_NAME = ".applipedia_checkpoint.json"
+CHECKPOINT_VERSION = 1
+MISSING = "N/A"
+
+
+def listing_rows(html):
+    """Raw CSV rows of a saved Applipedia listing, in page order.
+
+    The listing is either the rendered page, whose bodyScrollingTable grid
+    the site's script has filled in, or the saved list response the script
+    fills it with (bare <tr> rows). Every row with a ShowApplicationDetail
+    link counts; each gets the Standard Ports placeholder the scraper used
+    until its detail is merged in. A page saved before the list loaded
+    (such as scrape.html) has no rows.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    rows = []
+    for tr in soup.find_all("tr"):
+        columns = tr.find_all("td", recursive=False)
+        link = columns[0].find("a") if columns else None
+        onclick = link.get("onclick", "") if link is not None else ""
+        match = ONCLICK.search(onclick)
+        if len(columns) < 5 or match is None:
+            continue
+        rows.append({
+            "App ID": match.group(1),
+            "Name": link.get_text(strip=True),
+            "Category": columns[1].get_text(strip=True),
+            "Subcategory": columns[2].get_text(strip=True),
+            "Risk": columns[3].get_text(strip=True),
+            "Technology": columns[4].get_text(strip=True),
+            "Standard Ports": MISSING,
+            "OnClick": onclick,
+        })
+    return rows
+
+
+def detail_standard_ports(html):
+    """Standard Ports value of a saved application detail view, or None when it has none."""
+    soup = BeautifulSoup(html, "html.parser")
+    for td in soup.find_all("td"):
+        if "Standard Ports" in td.get_text():
+            value = td.find_next_sibling("td")
+            if value is not None:
+                return " ".join(value.get_text(" ").split()) or MISSING
+    return None
+
+
+def detail_key(path):
+    """(app id, name) a detail page was saved under, from file names such as 1788_1c-enterprise.html.
+
+    App IDs are not unique across the listing (the site posts the name
+    along with the id), so a bare 1788.html gives an empty name and is
+    only used for an id listed once. None for any other file.
+    """
+    match = re.fullmatch(r"(\d+)(?:_(.+))?", os.path.splitext(os.path.basename(path))[0])
+    return (match.group(1), match.group(2) or "") if match else None
+
+
+def detail_files(details_dir):
+    return sorted(
+        name for name in os.listdir(details_dir)
+        if name.lower().endswith(DETAIL_SUFFIXES) and detail_key(name) is not None
+    )
+
+
+def parse_details(details_dir, names):
+    """[(file name, stat key, (app id, name), standard ports)] of a batch of detail pages; runs in a worker process."""
+    parsed = []
+    for name in names:
+        path = os.path.join(details_dir, name)
+        stat = os.stat(path)
+        with open(path, encoding="utf-8", errors="replace") as f:
+            ports = detail_standard_ports(f.read())
+        parsed.append((name, [stat.st_mtime_ns, stat.st_size], detail_key(name), ports))
+    return parsed
+
+
+class Checkpoint:
+    """Detail pages already parsed, kept in a JSON file so an interrupted ingestion resumes where it stopped.
+
+    A page is parsed again only when its size or modification time
+    changed. The file is rewritten atomically after every batch.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == CHECKPOINT_VERSION:
+                    self.entries = data.get("details", {})
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable checkpoint {path}: {e}")
+
+    def done(self, details_dir, name):
+        entry = self.entries.get(name)
+        if entry is None:
+            return False
+        stat = os.stat(os.path.join(details_dir, name))
+        return entry["stat"] == [stat.st_mtime_ns, stat.st_size]
+
+    def record(self, parsed):
+        for name, stat, key, ports in parsed:
+            self.entries[name] = {"stat": stat, "key": list(key), "standard_ports": ports}
+
+    def forget_missing(self, names):
+        """Drops the pages that are no longer among names (deleted from the details directory)."""
+        for name in self.entries.keys() - set(names):
+            del self.entries[name]
+
+    def ports(self):
+        """{(app id, name): Standard Ports} of every page parsed so far."""
+        return {tuple(entry["key"]): entry["standard_ports"] for entry in self.entries.values()
+                if entry["standard_ports"] is not None}
+
+    def save(self):
+        if not self.path:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CHECKPOINT_VERSION, "details": self.entries}, f)
+        os.replace(tmp_path, self.path)
+
+
+def ingest_details(details_dir, checkpoint, workers=None, batch_size=200):
+    """Parses the detail pages the checkpoint does not hold yet on a process pool; returns how many were parsed."""
+    names = detail_files(details_dir)
+    checkpoint.forget_missing(names)
+    pending = [name for name in names if not checkpoint.done(details_dir, name)]
+    if not pending:
+        checkpoint.save()
+        return 0
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    parsed_count = 0
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(parse_details, details_dir, batch) for batch in batches]
+        for future in concurrent.futures.as_completed(futures):
+            parsed = future.result()
+            checkpoint.record(parsed)
+            checkpoint.save()
+            parsed_count += len(parsed)
+            logger.info(f"Parsed {parsed_count}/{len(pending)} application details")
+    return parsed_count
+
+
+def previous_ports(raw_csv_path):
+    """{(app id, name): Standard Ports} of an earlier raw export, used for applications without a saved detail page."""
+    if not raw_csv_path or not os.path.exists(raw_csv_path):
+        return {}
+    with open(raw_csv_path, newline="", encoding="utf-8") as f:
+        return {(row["App ID"], row["Name"]): row["Standard Ports"] for row in csv.DictReader(f)
+                if row["Standard Ports"] and row["Standard Ports"] != MISSING}
+
+
+def ingest(listing_paths, details_dir=None, checkpoint_path=None, workers=None,
+           raw_csv_path=RAW_CSV_PATH, csv_path=CSV_PATH, db_path=DB_PATH):
+    """Rebuilds the Applipedia CSVs and catalog from saved listing and detail pages.
+
+    listing_paths are saved listing pages (one full page or several
+    filtered ones; an application listed twice is kept once). details_dir
+    holds the detail views saved as <app id>_<name>.html; they are parsed in
+    parallel and checkpointed (by default in details_dir) so a rerun only
+    parses new or changed pages. Applications without a page keep the
+    Standard Ports of the current raw CSV, or N/A as the scraper recorded
+    a popup that never loaded. Writes the raw and cleaned CSVs and the
+    catalog database; AppCatalog picks the new files up on its next get().
+    """
+    started = time.monotonic()
+    if isinstance(listing_paths, str):
+        listing_paths = [listing_paths]
+    rows = {}
+    for path in listing_paths:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for row in listing_rows(f.read()):
+                rows.setdefault((row["App ID"], row["Name"]), row)
+    if not rows:
+        raise ValueError("No application rows found in the listing pages; save them once the list has loaded")
+
+    parsed = 0
+    ports = {}
+    if details_dir:
+        checkpoint = Checkpoint(checkpoint_path or os.path.join(details_dir, CHECKPOINT_NAME))
+        parsed = ingest_details(details_dir, checkpoint, workers)
+        ports = checkpoint.ports()
+    fallback = previous_ports(raw_csv_path)
+    listed = Counter(app_id for app_id, name in rows)
+    missing = []
+    for key, row in rows.items():
+        app_id = key[0]
+        if key not in ports and listed[app_id] == 1 and (app_id, "") in ports:
+            key = (app_id, "")
+        if key in ports:
+            row["Standard Ports"] = ports[key]
+        elif (app_id, row["Name"]) in fallback:
+            row["Standard Ports"] = fallback[app_id, row["Name"]]
+        else:
+            missing.append(row["Name"])
+
+    raw_rows = list(rows.values())
+    write_csv(raw_csv_path, RAW_COLUMNS, raw_rows)
+    write_cleaned_csv(raw_rows, csv_path)
+    count = build_catalog(csv_path, db_path)
+    logger.info(f"Ingested {count} applications ({parsed} detail pages parsed) in {time.monotonic() - started:.1f}s")
+    return {"applications": count, "details_parsed": parsed, "details_cached": len(ports), "missing": missing}
+
+
+if __name__ == "__main__":
+    # python -m Compare_final.applipedia_ingest <details dir> <listing.html> [<listing.html> ...]
+    logging.basicConfig(level=logging.INFO)
+    result = ingest(sys.argv[2:], sys.argv[1])
+    print(f"✅ Catalog of {result['applications']} applications saved; "
+          f"{len(result['missing'])} without Standard Ports")
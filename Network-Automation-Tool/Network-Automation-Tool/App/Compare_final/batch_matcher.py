@@ -0,0 +1,208 @@
+import numpy as np
+
+from .address_ranges import IPV6_OFFSET
+from .compiled_rules import compile_rules, compile_address, compile_ports
+
+MASK64 = (1 << 64) - 1
+# Upper bound on the size of one flows x table comparison block
+BLOCK_CELLS = 1 << 22
+
+
+def _split(value):
+    """Unified-axis address to (family, high 64 bits, low 64 bits)."""
+    family = 0
+    if value >= IPV6_OFFSET:
+        family = 1
+        value -= IPV6_OFFSET
+    return family, value >> 64, value & MASK64
+
+
+def _le(a_hi, a_lo, b_hi, b_lo):
+    return (a_hi < b_hi) | ((a_hi == b_hi) & (a_lo <= b_lo))
+
+
+def _vocab_id(vocab, value):
+    if value not in vocab:
+        vocab[value] = len(vocab)
+    return vocab[value]
+
+
+class BatchMatcher:
+    """Evaluates many flows against one firewall's rulebase at once.
+
+    The compiled rulebase is laid out as NumPy tables (address intervals,
+    zone membership, action ids and per application/protocol port ranges)
+    and every flow x rule decision uses the same semantics as
+    Firewall_Rule_Parse.match_rule.
+    """
+
+    def __init__(self, rules, compiled_rules=None):
+        if compiled_rules is None:
+            compiled_rules = compile_rules(rules)
+        self.rules = rules
+        self.size = len(rules)
+        self.valid = np.array([all(k in rule for k in ("source", "destination", "to", "from")) and "action" in rule
+                               for rule in rules], dtype=bool)
+        self.source = self._address_table(compiled_rules, "source", "negate_source")
+        self.destination = self._address_table(compiled_rules, "destination", "negate_destination")
+        self.zones = {}
+        self.from_zones = self._zone_table(rules, "from")
+        self.to_zones = self._zone_table(rules, "to")
+        self.from_matrix = self._zone_matrix(self.from_zones)
+        self.to_matrix = self._zone_matrix(self.to_zones)
+        self.actions = {}
+        self.action_ids = np.array([_vocab_id(self.actions, (rule.get("action") or "").strip()) for rule in rules],
+                                   dtype=np.int32)
+        self.apps = {"any": 0}
+        self.protocols = {"any": 0}
+        self.services = self._service_table(compiled_rules)
+
+    def _address_table(self, compiled_rules, key, negate_key):
+        rows = []
+        for pos, compiled in enumerate(compiled_rules):
+            members = compiled[key]
+            for kind, intervals in ((0, members["networks"]), (1, members["ranges"])):
+                for start, end in intervals:
+                    family, start_hi, start_lo = _split(start)
+                    _, end_hi, end_lo = _split(end)
+                    rows.append((pos, kind, family, start_hi, start_lo, end_hi, end_lo))
+        columns = list(zip(*rows)) or [[]] * 7
+        return {
+            "rule": np.array(columns[0], dtype=np.int64),
+            "kind": np.array(columns[1], dtype=np.int8),
+            "family": np.array(columns[2], dtype=np.int8),
+            "start_hi": np.array(columns[3], dtype=np.uint64),
+            "start_lo": np.array(columns[4], dtype=np.uint64),
+            "end_hi": np.array(columns[5], dtype=np.uint64),
+            "end_lo": np.array(columns[6], dtype=np.uint64),
+            "any": np.array([c[key]["any"] for c in compiled_rules], dtype=bool),
+            "wild": np.array([c[key]["wild"] for c in compiled_rules], dtype=bool),
+            "negate": np.array([c[negate_key] for c in compiled_rules], dtype=bool),
+        }
+
+    def _zone_table(self, rules, key):
+        pairs = []
+        for pos, rule in enumerate(rules):
+            for zone in rule.get(key, []):
+                pairs.append((pos, _vocab_id(self.zones, zone.lower())))
+        return {
+            "pairs": pairs,
+            "any": np.array([any(z.lower() == "any" for z in rule.get(key, [])) for rule in rules], dtype=bool),
+            "nonempty": np.array([bool(rule.get(key)) for rule in rules], dtype=bool),
+        }
+
+    def _zone_matrix(self, table):
+        matrix = np.zeros((self.size, len(self.zones) + 1), dtype=bool)
+        for pos, zone_id in table["pairs"]:
+            matrix[pos, zone_id] = True
+        return matrix
+
+    def _service_table(self, compiled_rules):
+        rows = []
+        for pos, compiled in enumerate(compiled_rules):
+            for app, protocols in compiled["services"].items():
+                app_id = _vocab_id(self.apps, app)
+                for protocol, (merged, starts) in protocols.items():
+                    protocol_id = _vocab_id(self.protocols, protocol)
+                    # A port-less (app-default) entry gets an empty range: only an any port matches it.
+                    for low, high in merged or [(1, 0)]:
+                        rows.append((pos, app_id, protocol_id, low, high))
+        columns = list(zip(*rows)) or [[]] * 5
+        return {
+            "rule": np.array(columns[0], dtype=np.int64),
+            "app": np.array(columns[1], dtype=np.int32),
+            "protocol": np.array(columns[2], dtype=np.int32),
+            "low": np.array(columns[3], dtype=np.int64),
+            "high": np.array(columns[4], dtype=np.int64),
+        }
+
+    def _address_flags(self, table, addresses, within):
+        n = len(addresses)
+        queries = [compile_address(address) for address in addresses]
+        is_any = np.array([q is None for q in queries], dtype=bool)
+        hits = np.zeros((n, self.size), dtype=bool)
+        parsed = [(i, q[0]) for i, q in enumerate(queries) if q]
+        k = len(table["rule"])
+        if parsed and k:
+            step = max(1, BLOCK_CELLS // k)
+            for block in range(0, len(parsed), step):
+                chunk = parsed[block:block + step]
+                split = [_split(start) + _split(end)[1:] for i, (start, end) in chunk]
+                family, qs_hi, qs_lo, qe_hi, qe_lo = (np.array(c, dtype=d)[:, None] for c, d in
+                                                      zip(zip(*split), (np.int8, np.uint64, np.uint64, np.uint64, np.uint64)))
+                overlap = (_le(table["start_hi"], table["start_lo"], qe_hi, qe_lo) &
+                           _le(qs_hi, qs_lo, table["end_hi"], table["end_lo"]))
+                if within:
+                    inside = (_le(table["start_hi"], table["start_lo"], qs_hi, qs_lo) &
+                              _le(qe_hi, qe_lo, table["end_hi"], table["end_lo"]))
+                    member_hit = np.where(table["kind"] == 1, overlap, inside)
+                else:
+                    member_hit = overlap
+                member_hit &= table["family"] == family
+                rows, cols = np.nonzero(member_hit)
+                flow_rows = np.array([i for i, q in chunk], dtype=np.int64)[rows]
+                hits[flow_rows, table["rule"][cols]] = True
+        flags = np.where(is_any[:, None], table["wild"], table["any"] | hits)
+        return flags ^ (table["negate"] & ~is_any[:, None])
+
+    def _zone_flags(self, table, matrix, zones):
+        lowered = [zone.lower() for zone in zones]
+        is_any = np.array([z == "any" for z in lowered], dtype=bool)
+        zone_ids = np.array([self.zones.get(z, len(self.zones)) for z in lowered], dtype=np.int64)
+        listed = matrix[:, zone_ids].T
+        return np.where(is_any[:, None], table["nonempty"], table["any"] | listed)
+
+    def _service_flags(self, flows):
+        n = len(flows)
+        table = self.services
+        flags = np.zeros((n, self.size), dtype=bool)
+        rows = []
+        for i, flow in enumerate(flows):
+            app = flow.get("application", "any")
+            protocol = flow.get("protocol", "any")
+            app_id = -1 if app == "any" else self.apps.get(app, -2)
+            protocol_id = -1 if protocol == "any" else self.protocols.get(protocol, -2)
+            query = compile_ports(flow.get("port", "any"))
+            if query is None:
+                rows.append((i, app_id, protocol_id, 1, 0, 0))
+            else:
+                for low, high in query:
+                    rows.append((i, app_id, protocol_id, 0, low, high))
+        k = len(table["rule"])
+        if not rows or not k:
+            return flags
+        step = max(1, BLOCK_CELLS // k)
+        for block in range(0, len(rows), step):
+            flow, app_id, protocol_id, port_any, low, high = (np.array(c, dtype=np.int64)[:, None]
+                                                              for c in zip(*rows[block:block + step]))
+            app_ok = (app_id == -1) | (table["app"] == app_id) | (table["app"] == self.apps["any"])
+            protocol_ok = ((protocol_id == -1) | (table["protocol"] == protocol_id) |
+                           (table["protocol"] == self.protocols["any"]))
+            port_ok = (port_any == 1) | ((table["low"] <= low) & (high <= table["high"]))
+            hit_rows, hit_cols = np.nonzero(app_ok & protocol_ok & port_ok)
+            flags[flow[hit_rows, 0], table["rule"][hit_cols]] = True
+        return flags
+
+    def match_matrix(self, flows):
+        """N flows x M rules boolean matrix; flows use match_rule's argument names as keys."""
+        flows = list(flows)
+        get = lambda key: [flow.get(key, "any") for flow in flows]
+        result = np.broadcast_to(self.valid, (len(flows), self.size)).copy()
+        result &= self._address_flags(self.source, get("src"), within=False)
+        result &= self._address_flags(self.destination, get("dest"), within=True)
+        result &= self._zone_flags(self.from_zones, self.from_matrix, get("src_zone"))
+        result &= self._zone_flags(self.to_zones, self.to_matrix, get("dest_zone"))
+        result &= self._service_flags(flows)
+        actions = get("action")
+        action_ids = np.array([-1 if a == "any" else self.actions.get(a, -2) for a in actions], dtype=np.int32)
+        result &= (action_ids[:, None] == -1) | (self.action_ids == action_ids[:, None])
+        return result
+
+    def match(self, flows):
+        """First match and all matches (rule positions, policy order) for every flow."""
+        matrix = self.match_matrix(flows)
+        results = []
+        for row in matrix:
+            positions = np.flatnonzero(row).tolist()
+            results.append({"first": positions[0] if positions else None, "matches": positions})
+        return results
@@ -0,0 +1,204 @@
+from functools import lru_cache
+
+from .address_ranges import parse_range, union, starts_of, any_overlaps, any_contains
+from .rule_model import Rule
+
+
+def compile_members(members):
+    """Pre-parses a rule's source or destination members into sorted integer intervals.
+
+    Subnets and ip-ranges are kept apart because the matcher treats them
+    differently on the destination side. "any" marks a literal any member,
+    "wild" marks that some member matches an "any" query (unresolved names
+    do, unparseable ranges do not) and "unresolved" that some member could
+    not be turned into addresses.
+    """
+    compiled = {"any": False, "wild": False, "unresolved": False}
+    networks = []
+    ranges = []
+    for member in members:
+        if member == "...":
+            compiled["unresolved"] = True
+            continue
+        if member == "any":
+            compiled["any"] = True
+            compiled["wild"] = True
+            continue
+        try:
+            if "-" in member:
+                ranges.append(parse_range(member))
+            else:
+                networks.append(parse_range(member))
+            compiled["wild"] = True
+        except Exception:
+            compiled["unresolved"] = True
+            if "-" not in member:
+                compiled["wild"] = True
+    compiled["networks"] = union(networks)
+    compiled["ranges"] = union(ranges)
+    compiled["network_starts"] = starts_of(compiled["networks"])
+    compiled["range_starts"] = starts_of(compiled["ranges"])
+    return compiled
+
+
+@lru_cache(maxsize=4096)
+def compile_address(address):
+    """Query side of compile_members: None for any, () when the address cannot be parsed."""
+    if address == "any":
+        return None
+    try:
+        return (parse_range(address),)
+    except Exception:
+        return ()
+
+
+def address_flag(members, query, within=False, range_within=False):
+    """Source members match any overlapping query; with within=True a subnet
+    member has to contain the whole query (destination behaviour) and with
+    range_within=True so does an ip-range member."""
+    if query is None:
+        return members["wild"]
+    if members["any"]:
+        return True
+    network_check = any_contains if within else any_overlaps
+    range_check = any_contains if range_within else any_overlaps
+    for interval in query:
+        if range_check(members["ranges"], members["range_starts"], interval):
+            return True
+        if network_check(members["networks"], members["network_starts"], interval):
+            return True
+    return False
+
+
+def parse_port(port):
+    """(low, high) for a single port or "low-high" range, None for any."""
+    if port == "any":
+        return None
+    if "-" in port:
+        low, high = port.split("-")
+        return int(low), int(high)
+    return int(port), int(port)
+
+
+def compile_services(entries):
+    """Folds the application x protocol x port entries of a rule into merged
+    port ranges per protocol, keyed by application.
+
+    An entry whose port is not a number or range (app-default, "") adds its
+    application and protocol without ports: only an "any" port query matches it.
+    """
+    return _compile_triples((entry.get("application"), entry.get("protocol"), entry.get("destination_port"))
+                            for entry in entries)
+
+
+def _compile_triples(triples):
+    collected = {}
+    for app, protocol, port in triples:
+        if not app:
+            continue
+        port_ranges = collected.setdefault(app, {}).setdefault(protocol, [])
+        try:
+            port_ranges.append(parse_port(port or "") or (0, 65535))
+        except ValueError:
+            continue
+    services = {}
+    for app, protocols in collected.items():
+        services[app] = {}
+        for protocol, port_ranges in protocols.items():
+            merged = union(port_ranges)
+            services[app][protocol] = (merged, starts_of(merged))
+    return services
+
+
+def _ports_key(port):
+    if isinstance(port, list):
+        return tuple(port)
+    return port
+
+
+@lru_cache(maxsize=4096)
+def _compile_ports(port):
+    if port == "any":
+        return None
+    ranges = []
+    for item in port if isinstance(port, tuple) else (port,):
+        if item == "any":
+            return None
+        try:
+            ranges.append(parse_port(item))
+        except ValueError:
+            continue
+    return tuple(ranges)
+
+
+def compile_ports(port):
+    """Query side of compile_services: None for any, else the requested port ranges."""
+    return _compile_ports(_ports_key(port))
+
+
+def _port_match(port_ranges, query, within=True):
+    merged, starts = port_ranges
+    if query is None:
+        return True
+    check = any_contains if within else any_overlaps
+    for port_range in query:
+        if check(merged, starts, port_range):
+            return True
+    return False
+
+
+def _matching(items, value):
+    if value == "any":
+        return items.items()
+    return [(key, items[key]) for key in (value, "any") if key in items]
+
+
+def service_flags(services, query, protocol, application, within=True):
+    """(port, protocol, application) that let the query through, or all False.
+    A requested port range has to fit inside the rule's; with within=False
+    overlapping it is enough."""
+    for app, protocols in _matching(services, application):
+        for proto, port_ranges in _matching(protocols, protocol):
+            if _port_match(port_ranges, query, within):
+                return True, proto, app
+    return False, False, False
+
+
+def service_field_flags(services, query, protocol, application, within=True):
+    """Port, protocol and application checked one at a time, so a caller can
+    tell which of them keeps a rule from matching."""
+    port_flag = protocol_flag = application_flag = False
+    for app, protocols in services.items():
+        for proto, port_ranges in protocols.items():
+            if not application_flag and _matching({app: None}, application):
+                application_flag = app
+            if not protocol_flag and _matching({proto: None}, protocol):
+                protocol_flag = proto
+            if not port_flag and _port_match(port_ranges, query, within):
+                port_flag = True
+    return port_flag, protocol_flag, application_flag
+
+
+def _rule_services(rule):
+    # A Rule record already holds its entries as (application, protocol, port)
+    # triples; reading them through rule["entries"] would build dicts first.
+    if isinstance(rule, Rule):
+        return _compile_triples(rule.entries)
+    return compile_services(rule.get("entries", []))
+
+
+def compile_rule(rule):
+    return {
+        "name": rule["name"],
+        "index": rule.get("index"),
+        "source": compile_members(rule.get("source", [])),
+        "destination": compile_members(rule.get("destination", [])),
+        "negate_source": bool(rule.get("negate-source")),
+        "negate_destination": rule.get("negate-destination") == "yes",
+        "services": _rule_services(rule),
+    }
+
+
+def compile_rules(rules):
+    """Compiled rulebase, one entry per rule in the same order as rules_write output."""
+    return [compile_rule(rule) for rule in rules]
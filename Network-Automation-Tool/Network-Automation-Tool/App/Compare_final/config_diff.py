@@ -0,0 +1,72 @@
+import hashlib
+
+SECTIONS = ("rules", "addresses", "services", "application_groups")
+# Where a rule names objects of each section, and where groups list their members
+REFERENCES = {
+    "addresses": (("source", "destination"), "static"),
+    "services": (("service",), "members"),
+    "application_groups": (("application",), "members"),
+}
+
+
+def _digest(entry):
+    # The rule index is its position, not its content: moving a rule is
+    # handled by renumbering, not recompiling.
+    items = sorted((key, value) for key, value in entry.items() if key != "index")
+    return hashlib.sha1(repr(items).encode()).hexdigest()
+
+
+def entry_hashes(config, fqdns=None):
+    """Digest of every <entry> of a load_config result, per section and entry name.
+
+    With the resolved fqdns ({name: [address, ...]}), an fqdn address
+    object's digest covers its addresses too, so a DNS change makes the
+    rules using it dirty. Must run before rules_write, which extends the
+    parsed rules in place.
+    """
+    hashes = {section: {name: _digest(entry) for name, entry in config[section].items()}
+              for section in SECTIONS}
+    for name, entry in config["addresses"].items():
+        if fqdns and "fqdn" in entry:
+            resolved = {fqdn: fqdns.get(fqdn.strip()) for fqdn in entry["fqdn"].split(",")}
+            hashes["addresses"][name] = _digest(dict(entry, resolved=sorted(resolved.items())))
+    return hashes
+
+
+def _changed(old, new):
+    return {name for name in old.keys() | new.keys() if old.get(name) != new.get(name)}
+
+
+def _with_containers(changed, groups, member_key):
+    """The changed names plus every group that holds one of them, directly or through other groups."""
+    parents = {}
+    for name, entry in groups.items():
+        for member in entry.get(member_key, ()):
+            parents.setdefault(member, []).append(name)
+    found = set(changed)
+    stack = list(changed)
+    while stack:
+        for parent in parents.get(stack.pop(), ()):
+            if parent not in found:
+                found.add(parent)
+                stack.append(parent)
+    return found
+
+
+def dirty_rules(old_hashes, new_hashes, config):
+    """Names of the rules that are new, edited, or reference an object whose expansion changed."""
+    changed = {
+        section: _with_containers(_changed(old_hashes[section], new_hashes[section]),
+                                  config[section], member_key)
+        for section, (fields, member_key) in REFERENCES.items()
+    }
+    dirty = set()
+    for name, rule in config["rules"].items():
+        if old_hashes["rules"].get(name) != new_hashes["rules"][name]:
+            dirty.add(name)
+            continue
+        for section, (fields, member_key) in REFERENCES.items():
+            if any(member in changed[section] for field in fields for member in rule.get(field, ())):
+                dirty.add(name)
+                break
+    return dirty
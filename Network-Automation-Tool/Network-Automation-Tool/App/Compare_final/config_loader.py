@@ -0,0 +1,188 @@
+import gc
+import xml.etree.ElementTree as ET
+from contextlib import contextmanager
+
+CHUNK_SIZE = 1 << 20
+ADDRESS_TAGS = ("address", "address-group")
+SERVICE_TAGS = ("service", "service-group")
+
+
+def _text(element):
+    return element.text.strip() if element.text is not None else ''
+
+
+def _rule_entry(entry, index):
+    entry_dict = {}
+    for child in entry:
+        entry_dict[child.tag] = [_text(subchild) for subchild in child]
+        if child.tag in ("action", "negate-destination", "negate-source"):
+            entry_dict[child.tag] = child.text
+        entry_dict["index"] = index
+    return entry_dict
+
+
+def _address_entry(entry):
+    entry_dict = {}
+    for child in entry:
+        if child.tag in ("ip-netmask", "fqdn", "ip-range"):
+            entry_dict[child.tag] = _text(child)
+        else:
+            entry_dict[child.tag] = [_text(subchild) for subchild in child]
+    return entry_dict
+
+
+def _service_entry(entry):
+    entry_dict = {}
+    for child in entry:
+        if child.tag == "members":
+            entry_dict[child.tag] = {}
+            for subchild in child:
+                entry_dict[child.tag][subchild.text] = []
+        elif child.tag == "protocol":
+            for protocol in child:
+                port = protocol.find("port")
+                if port is not None:
+                    entry_dict["protocol"] = protocol.tag
+                    entry_dict["port"] = port.text
+    return entry_dict
+
+
+def _application_group_entry(entry):
+    entry_dict = {}
+    for child in entry:
+        if child.tag == "members":
+            entry_dict[child.tag] = [_text(subchild) for subchild in child]
+        else:
+            entry_dict[child.tag] = _text(child)
+    return entry_dict
+
+
+class ConfigBuilder:
+    """Consumes start/end parse events of a PAN-OS config and fills the object dictionaries.
+
+    Entries are collected from the first rulebase, every address/address-group
+    and service/service-group section and the first application-group, the
+    same elements the old recursive walks picked. Each entry is converted as
+    soon as it is complete and finished subtrees are detached so the parsed
+    tree never grows past the element currently being read.
+    """
+
+    def __init__(self):
+        self.rules = {}
+        self.addresses = {}
+        self.services = {}
+        self.application_groups = {}
+        self.stack = []
+        self.sections = []
+        self.pending = {}
+        self.seen_rulebase = False
+        self.seen_application_group = False
+        self.index = 1
+
+    def _open(self, kind):
+        return any(section_kind == kind for section_kind, depth in self.sections)
+
+    def start(self, element):
+        tag = element.tag
+        depth = len(self.stack)
+        self.stack.append(element)
+        if tag == "rulebase" and not self.seen_rulebase:
+            self.seen_rulebase = True
+            self.sections.append(("rules", depth))
+        elif tag in ADDRESS_TAGS and not self._open("addresses"):
+            self.sections.append(("addresses", depth))
+        elif tag in SERVICE_TAGS and not self._open("services"):
+            self.sections.append(("services", depth))
+        elif tag == "application-group" and not self.seen_application_group:
+            self.seen_application_group = True
+            self.sections.append(("application_groups", depth))
+        if tag == "entry" and self.sections:
+            # Slots are claimed in document order so the dictionaries keep
+            # the order (and the rule indexes) a findall(".//entry") gives.
+            slots = []
+            name = element.get("name")
+            for kind, section_depth in self.sections:
+                slot = {}
+                getattr(self, kind)[name] = slot
+                slots.append((kind, slot, self.index))
+                if kind == "rules":
+                    self.index += 1
+            self.pending[element] = slots
+
+    def end(self, element):
+        self.stack.pop()
+        depth = len(self.stack)
+        slots = self.pending.pop(element, None)
+        if slots is not None:
+            for kind, slot, index in slots:
+                if kind == "rules":
+                    slot.update(_rule_entry(element, index))
+                elif kind == "addresses":
+                    slot.update(_address_entry(element))
+                elif kind == "services":
+                    slot.update(_service_entry(element))
+                else:
+                    slot.update(_application_group_entry(element))
+            outer = self.sections[0][1]
+            if not any(ancestor.tag == "entry" for ancestor in self.stack[outer + 1:]):
+                self._release(element)
+            return
+        while self.sections and self.sections[-1][1] == depth:
+            self.sections.pop()
+        if not self.sections:
+            self._release(element)
+
+    def _release(self, element):
+        element.clear()
+        if self.stack:
+            self.stack[-1].remove(element)
+
+    def feed_events(self, events):
+        for event, element in events:
+            if event == "start":
+                self.start(element)
+            else:
+                self.end(element)
+
+    def result(self):
+        return {
+            "rules": self.rules,
+            "addresses": self.addresses,
+            "services": self.services,
+            "application_groups": self.application_groups,
+        }
+
+
+@contextmanager
+def _gc_paused():
+    # The loader creates no reference cycles, but the hundreds of thousands
+    # of short-lived elements keep triggering full collections over the
+    # growing result dictionaries.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def load_config(source):
+    """Streams a config file (path or binary file object) into the rule and object dictionaries."""
+    builder = ConfigBuilder()
+    with _gc_paused():
+        builder.feed_events(ET.iterparse(source, events=("start", "end")))
+    return builder.result()
+
+
+def load_config_string(xml_content):
+    """Same as load_config for a config already held as a string, fed to the parser in chunks."""
+    builder = ConfigBuilder()
+    parser = ET.XMLPullParser(events=("start", "end"))
+    with _gc_paused():
+        for offset in range(0, len(xml_content), CHUNK_SIZE):
+            parser.feed(xml_content[offset:offset + CHUNK_SIZE])
+            builder.feed_events(parser.read_events())
+        parser.close()
+        builder.feed_events(parser.read_events())
+    return builder.result()
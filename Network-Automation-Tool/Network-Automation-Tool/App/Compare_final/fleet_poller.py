@@ -0,0 +1,145 @@
+import concurrent.futures
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class FleetPoller:
+    """Background thread that keeps the snapshot of every firewall fresh.
+
+    Every interval seconds (with some jitter so devices are not hit in
+    lockstep) each firewall returned by firewalls() is refreshed on a pool of
+    at most workers threads. A refresh is retried with a jittered exponential
+    backoff and abandoned once it runs past timeout seconds; whatever it
+    builds is only published to the cache if it finished in time, so readers
+    always see either the previous snapshot or the complete new one. While
+    the poller runs the cache is passive: queries are answered from the
+    stored snapshots without any version call to the device. Stopping it
+    puts the cache back the way start() found it. Firewalls whose snapshot
+    was imported from a saved config are left alone.
+    """
+
+    def __init__(self, cache, firewalls, interval=300, workers=8, timeout=180, retries=2, backoff=5, jitter=0.1):
+        self.cache = cache
+        self.firewalls = firewalls
+        self.interval = interval
+        self.workers = workers
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.jitter = jitter
+        self.results = {}
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.last_poll = None
+        self.was_passive = False
+
+    def _refresh(self, firewall, deadline):
+        attempt = 0
+        while True:
+            try:
+                return self.cache.refresh(firewall, incremental=True, deadline=deadline)
+            except Exception as e:
+                attempt += 1
+                delay = self.backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+                if attempt > self.retries or time.monotonic() + delay > deadline or self.stop_event.is_set():
+                    raise
+                logger.warning(f"Refresh of {firewall} failed (attempt {attempt}), retrying in {delay:.1f}s: {e}")
+                self.stop_event.wait(delay)
+
+    def _record(self, firewall, error=None):
+        with self.lock:
+            result = self.results.setdefault(firewall, {"ok": None, "error": None, "failures": 0})
+            result["at"] = time.time()
+            if error is None:
+                result.update(ok=result["at"], error=None, failures=0)
+            else:
+                result["error"] = error
+                result["failures"] += 1
+
+    def poll(self):
+        """Refreshes every firewall once and waits for all of them (or their timeouts)."""
+        try:
+            firewalls = [firewall for firewall in self.firewalls() if not self.cache.pinned(firewall)]
+        except Exception as e:
+            logger.error(f"Could not read the firewall list: {e}")
+            return
+        started = time.monotonic()
+        picked_up = {}
+
+        def refresh(firewall):
+            # The deadline starts when a worker picks the device up, not
+            # when it was queued behind the others.
+            picked_up[firewall] = time.monotonic()
+            return self._refresh(firewall, picked_up[firewall] + self.timeout)
+
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="fleet-poll")
+        pending = {executor.submit(refresh, firewall): firewall for firewall in firewalls}
+        try:
+            while pending:
+                done, _ = concurrent.futures.wait(pending, timeout=1, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    firewall = pending.pop(future)
+                    try:
+                        future.result()
+                        self._record(firewall)
+                    except Exception as e:
+                        logger.error(f"Background refresh of {firewall} failed: {e}")
+                        self._record(firewall, str(e))
+                now = time.monotonic()
+                for future, firewall in list(pending.items()):
+                    # A hung device keeps its worker busy, but its result
+                    # is discarded and the poll does not wait for it.
+                    if firewall in picked_up and now - picked_up[firewall] > self.timeout:
+                        del pending[future]
+                        logger.error(f"Background refresh of {firewall} timed out after {self.timeout}s")
+                        self._record(firewall, f"timed out after {self.timeout}s")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        self.last_poll = {"at": time.time(), "firewalls": len(firewalls), "seconds": round(time.monotonic() - started, 1)}
+        logger.info(f"Polled {len(firewalls)} firewalls in {self.last_poll['seconds']}s")
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            self.poll()
+            self.stop_event.wait(self.interval * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+    def start(self, interval=None):
+        if interval is not None:
+            self.interval = interval
+        with self.lock:
+            if self.running():
+                return
+            self.stop_event.clear()
+            self.was_passive = self.cache.passive
+            self.cache.passive = True
+            self.thread = threading.Thread(target=self._run, name="fleet-poller", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        with self.lock:
+            thread, self.thread = self.thread, None
+            if thread is not None:
+                self.cache.passive = self.was_passive
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=1)
+
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def status(self):
+        with self.lock:
+            results = {firewall: dict(result) for firewall, result in self.results.items()}
+        return {
+            "running": self.running(),
+            "interval": self.interval,
+            "workers": self.workers,
+            "timeout": self.timeout,
+            "last_poll": self.last_poll,
+            "firewalls": results,
+        }
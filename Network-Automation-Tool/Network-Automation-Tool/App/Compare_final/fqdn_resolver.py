@@ -0,0 +1,134 @@
+import concurrent.futures
+import logging
+import socket
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def system_resolve(fqdn):
+    """Every IPv4 address of a name, from the system resolver."""
+    return socket.gethostbyname_ex(fqdn)[2]
+
+
+class FqdnResolver:
+    """Thread-safe TTL cache in front of a resolver, filled in bulk on a bounded pool.
+
+    resolve(fqdn) returns a list of addresses (system_resolve by default, a
+    stub in tests). Failures are cached too, as an empty list for
+    negative_ttl seconds, so a dead name does not stall every rebuild.
+    Concurrent lookups of the same name share one resolver call.
+    """
+
+    def __init__(self, resolve=system_resolve, ttl=300, negative_ttl=60, workers=16, timeout=10):
+        self.resolver = resolve
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.workers = workers
+        self.timeout = timeout
+        self.entries = {}
+        self.inflight = {}
+        self.lock = threading.Lock()
+        self.lookups = 0
+        self.failures = 0
+
+    def _cached(self, fqdn, now):
+        entry = self.entries.get(fqdn)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        return None
+
+    def _lookup(self, fqdn):
+        try:
+            addresses = sorted(set(self.resolver(fqdn)))
+            expires = time.monotonic() + self.ttl
+            failed = False
+        except Exception as e:
+            logger.warning(f"Could not resolve {fqdn}: {e}")
+            addresses = []
+            expires = time.monotonic() + self.negative_ttl
+            failed = True
+        with self.lock:
+            self.lookups += 1
+            self.failures += failed
+            self.entries[fqdn] = (expires, addresses)
+            self.inflight.pop(fqdn, None)
+        return addresses
+
+    def _future(self, executor, fqdn):
+        """A cached value, the running lookup of fqdn, or a new one submitted to executor."""
+        with self.lock:
+            cached = self._cached(fqdn, time.monotonic())
+            if cached is not None:
+                return cached
+            future = self.inflight.get(fqdn)
+            if future is None:
+                future = executor.submit(self._lookup, fqdn)
+                self.inflight[fqdn] = future
+            return future
+
+    def resolve(self, fqdn):
+        with self.lock:
+            cached = self._cached(fqdn, time.monotonic())
+        if cached is not None:
+            return cached
+        return self.resolve_all([fqdn]).get(fqdn, [])
+
+    def resolve_all(self, fqdns):
+        """{fqdn: [address, ...]} for every name, looking up the uncached ones concurrently.
+
+        A lookup still running after timeout seconds counts as a failure
+        for this call; its result is cached whenever it arrives.
+        """
+        names = sorted(set(fqdns))
+        if not names:
+            return {}
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=min(self.workers, len(names)),
+                                                         thread_name_prefix="fqdn")
+        try:
+            pending = {name: self._future(executor, name) for name in names}
+            deadline = time.monotonic() + self.timeout
+            resolved = {}
+            for name, value in pending.items():
+                if not isinstance(value, concurrent.futures.Future):
+                    resolved[name] = value
+                    continue
+                try:
+                    resolved[name] = value.result(timeout=max(0, deadline - time.monotonic()))
+                except concurrent.futures.TimeoutError:
+                    logger.warning(f"Resolving {name} timed out")
+                    resolved[name] = []
+            return resolved
+        finally:
+            executor.shutdown(wait=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            return {"cached": len(self.entries), "lookups": self.lookups, "failures": self.failures,
+                    "ttl": self.ttl, "negative_ttl": self.negative_ttl}
+
+
+def fqdn_names(address_dict):
+    """Every name held by the fqdn address objects of a config."""
+    return {name.strip() for entry in address_dict.values() if "fqdn" in entry
+            for name in entry["fqdn"].split(",") if name.strip()}
+
+
+def expand_fqdns(members, resolved):
+    """Address members with each resolved FQDN replaced by its addresses; unresolved ones stay as they are."""
+    expanded = []
+    for member in members:
+        addresses = resolved.get(member)
+        if addresses:
+            expanded.extend(addresses)
+        else:
+            expanded.append(member)
+    return expanded
+
+
+fqdn_resolver = FqdnResolver()
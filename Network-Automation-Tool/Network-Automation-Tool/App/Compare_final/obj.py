@@ -1,204 +1,22 @@
-import xml.etree.ElementTree as ET
 import time
 import socket
+from config_loader import load_config
+from object_closure import address_closure, service_closure
 
 # Measure start time
 start_time = time.time()
 
-# Load the XML content 
-with open(r"pah-pri-xml-eff-conf.txt", 'r') as file:
-    xml_content = file.read()
+# Stream the XML content into the rule and object dictionaries
+config = load_config(r"pah-pri-xml-eff-conf.txt")
+rule_dict = config["rules"]
+address_dict = config["addresses"]
+application_group_dict = config["application_groups"]
+service_group_dict = config["services"]
+memo, address_cycles = address_closure(address_dict)
+memo1, service_cycles = service_closure(service_group_dict)
+from app_catalog import app_catalog, CONTAINER
 
-root = ET.fromstring(xml_content)
-
-# Function to gather rulebase elements
-def print_rulebase(element, rules):
-    if element.tag == "rulebase":
-        rules.append(ET.tostring(element, encoding='unicode'))
-    else:
-        for child in element:
-            print_rulebase(child, rules)
-
-rules = []
-print_rulebase(root, rules)
-rules = ET.fromstring(rules[0])
-
-# Function to store rulebase in a dictionary
-def store_rule_in_dict(element):
-    if element.tag == "rulebase":
-        rule_dict = {}
-        for entry in element.findall(".//entry"):
-            entry_dict = {}
-            for child in entry:
-                entry_dict[child.tag] = [subchild.text.strip() for subchild in child]
-                if child.tag=="action":
-                    entry_dict[child.tag]=child.text
-            rule_dict[entry.attrib['name']] = entry_dict
-        return rule_dict
-
-rule_dict = store_rule_in_dict(rules)
-# Function to gather address elements
-def print_address(element, address):
-    if element.tag == "address-group" or element.tag=="address":
-        address.append(ET.tostring(element, encoding='unicode'))
-    else:
-        for child in element:
-            print_address(child, address)
-
-address = []
-print_address(root, address)
-address = ET.fromstring(address[0])
-
-# Function to store address in a dictionary
-def store_address_in_dict(element):
-    if element.tag == "address-group" or element.tag =="address":
-        address_dict = {}
-        for entry in element.findall(".//entry"):
-            entry_dict = {}
-            for child in entry:
-                if child.tag == "ip-netmask":
-                    entry_dict[child.tag] = child.text.strip()
-                elif child.tag == "fqdn":
-                    entry_dict[child.tag] = child.text.strip()
-                else:
-                    entry_dict[child.tag] = [subchild.text.strip() for subchild in child]
-            address_dict[entry.attrib['name']] = entry_dict
-        return address_dict
-address_dict = store_address_in_dict(address)
-memo = {}
-
-fq_ad={}
-def address_check(add):
-    # If the address is already processed, return to avoid reprocessing and infinite loops
-    if add in memo:
-        return
-    # Initialize the address in memo with an empty set
-    memo[add] = set()
-
-    # Process static addresses
-    if "static" in address_dict[add]:
-        for a in address_dict[add]["static"]:
-            if a in address_dict:
-                if a not in memo:
-                    address_check(a)
-                # Update the memo entry with addresses found in the static address check
-                memo[add].update(memo[a])
-            else:
-                memo[add].add(a)
-                
-    # Process IP-Netmask addresses
-    if "ip-netmask" in address_dict[add]:
-        for ip in address_dict[add]["ip-netmask"].split(","):
-            memo[add].add(ip)
-    
-    # Process FQDN addresses and resolve to IP addresses
-    if "fqdn" in address_dict[add]:
-        for fq in address_dict[add]["fqdn"].split(","):
-            fq_ad[fq]=[fq]
-            memo[add].add(fq)
-
-for add in address_dict:
-    address_check(add)
-
-# # Function to gather application-group elements
-def print_application_group(element, application_group):
-    if element.tag == "application-group":
-        application_group.append(ET.tostring(element, encoding='unicode'))
-    else:
-        for child in element:
-            print_application_group(child, application_group)
-
-application_group = []
-print_application_group(root, application_group)
-application_group = ET.fromstring(application_group[0])
-
-# Function to store application-group in a dictionary
-def store_application_group_in_dict(element):
-    if element.tag == "application-group":
-        application_group_dict = {}
-        for entry in element.findall(".//entry"):
-            entry_dict = {}
-            for child in entry:
-                if child.tag == "members":
-                    entry_dict[child.tag] = [subchild.text.strip() for subchild in child]
-                else:
-                    entry_dict[child.tag] = child.text.strip()
-            application_group_dict[entry.attrib['name']] = entry_dict
-        return application_group_dict
-
-application_group_dict = store_application_group_in_dict(application_group)
-import xml.etree.ElementTree as ET
-
-def print_service_group(element, service_group):
-    if element.tag in ["service-group", "service"]:
-        service_group.append(ET.tostring(element, encoding='unicode'))
-    else:
-        for child in element:
-            print_service_group(child, service_group)
-
-service_group = []
-print_service_group(root, service_group)
-service_group = [ET.fromstring(sg) for sg in service_group]
-
-# Function to store service-group and service in a dictionary
-def store_service_group_in_dict(elements):
-    service_group_dict = {}
-    for element in elements:
-        if element.tag in ["service-group", "service"]:
-            for entry in element.findall(".//entry"):
-                entry_dict = {}
-                for child in entry:
-                    if child.tag == "members":
-                        entry_dict[child.tag] = {}
-                        for subchild in child:
-                            entry_dict[child.tag][subchild.text] = []
-                    elif child.tag == "protocol":
-                        for protocol in child:
-                            port = protocol.find("port")
-                            if port is not None:
-                                entry_dict["protocol"] = protocol.tag
-                                entry_dict["port"] = port.text
-                service_group_dict[entry.attrib['name']] = entry_dict
-    return service_group_dict
-
-# Example usage
-service_group_dict = store_service_group_in_dict(service_group)
-memo1 = {}
-
-memo1 = {}
-
-def serv_objects(ser):
-    if ser in memo1:
-        return
-    memo1[ser] = {"port": [], "protocol": [],"service":[]}
-
-    if "members" in service_group_dict[ser]:
-        for a in service_group_dict[ser]["members"]:
-            if a in service_group_dict:
-                if a not in memo1:
-                    serv_objects(a)
-                memo1[ser]["port"].extend(memo1[a]["port"])
-                memo1[ser]["protocol"].extend(memo1[a]["protocol"])
-            else:
-                memo1[ser]["service"].append(a)
-    if "protocol" in service_group_dict[ser]:
-        for protocol in service_group_dict[ser]["protocol"].split(","):
-            memo1[ser]["protocol"].append(protocol)
-    if "port" in service_group_dict[ser]:
-        for port in service_group_dict[ser]["port"].split(","):
-            memo1[ser]["port"].append(port)
-
-for s in service_group_dict:
-    serv_objects(s)
-import pandas as pd
-
-# Load the app defaults from the CSV
-app_defaults = pd.read_csv(    r"C:\Users\gopiprashanth.raju\OneDrive - Providence St. Joseph Health\Desktop\Network-Automation-Tool-Gopi (3)\Network-Automation-Tool-Gopi\Network-Automation-Tool-Gopi\App\Compare_final\applipedia_data_cleaned.csv"
-)
-
-# Convert the app_defaults to a dictionary for faster access
-app_defaults_dict = app_defaults.set_index('Name').T.to_dict('list')
-print(app_defaults_dict)
+catalog = app_catalog.get()
 
 rules = {}
 for rule_name, rule in rule_dict.items():
@@ -238,21 +56,12 @@ for rule_name, rule in rule_dict.items():
             if ser == "application-default":
                 if "application" in rule and rule["application"]:
                     for app in rule["application"]:
-                        if app in app_defaults_dict:
-                            
-                            ports.extend(app_defaults_dict[app][9].strip("[]").replace("'", "").split(","))
-                            protocols.extend(app_defaults_dict[app][8].strip("[]").replace("'", "").split(","))
-                            # Check OnClick_Last_Digit and handle accordingly
-                            last_digit = int(app_defaults_dict[app][7])  # Assuming this column represents OnClick_Last_Digit
-                            if last_digit == 1:
-                                idx = app_defaults[app_defaults['Name'] == app].index[0] + 1
-                                while idx < len(app_defaults) and int(app_defaults.iloc[idx, 8]) not in [0, 1]:
-                                    next_app = app_defaults.iloc[idx, 1]
-                                    apps.append(next_app)
-                                    print(next_app)
-                                    ports.extend(app_defaults_dict[next_app][9].strip("[]").replace("'", "").split(","))
-                                    protocols.extend(app_defaults_dict[next_app][8].strip("[]").replace("'", "").split(","))
-                                    idx += 1
+                        if app in catalog:
+                            record = catalog[app]
+                            ports.extend(record.expanded_ports)
+                            protocols.extend(record.expanded_protocols)
+                            if record.level == CONTAINER:
+                                apps.extend(record.children)
                                 rule["application"].extend(apps)
                 continue
             elif ser in ["service-https", "service-http"]:
@@ -303,9 +112,9 @@ for rule_name, rule in rule_dict.items():
 
     if "service" in r and "application-default" in r["service"]:
         for app in r["application"]:
-            if app in app_defaults_dict:
-                for port in app_defaults_dict[app][10].strip("[]").replace("'", "").split(","):
-                    for protocol in app_defaults_dict[app][9].strip("[]").replace("'", "").split(","):
+            if app in catalog:
+                for port in catalog[app].ports:
+                    for protocol in catalog[app].protocols:
                         entry = {
                             "application": app,
                             "protocol": protocol,
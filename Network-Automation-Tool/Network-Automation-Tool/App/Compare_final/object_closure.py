@@ -0,0 +1,286 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from collections.abc import Mapping
+
+logger = logging.getLogger(__name__)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATABASE = os.path.join(HERE, "object_closure.db")
+ADDRESS_VALUE_TAGS = ("ip-netmask", "fqdn", "ip-range")
+
+
+def _components(graph):
+    """Strongly connected components of {node: [successor, ...]}, successors first.
+
+    Iterative Tarjan, so nesting depth is not limited by the interpreter's
+    recursion limit. Every component comes after all the components its
+    nodes point to, the order the closures have to be built in.
+    """
+    index = {}
+    low = {}
+    stack = []
+    on_stack = set()
+    components = []
+    for root in graph:
+        if root in index:
+            continue
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(graph[root]))]
+        while work:
+            node, children = work[-1]
+            for child in children:
+                if child not in index:
+                    index[child] = low[child] = len(index)
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(graph[child])))
+                    break
+                if child in on_stack:
+                    low[node] = min(low[node], index[child])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+    return components
+
+
+def _is_cycle(graph, component):
+    return len(component) > 1 or component[0] in graph[component[0]]
+
+
+def _unique(values):
+    return list(dict.fromkeys(values))
+
+
+def address_closure(address_dict):
+    """memo of rules_write: every address and address-group name with the addresses it expands to.
+
+    Returns (memo, cycles). Groups that contain each other end up with the
+    union of the whole cycle; each cycle is reported once as a sorted list
+    of names.
+    """
+    graph = {name: [a for a in entry.get("static", []) if a in address_dict]
+             for name, entry in address_dict.items()}
+    memo = {}
+    cycles = []
+    for component in _components(graph):
+        inside = set(component)
+        values = set()
+        for name in component:
+            entry = address_dict[name]
+            for a in entry.get("static", []):
+                if a not in address_dict:
+                    values.add(a)
+                elif a not in inside:
+                    values.update(memo[a])
+            for tag in ADDRESS_VALUE_TAGS:
+                if tag in entry:
+                    values.update(entry[tag].split(","))
+        if _is_cycle(graph, component):
+            cycles.append(sorted(component))
+        for name in component:
+            memo[name] = set(values)
+    return {name: memo[name] for name in address_dict}, cycles
+
+
+def service_closure(service_group_dict):
+    """memo1 of rules_write: the ports, protocols and member names of every service and service-group.
+
+    Returns (memo1, cycles). "service" lists a group's direct members, "port"
+    and "protocol" everything reachable through nested groups, each value
+    once.
+    """
+    graph = {name: [a for a in entry.get("members", {}) if a in service_group_dict]
+             for name, entry in service_group_dict.items()}
+    memo1 = {}
+    cycles = []
+    for component in _components(graph):
+        inside = set(component)
+        ports = []
+        protocols = []
+        for name in component:
+            entry = service_group_dict[name]
+            for a in graph[name]:
+                if a not in inside:
+                    ports.extend(memo1[a]["port"])
+                    protocols.extend(memo1[a]["protocol"])
+            if "protocol" in entry:
+                protocols.extend(entry["protocol"].split(","))
+            if "port" in entry:
+                ports.extend(entry["port"].split(","))
+        ports = _unique(ports)
+        protocols = _unique(protocols)
+        if _is_cycle(graph, component):
+            cycles.append(sorted(component))
+        for name in component:
+            memo1[name] = {"port": list(ports), "protocol": list(protocols),
+                           "service": list(service_group_dict[name].get("members", {}))}
+    return {name: memo1[name] for name in service_group_dict}, cycles
+
+
+class ClosureStore:
+    """Resolved address and service closures in SQLite, one config version per firewall.
+
+    Saving a firewall's closures for a new config hash replaces the rows of
+    its previous one.
+    """
+
+    def __init__(self, database=DATABASE):
+        self.database = database
+        self.lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.database)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS closure_versions (
+                firewall TEXT PRIMARY KEY,
+                config_hash TEXT NOT NULL,
+                cycles TEXT NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS object_closures (
+                firewall TEXT NOT NULL,
+                config_hash TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                name TEXT NOT NULL,
+                value TEXT NOT NULL,
+                PRIMARY KEY (firewall, config_hash, kind, name)
+            )
+        """)
+        return conn
+
+    def has(self, firewall, config_hash):
+        with self.lock:
+            conn = self._connect()
+            try:
+                row = conn.execute("SELECT config_hash FROM closure_versions WHERE firewall = ?",
+                                   (firewall,)).fetchone()
+            finally:
+                conn.close()
+        return row is not None and row[0] == config_hash
+
+    def save(self, firewall, config_hash, memo, memo1, cycles=()):
+        rows = [(firewall, config_hash, "address", name, json.dumps(sorted(values)))
+                for name, values in memo.items()]
+        rows.extend((firewall, config_hash, "service", name, json.dumps(service))
+                    for name, service in memo1.items())
+        with self.lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute("DELETE FROM object_closures WHERE firewall = ?", (firewall,))
+                    conn.executemany("INSERT INTO object_closures VALUES (?, ?, ?, ?, ?)", rows)
+                    conn.execute("INSERT OR REPLACE INTO closure_versions VALUES (?, ?, ?)",
+                                 (firewall, config_hash, json.dumps(list(cycles))))
+            finally:
+                conn.close()
+
+    def load(self, firewall, config_hash, kind):
+        """Stored closures of one kind, or None once the firewall's stored version is another one.
+
+        The version check and the rows are read in one transaction, so a
+        concurrent save is seen either wholly or not at all.
+        """
+        with self.lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute("BEGIN")
+                    version = conn.execute("SELECT config_hash FROM closure_versions WHERE firewall = ?",
+                                           (firewall,)).fetchone()
+                    if version is None or version[0] != config_hash:
+                        return None
+                    rows = conn.execute("SELECT name, value FROM object_closures "
+                                        "WHERE firewall = ? AND config_hash = ? AND kind = ? ORDER BY rowid",
+                                        (firewall, config_hash, kind)).fetchall()
+            finally:
+                conn.close()
+        if kind == "address":
+            return {name: set(json.loads(value)) for name, value in rows}
+        return {name: json.loads(value) for name, value in rows}
+
+
+class LazyClosure(Mapping):
+    """memo or memo1 of one config version, read from the store on first use.
+
+    If the store no longer holds that version by then (another process saved
+    a newer one) or cannot be read, compute() resolves the closure instead.
+    """
+
+    def __init__(self, store, firewall, config_hash, kind, compute):
+        self.store = store
+        self.firewall = firewall
+        self.config_hash = config_hash
+        self.kind = kind
+        self.compute = compute
+        self.data = None
+
+    def _loaded(self):
+        if self.data is None:
+            try:
+                data = self.store.load(self.firewall, self.config_hash, self.kind)
+            except sqlite3.Error as e:
+                logger.warning(f"Could not read object closures of {self.firewall}: {e}")
+                data = None
+            if data is None:
+                data = self.compute()
+            self.data = data
+        return self.data
+
+    def __getitem__(self, name):
+        return self._loaded()[name]
+
+    def __contains__(self, name):
+        return name in self._loaded()
+
+    def __iter__(self):
+        return iter(self._loaded())
+
+    def __len__(self):
+        return len(self._loaded())
+
+
+closure_store = ClosureStore()
+
+
+def resolve_closures(firewall, config_hash, address_dict, service_group_dict, store=None):
+    """memo and memo1 of a firewall's config, resolved once per config hash.
+
+    A config version seen before is served lazily from the store; a new one
+    is resolved and saved. Group cycles are logged, not fatal.
+    """
+    store = closure_store if store is None else store
+    try:
+        if store.has(firewall, config_hash):
+            return (LazyClosure(store, firewall, config_hash, "address", lambda: address_closure(address_dict)[0]),
+                    LazyClosure(store, firewall, config_hash, "service",
+                                lambda: service_closure(service_group_dict)[0]))
+    except sqlite3.Error as e:
+        logger.warning(f"Could not read object closures of {firewall}: {e}")
+    memo, address_cycles = address_closure(address_dict)
+    memo1, service_cycles = service_closure(service_group_dict)
+    for cycle in address_cycles:
+        logger.warning(f"{firewall}: address groups contain each other: {', '.join(cycle)}")
+    for cycle in service_cycles:
+        logger.warning(f"{firewall}: service groups contain each other: {', '.join(cycle)}")
+    try:
+        store.save(firewall, config_hash, memo, memo1, address_cycles + service_cycles)
+    except sqlite3.Error as e:
+        logger.warning(f"Could not save object closures of {firewall}: {e}")
+    return memo, memo1
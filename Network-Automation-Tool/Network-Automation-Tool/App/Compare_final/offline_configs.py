@@ -0,0 +1,127 @@
+import concurrent.futures
+import ipaddress
+import logging
+import os
+import time
+
+from .config_loader import load_config_string
+from .Firewall_Rule_Parse import load_rulebase, snapshot_cache
+from .panorama_rulebases import PanoramaConfig
+
+logger = logging.getLogger(__name__)
+
+CONFIG_SUFFIXES = (".xml", ".txt")
+
+
+def firewall_from_path(path):
+    """Firewall name of a saved config: the file name without extension and a trailing _<ip>."""
+    name = os.path.splitext(os.path.basename(path))[0]
+    head, sep, tail = name.rpartition("_")
+    if sep:
+        try:
+            ipaddress.ip_address(tail)
+            return head
+        except ValueError:
+            pass
+    return name
+
+
+def config_text(content):
+    """The config document of a saved export or CLI capture (show config effective-running)."""
+    for start_tag, end_tag in (("<response", "</response>"), ("<config", "</config>")):
+        start = content.find(start_tag)
+        end = content.rfind(end_tag)
+        if start != -1 and end != -1:
+            return content[start:end + len(end_tag)]
+    return None
+
+
+def load_content(content, firewall):
+    """Compiled rulebase of a saved config, the same dict load_rulebase builds over SSH.
+
+    Returns None for text without a config document and for XML that holds
+    no rules or objects, such as the interface and route dumps kept next to
+    the configs.
+    """
+    xml_content = config_text(content)
+    if xml_content is None:
+        return None
+    config = load_config_string(xml_content)
+    if not config["rules"] and not config["addresses"] and not config["services"]:
+        return None
+    return load_rulebase(firewall, xml_content, config)
+
+
+def load_file(path, firewall=None):
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return load_content(f.read(), firewall or firewall_from_path(path))
+
+
+def publish(rulebase):
+    # Imported firewalls may not be reachable; queries must not try to
+    # check their version over SSH.
+    snapshot_cache.publish(rulebase["firewall"], rulebase, rulebase["config_hash"], pinned=True)
+
+
+def config_files(path):
+    if os.path.isfile(path):
+        return [path]
+    return sorted(
+        os.path.join(path, name) for name in os.listdir(path)
+        if name.lower().endswith(CONFIG_SUFFIXES) and os.path.isfile(os.path.join(path, name))
+    )
+
+
+def load_path(path, firewall=None, workers=4):
+    """Loads a config file or every config in a directory into the snapshot cache.
+
+    Files are parsed on a small thread pool and each rulebase is published
+    as soon as it is compiled. Returns {firewall: rule count}, the skipped files and the errors by file.
+    """
+    started = time.monotonic()
+    files = config_files(path)
+    loaded, skipped, errors = {}, [], {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(load_file, file, firewall if len(files) == 1 else None): file for file in files}
+        for future in concurrent.futures.as_completed(futures):
+            file = futures[future]
+            try:
+                rulebase = future.result()
+            except Exception as e:
+                logger.error(f"Could not load config {file}: {e}")
+                errors[file] = str(e)
+                continue
+            if rulebase is None:
+                skipped.append(file)
+                continue
+            publish(rulebase)
+            loaded[rulebase["firewall"]] = len(rulebase["rules"])
+    logger.info(f"Loaded {len(loaded)} configs from {path} in {time.monotonic() - started:.1f}s")
+    return {"loaded": loaded, "skipped": sorted(skipped), "errors": errors}
+
+
+def load_panorama(xml_content, hostnames=None, local_configs=None):
+    """Publishes the effective rulebase of every firewall managed by a Panorama export.
+
+    hostnames maps serials to the names the firewalls are queried by
+    (serials are used otherwise); local_configs maps serials to load_config
+    results of the firewalls' own configs for their local rules.
+    """
+    started = time.monotonic()
+    panorama = PanoramaConfig(xml_content)
+    hostnames = hostnames or {}
+    local_configs = local_configs or {}
+    loaded, errors = {}, {}
+    for serial in panorama.firewalls():
+        name = hostnames.get(serial, serial)
+        try:
+            config = panorama.effective_config(serial, local_configs.get(serial))
+            rulebase = load_rulebase(name, xml_content, config)
+        except Exception as e:
+            logger.error(f"Could not build the effective rulebase of {name}: {e}")
+            errors[name] = str(e)
+            continue
+        publish(rulebase)
+        loaded[name] = len(rulebase["rules"])
+    logger.info(f"Built {len(loaded)} effective rulebases from the Panorama export in {time.monotonic() - started:.1f}s")
+    return {"loaded": loaded, "skipped": [], "errors": errors}
@@ -0,0 +1,134 @@
+import logging
+from copy import deepcopy
+import xml.etree.ElementTree as ET
+
+from .config_loader import _rule_entry, _address_entry, _service_entry, _application_group_entry
+
+logger = logging.getLogger(__name__)
+
+DEVICE_GROUPS = ".//devices/entry[@name='localhost.localdomain']/device-group/entry"
+OBJECT_SECTIONS = (
+    ("addresses", ("address", "address-group"), _address_entry),
+    ("services", ("service", "service-group"), _service_entry),
+    ("application_groups", ("application-group",), _application_group_entry),
+)
+
+
+def device_group_tree(config_root):
+    """dg_parents (device group -> parent, 'shared' at the top) and fw_to_dg (serial -> device group)."""
+    dg_parents = {}
+    fw_to_dg = {}
+    for dg in config_root.findall(DEVICE_GROUPS):
+        name = dg.get("name")
+        dg_parents[name] = dg.findtext("parent-dg") or "shared"
+        devices = dg.find("devices")
+        if devices is not None:
+            for fw in devices.findall("entry"):
+                fw_to_dg[fw.get("name")] = name
+    return dg_parents, fw_to_dg
+
+
+def device_group_chain(dg, dg_parents):
+    """Device groups from the top of the hierarchy down to dg, cycles cut at the first repeat."""
+    chain = []
+    while dg and dg != "shared" and dg not in chain:
+        chain.append(dg)
+        dg = dg_parents.get(dg)
+    chain.reverse()
+    return chain
+
+
+def _targets(entry, serial):
+    # A rule pushed to specific devices only applies to those (or to all
+    # the others when the target is negated).
+    target = entry.find("target")
+    if target is None:
+        return True
+    devices = target.find("devices")
+    if devices is None or not len(devices):
+        return True
+    listed = any(device.get("name") == serial for device in devices.findall("entry"))
+    return listed != ((target.findtext("negate") or "no").strip() == "yes")
+
+
+class PanoramaConfig:
+    """One Panorama configuration export, split into the parts effective rulebases are built from.
+
+    Every scope (shared and each device group) keeps its objects and its
+    pre/post security rule elements; effective_config(serial) stacks the
+    scopes on a firewall's device-group chain into the dictionaries
+    load_config returns for a firewall's own config.
+    """
+
+    def __init__(self, xml_content):
+        root = ET.fromstring(xml_content)
+        if root.tag == "response":
+            root = root.find(".//config")
+        self.dg_parents, self.fw_to_dg = device_group_tree(root)
+        self.scopes = {"shared": self._scope(root.find("shared"))}
+        for dg in root.findall(DEVICE_GROUPS):
+            self.scopes[dg.get("name")] = self._scope(dg)
+
+    @staticmethod
+    def _scope(element):
+        scope = {"objects": {section: {} for section, tags, convert in OBJECT_SECTIONS}, "pre": [], "post": []}
+        if element is None:
+            return scope
+        for section, tags, convert in OBJECT_SECTIONS:
+            for tag in tags:
+                for entry in element.findall(f"./{tag}/entry"):
+                    scope["objects"][section][entry.get("name")] = convert(entry)
+        for side in ("pre", "post"):
+            scope[side] = element.findall(f"./{side}-rulebase/security/rules/entry")
+        return scope
+
+    def firewalls(self):
+        return list(self.fw_to_dg)
+
+    def chain(self, serial):
+        """Scopes a firewall inherits from, shared first and its own device group last."""
+        return ["shared"] + device_group_chain(self.fw_to_dg.get(serial), self.dg_parents)
+
+    def effective_config(self, serial, local=None):
+        """load_config-style dictionaries of the policy a Panorama-managed firewall enforces.
+
+        Rules are shared pre-rules, then the pre-rules of each device group
+        down the chain, then the firewall's local rules (from its own config,
+        when given as a load_config result), then the post-rules from its
+        own device group back up to shared. Objects of a lower scope shadow
+        same-named ones above it; local objects shadow them all.
+        """
+        chain = self.chain(serial)
+        config = {section: {} for section, tags, convert in OBJECT_SECTIONS}
+        for name in chain:
+            for section, objects in self.scopes[name]["objects"].items():
+                config[section].update(objects)
+        if local is not None:
+            for section, tags, convert in OBJECT_SECTIONS:
+                config[section].update(local[section])
+        ordered = [entry for name in chain for entry in self.scopes[name]["pre"]]
+        local_rules = list(local["rules"].items()) if local is not None else []
+        post = [entry for name in reversed(chain) for entry in self.scopes[name]["post"]]
+        rules = {}
+        index = 1
+
+        def add(name, entry):
+            nonlocal index
+            if name in rules:
+                logger.warning(f"{serial}: rule {name} defined more than once, keeping the first")
+                return
+            entry = deepcopy(entry)
+            entry["index"] = index
+            rules[name] = entry
+            index += 1
+
+        for entry in ordered:
+            if _targets(entry, serial):
+                add(entry.get("name"), _rule_entry(entry, index))
+        for name, entry in local_rules:
+            add(name, entry)
+        for entry in post:
+            if _targets(entry, serial):
+                add(entry.get("name"), _rule_entry(entry, index))
+        config["rules"] = rules
+        return config
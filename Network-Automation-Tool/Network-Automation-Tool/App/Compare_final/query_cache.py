@@ -0,0 +1,128 @@
+import threading
+import time
+from collections import OrderedDict
+
+from .compiled_rules import compile_address, compile_ports
+
+
+def normalize_query(source_ip, dest_ip, src_zone, dest_zone, port, protocol, action, application, mode="all"):
+    """Hashable form of a flow query; spellings that match the same rules share one key.
+
+    Every field is reduced the way match_rule compares it and nothing more:
+    addresses as compile_address parses them ("" matches nothing, "any"
+    everything), zones case-folded, the rest as given. A missing value
+    counts as "", which the matcher treats the same way.
+    """
+    ports = compile_ports(port)
+    return (
+        compile_address(source_ip or ""),
+        compile_address(dest_ip or ""),
+        (src_zone or "").lower(),
+        (dest_zone or "").lower(),
+        None if ports is None else tuple(sorted(set(ports))),
+        protocol or "",
+        action or "",
+        application or "",
+        mode,
+    )
+
+
+def _rows(value):
+    """Approximate size of a cached result: its number of matched rules, at least one."""
+    return max(1, len(value)) if isinstance(value, (list, tuple)) else 1
+
+
+class QueryCache:
+    """Thread-safe LRU of match results with a TTL, keyed by (firewall, config hash, query).
+
+    Only one config hash is kept per firewall: seeing a new one drops every
+    entry cached for the firewall's previous config. Memory is bounded by
+    both the number of entries (maxsize) and the total number of result
+    rows across them (max_rows), so a few huge results cannot pile up.
+    """
+
+    def __init__(self, maxsize=256, ttl=600, max_rows=20000):
+        self.maxsize = maxsize
+        self.max_rows = max_rows
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.versions = {}
+        self.rows = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _drop(self, key):
+        self.rows -= self.entries.pop(key)[2]
+
+    def _check_version(self, firewall, config_hash):
+        if self.versions.get(firewall) == config_hash:
+            return
+        if firewall in self.versions:
+            stale = [key for key in self.entries if key[0] == firewall]
+            for key in stale:
+                self._drop(key)
+            self.invalidations += len(stale)
+        self.versions[firewall] = config_hash
+
+    def get(self, firewall, config_hash, query):
+        key = (firewall, config_hash, query)
+        with self.lock:
+            self._check_version(firewall, config_hash)
+            entry = self.entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl:
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, firewall, config_hash, query, value):
+        key = (firewall, config_hash, query)
+        rows = _rows(value)
+        with self.lock:
+            self._check_version(firewall, config_hash)
+            if key in self.entries:
+                self._drop(key)
+            if rows > self.max_rows:
+                return
+            self.entries[key] = (time.monotonic(), value, rows)
+            self.rows += rows
+            while len(self.entries) > self.maxsize or self.rows > self.max_rows:
+                self._drop(next(iter(self.entries)))
+                self.evictions += 1
+
+    def clear(self, firewall=None):
+        with self.lock:
+            if firewall is None:
+                self.entries.clear()
+                self.versions.clear()
+                self.rows = 0
+                return
+            for key in [key for key in self.entries if key[0] == firewall]:
+                self._drop(key)
+            self.versions.pop(firewall, None)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self.entries),
+                "maxsize": self.maxsize,
+                "rows": self.rows,
+                "max_rows": self.max_rows,
+                "ttl": self.ttl,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+query_cache = QueryCache()
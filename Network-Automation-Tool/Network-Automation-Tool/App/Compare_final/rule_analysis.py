@@ -0,0 +1,255 @@
+import operator
+
+from .address_ranges import IPV4_SPACE, IPV6_SPACE, union, complement
+from .compiled_rules import compile_rules
+
+PORT_SPACE = 1 << 16
+# Stands for every zone, application or protocol no rule names explicitly
+OTHER = "<other>"
+ANY = "any"
+
+
+class RangeTree:
+    """Segment tree over per-atom rule bitsets answering range AND / OR."""
+
+    def __init__(self, leaves, op, identity):
+        self.size = len(leaves)
+        self.op = op
+        self.identity = identity
+        self.tree = [identity] * self.size + leaves
+        for i in range(self.size - 1, 0, -1):
+            self.tree[i] = op(self.tree[2 * i], self.tree[2 * i + 1])
+
+    def query(self, low, high):
+        """op over the leaves low..high inclusive."""
+        result = self.identity
+        low += self.size
+        high += self.size + 1
+        while low < high:
+            if low & 1:
+                result = self.op(result, self.tree[low])
+                low += 1
+            if high & 1:
+                high -= 1
+                result = self.op(result, self.tree[high])
+            low >>= 1
+            high >>= 1
+        return result
+
+
+def _lowest(bits):
+    return (bits & -bits).bit_length() - 1
+
+
+def _interval_dimension(sets, full):
+    """Per rule bitsets of the rules whose intervals cover / overlap its own.
+
+    sets holds one list of disjoint, non-adjacent intervals per rule (None
+    when the rule takes no part). The axis is cut into atoms at every
+    interval endpoint and a single XOR sweep gives the rules holding each
+    atom, so every cover/overlap lookup is a range query over atoms.
+    """
+    bounds = sorted({p for intervals in sets if intervals for start, end in intervals for p in (start, end + 1)})
+    position = {p: i for i, p in enumerate(bounds)}
+    toggles = [0] * len(bounds)
+    for pos, intervals in enumerate(sets):
+        for start, end in intervals or ():
+            toggles[position[start]] ^= 1 << pos
+            toggles[position[end + 1]] ^= 1 << pos
+    leaves = []
+    current = 0
+    for toggle in toggles[:-1]:
+        current ^= toggle
+        leaves.append(current)
+    covering = RangeTree(leaves, operator.and_, full)
+    touching = RangeTree(leaves, operator.or_, 0)
+    covers = []
+    overlaps = []
+    for intervals in sets:
+        if not intervals:
+            covers.append(0)
+            overlaps.append(0)
+            continue
+        cover = full
+        overlap = 0
+        for start, end in intervals:
+            low, high = position[start], position[end + 1] - 1
+            cover &= covering.query(low, high)
+            overlap |= touching.query(low, high)
+        covers.append(cover)
+        overlaps.append(overlap)
+    return covers, overlaps
+
+
+def _set_dimension(sets):
+    """Same as _interval_dimension for named members (zones, applications); ANY holds every name."""
+    members = {}
+    any_rules = 0
+    for pos, names in enumerate(sets):
+        if names is ANY:
+            any_rules |= 1 << pos
+        elif names:
+            for name in names:
+                members[name] = members.get(name, 0) | 1 << pos
+    present = any_rules
+    for bits in members.values():
+        present |= bits
+    covers = []
+    overlaps = []
+    for names in sets:
+        if not names:
+            covers.append(0)
+            overlaps.append(0)
+        elif names is ANY:
+            covers.append(any_rules)
+            overlaps.append(present)
+        else:
+            cover = present
+            overlap = any_rules
+            for name in names:
+                cover &= members[name] | any_rules
+                overlap |= members[name]
+            covers.append(cover)
+            overlaps.append(overlap)
+    return covers, overlaps
+
+
+def _address_set(members, negate):
+    if members["any"]:
+        intervals = [IPV4_SPACE, IPV6_SPACE]
+    else:
+        intervals = union(members["networks"] + members["ranges"])
+    if negate:
+        intervals = complement(intervals)
+    return intervals or None
+
+
+def _zone_set(zones):
+    lowered = {zone.lower() for zone in zones}
+    if ANY in lowered:
+        return ANY
+    return lowered or None
+
+
+def _port_set(services, slots):
+    """Protocol/port pairs of a rule on one axis, every protocol owning a 65536 wide slot."""
+    intervals = []
+    for protocols in services.values():
+        for protocol, (merged, starts) in protocols.items():
+            offsets = range(len(slots)) if protocol == ANY else [slots[protocol]]
+            for offset in offsets:
+                intervals.extend((offset * PORT_SPACE + low, offset * PORT_SPACE + high) for low, high in merged)
+    return union(intervals) or None
+
+
+def _ported(services):
+    """services without the app-default and other port-less entries, whose ports are not known here."""
+    ported = {}
+    for app, protocols in services.items():
+        kept = {protocol: port_ranges for protocol, port_ranges in protocols.items() if port_ranges[0]}
+        if kept:
+            ported[app] = kept
+    return ported
+
+
+def _is_product(services):
+    """True when every application allows the same protocols and ports."""
+    shapes = {tuple(sorted((str(p), tuple(merged)) for p, (merged, starts) in protocols.items()))
+              for protocols in services.values()}
+    return len(shapes) <= 1
+
+
+def analyze(rules, compiled_rules=None):
+    """Shadowed and redundant rules of one rulebase, in policy order.
+
+    A rule is shadowed when the first earlier rule that covers all of its
+    traffic has a different action, and redundant when that rule has the
+    same action, or when a later rule with the same action covers it and no
+    rule in between overlaps it with a different action. Coverage is checked
+    against single rules on source, destination, zones, applications and
+    protocol/ports, with the application and port sets of a rule treated as
+    a product. Rules whose sets are not known exactly only take part on the
+    side where that is still sound.
+    """
+    if compiled_rules is None:
+        compiled_rules = compile_rules(rules)
+    size = len(rules)
+    full = (1 << size) - 1
+    slots = {}
+    for compiled in compiled_rules:
+        for protocols in compiled["services"].values():
+            for protocol in protocols:
+                if protocol != ANY and protocol not in slots:
+                    slots[protocol] = len(slots)
+    slots[OTHER] = len(slots)
+
+    sources, destinations, from_zones, to_zones, apps, ports = [], [], [], [], [], []
+    can_cover = 0
+    can_be_covered = 0
+    for pos, (rule, compiled) in enumerate(zip(rules, compiled_rules)):
+        if not all(key in rule for key in ("source", "destination", "to", "from")):
+            for dimension in (sources, destinations, from_zones, to_zones, apps, ports):
+                dimension.append(None)
+            continue
+        sources.append(_address_set(compiled["source"], compiled["negate_source"]))
+        destinations.append(_address_set(compiled["destination"], compiled["negate_destination"]))
+        from_zones.append(_zone_set(rule["from"]))
+        to_zones.append(_zone_set(rule["to"]))
+        services = _ported(compiled["services"])
+        apps.append(ANY if ANY in services else set(services) or None)
+        ports.append(_port_set(services, slots))
+        # Known members under-approximate a plain side and over-approximate a
+        # negated one; a non-product service set is over-approximated too.
+        sides = ((compiled["source"]["unresolved"], compiled["negate_source"]),
+                 (compiled["destination"]["unresolved"], compiled["negate_destination"]))
+        if not any(unresolved and negate for unresolved, negate in sides) and _is_product(services):
+            can_cover |= 1 << pos
+        if not any(unresolved and not negate for unresolved, negate in sides):
+            can_be_covered |= 1 << pos
+
+    dimensions = [_interval_dimension(sources, full), _interval_dimension(destinations, full),
+                  _set_dimension(from_zones), _set_dimension(to_zones), _set_dimension(apps),
+                  _interval_dimension(ports, full)]
+
+    actions = {}
+    action_of = []
+    for pos, rule in enumerate(rules):
+        action = (rule.get("action") or "").strip()
+        actions[action] = actions.get(action, 0) | 1 << pos
+        action_of.append(action)
+
+    findings = []
+    for pos, rule in enumerate(rules):
+        if not can_be_covered >> pos & 1:
+            continue
+        cover = can_cover & ~(1 << pos)
+        for covers, overlaps in dimensions:
+            cover &= covers[pos]
+        if not cover:
+            continue
+        same = actions[action_of[pos]]
+        earlier = cover & ((1 << pos) - 1)
+        by = None
+        if earlier:
+            by = _lowest(earlier)
+            kind = "redundant" if same >> by & 1 else "shadowed"
+        else:
+            later = cover & same
+            overlap = full
+            for covers, overlaps in dimensions:
+                overlap &= overlaps[pos]
+            conflicts = overlap & ~same & ~((1 << (pos + 1)) - 1)
+            if conflicts:
+                later &= (1 << _lowest(conflicts)) - 1
+            if later:
+                by = _lowest(later)
+                kind = "redundant"
+        if by is not None:
+            findings.append({
+                "name": rule["name"],
+                "index": rule.get("index"),
+                "kind": kind,
+                "by": rules[by]["name"],
+                "by_index": rules[by].get("index"),
+            })
+    return findings
@@ -0,0 +1,89 @@
+from collections import OrderedDict
+
+from .compiled_rules import (compile_rule, compile_address, compile_ports, address_flag, service_flags,
+                             service_field_flags)
+
+FLAG_MESSAGES = ["Source IP", "Destination IP", "Source Zone", "Destination Zone", "Port", "Protocol", "Application"]
+
+
+def _zone_flag(zones, query):
+    for zone in zones:
+        if zone.lower() == query.lower() or zone.lower() == "any" or query.lower() == "any":
+            return zone
+    return False
+
+
+def rule_flags(rule, src, dest, src_zone, dest_zone, port, Protocol, application, compiled=None):
+    """The seven match flags of one rule, or None when the rule lacks an address or zone field.
+
+    Ranges and destination subnets have to hold the whole query, and so does
+    the rule's port range, as in the Add workflow's original checks.
+    """
+    for key in ("source", "destination", "to", "from"):
+        if key not in rule:
+            return None
+    if compiled is None:
+        compiled = compile_rule(rule)
+    src_query = compile_address(src)
+    src_flag = address_flag(compiled["source"], src_query, range_within=True)
+    if compiled["negate_source"] and src_query is not None:
+        src_flag = not src_flag
+    dest_query = compile_address(dest)
+    dest_flag = address_flag(compiled["destination"], dest_query, within=True, range_within=True)
+    if compiled["negate_destination"] and dest_query is not None:
+        dest_flag = not dest_flag
+    port_flag, protocol_flag, application_flag = service_field_flags(
+        compiled["services"], compile_ports(port), Protocol, application, within=True)
+    return [src_flag, dest_flag, _zone_flag(rule["from"], src_zone), _zone_flag(rule["to"], dest_zone),
+            port_flag, protocol_flag, application_flag]
+
+
+def evaluate_rules(rules, src, dest, src_zone, dest_zone, port, Protocol, application, compiled_rules=None):
+    """One pass over a rulebase; every verdict of the Add workflow is derived from its results."""
+    results = []
+    for pos, rule in enumerate(rules):
+        compiled = compiled_rules[pos] if compiled_rules else compile_rule(rule)
+        flags = rule_flags(rule, src, dest, src_zone, dest_zone, port, Protocol, application, compiled)
+        if flags is None:
+            continue
+        results.append({
+            "rule": rule,
+            "flags": flags,
+            "service": service_flags(compiled["services"], compile_ports(port), Protocol, application, within=True)[0],
+            "action": (rule.get("action") or "").strip(),
+            "negated": compiled["negate_source"] or compiled["negate_destination"],
+        })
+    return results
+
+
+def _action_ok(result, action):
+    return action == "any" or result["action"] == action
+
+
+def is_match(result, action):
+    """Every flag holds and one service entry covers the port, protocol and application together."""
+    return all(result["flags"]) and result["service"] and _action_ok(result, action)
+
+
+def is_candidate(result, action):
+    """Exactly one field keeps a non-negated rule with this action from matching."""
+    return (sum(1 for flag in result["flags"] if not flag) == 1 and _action_ok(result, action)
+            and not result["negated"])
+
+
+def missing_fields(result):
+    return [FLAG_MESSAGES[i] for i, flag in enumerate(result["flags"]) if not flag]
+
+
+def select(results, verdict, action):
+    """Copies of the rules with the given verdict, in policy order."""
+    selected = []
+    for result in results:
+        if verdict(result, action):
+            selected.append(OrderedDict(result["rule"]))
+    return selected
+
+
+def first_index(results, verdict, action):
+    indexes = [result["rule"]["index"] for result in results if verdict(result, action)]
+    return min(indexes, default=float("inf"))
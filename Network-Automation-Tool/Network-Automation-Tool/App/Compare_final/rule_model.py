@@ -0,0 +1,213 @@
+import sys
+from collections.abc import Mapping
+
+_MISSING = object()
+# Keys whose rules_write value is computed rather than copied from the config
+MODELED = ("name", "index", "action", "source", "destination", "application", "service", "port", "protocol")
+ENTRY_KEYS = ("application", "protocol", "destination_port")
+
+
+def intern_value(value, shared=None):
+    """Interned strings, with lists and sets turned into tuples of them.
+
+    Passing a shared dict also makes equal tuples one object, e.g. the
+    ("any",) or ("trust",) members repeated across a whole rulebase.
+    """
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        value = tuple(intern_value(item, shared) for item in value)
+        if shared is not None:
+            value = shared.setdefault(value, value)
+    return value
+
+
+def _plain(value):
+    if isinstance(value, tuple):
+        return [_plain(item) for item in value]
+    return value
+
+
+class Rule(Mapping):
+    """Compact rulebase entry that reads like a rules_write dict.
+
+    The config fields are kept once, as interned tuples, and the "dis"
+    display copies the browser expects are produced only when the rule is
+    serialized with to_dict(). Service entries are stored as
+    (application, protocol, port) triples in .entries; rule["entries"]
+    builds the dict form on every access, so the compiled matcher reads the
+    triples instead.
+    """
+
+    __slots__ = MODELED + ("keys_", "values_", "entries", "extra")
+
+    def __init__(self, keys, values, entries=(), extra=(), **fields):
+        self.keys_ = keys
+        self.values_ = values
+        self.entries = entries
+        self.extra = extra
+        for key in MODELED:
+            setattr(self, key, fields.get(key, _MISSING))
+
+    @classmethod
+    def from_dict(cls, rule, shared=None):
+        if shared is None:
+            shared = {}
+        keys = tuple(key for key in rule if key + "dis" in rule and key not in ("name", "entries"))
+        keys = shared.setdefault(keys, keys)
+        values = tuple(intern_value(rule[key + "dis"], shared) for key in keys)
+        fields = {key: intern_value(rule[key], shared) for key in MODELED if key in rule}
+        entries = tuple(intern_value(tuple(entry.get(k) for k in ENTRY_KEYS), shared)
+                        for entry in rule.get("entries", []))
+        entries = shared.setdefault(entries, entries)
+        extra = tuple((key, intern_value(value, shared)) for key, value in rule.items()
+                      if key not in keys and key not in MODELED and key != "entries"
+                      and not (key.endswith("dis") and key[:-3] in keys))
+        return cls(keys, values, entries, extra, **fields)
+
+    def moved(self, index):
+        """The same rule at another rulebase position; everything but the index is shared."""
+        values = self.values_
+        if "index" in self.keys_:
+            at = self.keys_.index("index")
+            values = values[:at] + (index,) + values[at + 1:]
+        fields = {key: getattr(self, key) for key in MODELED if key != "index"}
+        return Rule(self.keys_, values, self.entries, self.extra, index=index, **fields)
+
+    def _raw(self, key):
+        if key in self.keys_:
+            return self.values_[self.keys_.index(key)]
+        for k, value in self.extra:
+            if k == key:
+                return value
+        return _MISSING
+
+    def __getitem__(self, key):
+        if key in MODELED:
+            value = getattr(self, key)
+        elif key == "entries":
+            return [dict(zip(ENTRY_KEYS, entry)) for entry in self.entries]
+        else:
+            value = self._raw(key)
+            if value is _MISSING and key.endswith("dis") and key[:-3] in self.keys_:
+                value = self._raw(key[:-3])
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def _keys(self):
+        for key in self.keys_:
+            yield key
+            yield key + "dis"
+        for key in MODELED:
+            if key not in self.keys_ and getattr(self, key) is not _MISSING:
+                yield key
+        yield "entries"
+        for key, value in self.extra:
+            yield key
+
+    def __iter__(self):
+        return self._keys()
+
+    def __len__(self):
+        return sum(1 for key in self._keys())
+
+    def to_dict(self):
+        """The rules_write dict form, "dis" keys included, with lists for JSON."""
+        return {key: _plain(self[key]) for key in self}
+
+
+class AddressObject:
+    """An address or address-group name and the addresses it resolves to."""
+
+    __slots__ = ("name", "members")
+
+    def __init__(self, name, members, shared=None):
+        self.name = sys.intern(name)
+        self.members = intern_value(members, shared)
+
+    def to_list(self):
+        return list(self.members)
+
+
+class ServiceObject:
+    """A service or service-group with its resolved ports, protocols and member names."""
+
+    __slots__ = ("name", "ports", "protocols", "services")
+
+    def __init__(self, name, ports=(), protocols=(), services=(), shared=None):
+        self.name = sys.intern(name)
+        self.ports = intern_value(ports, shared)
+        self.protocols = intern_value(protocols, shared)
+        self.services = intern_value(services, shared)
+
+    @classmethod
+    def from_dict(cls, name, service, shared=None):
+        return cls(name, service.get("port", ()), service.get("protocol", ()), service.get("service", ()), shared)
+
+    def to_dict(self):
+        return {"port": list(self.ports), "protocol": list(self.protocols), "service": list(self.services)}
+
+
+def compact_rulebase(rules, memo, memo1):
+    """rules_write output in record form, equal tuples shared across the whole rulebase."""
+    shared = {}
+    return ([Rule.from_dict(rule, shared) for rule in rules],
+            {name: AddressObject(name, members, shared) for name, members in memo.items()},
+            {name: ServiceObject.from_dict(name, service, shared) for name, service in memo1.items()})
+
+
+def _text(value):
+    # A new string object per occurrence, like the XML parser produces
+    return "".join(list(value))
+
+
+def _sample_rulebase(count):
+    """rules_write shaped rules, address memo and service memo for the benchmark."""
+    rules = []
+    memo = {}
+    memo1 = {}
+    for i in range(count):
+        memo[f"addr-{i}"] = {f"10.{i % 256}.{i // 256 % 256}.0/24", f"host-{i}.example.com"}
+        memo1[f"svc-{i}"] = {"port": [str(8000 + i % 100)], "protocol": [_text("tcp")], "service": []}
+        raw = {
+            "from": [_text("trust")], "to": [_text("untrust")],
+            "source": [f"addr-{i}", _text("addr-0")], "destination": [_text("any")],
+            "source-user": [_text("any")], "category": [_text("any")],
+            "application": [_text("ssl"), _text("web-browsing")], "service": [_text("application-default")],
+            "action": _text("allow"), "log-end": [_text("yes")], "index": i + 1,
+        }
+        rule = {}
+        for key, value in raw.items():
+            rule[key] = list(value) if isinstance(value, list) else value
+            rule[key + "dis"] = rule[key]
+        rule["name"] = f"rule-{i}"
+        rule["source"] = sorted(memo[f"addr-{i}"] | memo["addr-0"])
+        rule["entries"] = [{"application": _text(app), "protocol": _text("tcp"), "destination_port": _text(port)}
+                           for app in ("ssl", "web-browsing") for port in ("443", "80", "8080")]
+        rule["port"] = [_text("443"), _text("80"), _text("8080")]
+        rule["protocol"] = [_text("tcp")]
+        rules.append(rule)
+    return rules, memo, memo1
+
+
+if __name__ == "__main__":
+    import gc
+    import tracemalloc
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    dict_form = _sample_rulebase(count)
+    dict_size = tracemalloc.get_traced_memory()[0] - before
+    record_form = compact_rulebase(*dict_form)
+    assert [rule.to_dict() for rule in record_form[0]] == dict_form[0]
+    # Strings are shared through interning, so measure what is left once
+    # the dict form is gone.
+    del dict_form
+    gc.collect()
+    record_size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    print(f"{count} rules")
+    print(f"dict form:   {dict_size / 1e6:8.2f} MB")
+    print(f"record form: {record_size / 1e6:8.2f} MB ({record_size / dict_size:.0%})")
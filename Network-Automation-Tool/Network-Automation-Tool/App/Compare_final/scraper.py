@@ -1,3 +1,6 @@
+# Live scrape: one headless-Chrome click per application, hours for the full
+# list. To refresh from saved listing and detail pages instead, use
+# applipedia_ingest.py (python -m Compare_final.applipedia_ingest <details dir> <listing.html>).
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.action_chains import ActionChains
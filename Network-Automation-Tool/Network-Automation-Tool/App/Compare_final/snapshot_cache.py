@@ -0,0 +1,150 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotCache:
+    """Parsed and compiled rulebase of every firewall, kept in memory between queries.
+
+    A snapshot younger than ttl is served as is. An older one is first
+    checked with the cheap version call and only reloaded when the version
+    moved (or could not be read). loader(firewall) returns a load_rulebase
+    dict, version(firewall) any value that changes with the config. With an
+    updater(firewall, previous_rulebase), reloads of a firewall that already
+    has a snapshot are incremental. stale(rulebase), when given, marks a
+    snapshot for a reload even though the version did not move (its FQDNs
+    resolve differently now, say). A passive cache (set while the fleet
+    poller keeps the snapshots fresh) serves stored snapshots regardless of
+    their age and only goes to the device for a firewall it has never seen.
+    A snapshot published as pinned (imported from a saved config) is served
+    the same way whatever the mode, until a device load replaces it.
+    """
+
+    def __init__(self, loader, version, ttl=900, updater=None, stale=None):
+        self.loader = loader
+        self.version = version
+        self.updater = updater
+        self.stale = stale
+        self.ttl = ttl
+        self.passive = False
+        self.snapshots = {}
+        self.locks = {}
+        self.lock = threading.Lock()
+
+    def _firewall_lock(self, firewall):
+        with self.lock:
+            return self.locks.setdefault(firewall, threading.Lock())
+
+    def _read_version(self, firewall):
+        try:
+            return self.version(firewall)
+        except Exception as e:
+            logger.warning(f"Could not read config version of {firewall}: {e}")
+            return None
+
+    def _unchanged(self, snapshot, version):
+        if version is None or version != snapshot["version"]:
+            return False
+        return self.stale is None or not self.stale(snapshot["rulebase"])
+
+    def build(self, firewall, incremental=True):
+        """Loads a fresh rulebase and its version without storing them."""
+        version = self._read_version(firewall)
+        with self.lock:
+            previous = self.snapshots.get(firewall)
+        if incremental and self.updater is not None and previous is not None:
+            if self._unchanged(previous, version):
+                return previous["rulebase"], version
+            try:
+                return self.updater(firewall, previous["rulebase"]), version
+            except Exception as e:
+                logger.warning(f"Incremental refresh of {firewall} failed, reloading it: {e}")
+        return self.loader(firewall), version
+
+    def publish(self, firewall, rulebase, version, pinned=False):
+        """Swaps in a firewall's new snapshot; readers get either the old or the new one whole."""
+        now = time.monotonic()
+        with self.lock:
+            self.snapshots[firewall] = {"rulebase": rulebase, "version": version, "loaded_at": now,
+                                        "checked_at": now, "pinned": pinned}
+
+    def pinned(self, firewall):
+        with self.lock:
+            snapshot = self.snapshots.get(firewall)
+        return snapshot is not None and snapshot["pinned"]
+
+    def _servable(self, snapshot, now):
+        return self.passive or snapshot["pinned"] or now - snapshot["checked_at"] < self.ttl
+
+    def _load(self, firewall, incremental=True, deadline=None):
+        rulebase, version = self.build(firewall, incremental)
+        if deadline is not None and time.monotonic() > deadline:
+            raise TimeoutError(f"refresh of {firewall} finished after its deadline")
+        self.publish(firewall, rulebase, version)
+        return rulebase
+
+    def _current(self, firewall):
+        """The stored snapshot when it can be served without going to the device."""
+        with self.lock:
+            snapshot = self.snapshots.get(firewall)
+        if snapshot is not None and self._servable(snapshot, time.monotonic()):
+            return snapshot["rulebase"]
+        return None
+
+    def get(self, firewall):
+        # A servable snapshot is returned without waiting for a refresh of
+        # the firewall that may be running.
+        rulebase = self._current(firewall)
+        if rulebase is not None:
+            return rulebase
+        with self._firewall_lock(firewall):
+            snapshot = self.snapshots.get(firewall)
+            if snapshot is None:
+                return self._load(firewall)
+            now = time.monotonic()
+            if self._servable(snapshot, now):
+                return snapshot["rulebase"]
+            version = self._read_version(firewall)
+            if self._unchanged(snapshot, version):
+                snapshot["checked_at"] = now
+                return snapshot["rulebase"]
+            return self._load(firewall)
+
+    def refresh(self, firewall, incremental=False, deadline=None):
+        """Reloads a firewall's snapshot unconditionally, from scratch unless incremental.
+
+        Build and publish run under the firewall's lock, so concurrent
+        refreshes of one firewall cannot publish out of order. A refresh
+        still running at deadline (a time.monotonic() value) raises
+        TimeoutError and leaves the stored snapshot as it was.
+        """
+        with self._firewall_lock(firewall):
+            return self._load(firewall, incremental, deadline)
+
+    def invalidate(self, firewall=None):
+        with self.lock:
+            if firewall is None:
+                self.snapshots.clear()
+            else:
+                self.snapshots.pop(firewall, None)
+
+    def firewalls(self):
+        with self.lock:
+            return list(self.snapshots)
+
+    def status(self):
+        now = time.monotonic()
+        with self.lock:
+            snapshots = list(self.snapshots.items())
+        return {
+            firewall: {
+                "rules": len(snapshot["rulebase"]["rules"]),
+                "config_hash": snapshot["rulebase"].get("config_hash"),
+                "age": round(now - snapshot["loaded_at"], 1),
+                "checked": round(now - snapshot["checked_at"], 1),
+                "pinned": snapshot["pinned"],
+            }
+            for firewall, snapshot in snapshots
+        }
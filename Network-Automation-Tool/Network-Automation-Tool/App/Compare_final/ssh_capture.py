@@ -0,0 +1,37 @@
+import threading
+
+from netmiko import ConnectHandler
+
+
+def xml_response(output):
+    """The <response ...>...</response> document inside a command's output."""
+    start = output.index("<response")
+    end = output.index("</response>") + len("</response>")
+    return output[start:end]
+
+
+class CapturedSession:
+    """netmiko connection that hands command output straight back, with no session log.
+
+    Nothing is written to a shared session.log or kept after a command, so
+    any number of connections can run in parallel threads and a config pull
+    is held in memory only while its caller uses it.
+    """
+
+    def __init__(self, device):
+        self.lock = threading.Lock()
+        self.conn = ConnectHandler(**device)
+        self.prompt = self.conn.find_prompt()
+
+    def run(self, command, **kwargs):
+        with self.lock:
+            return self.conn.send_command(command, **kwargs)
+
+    def close(self):
+        self.conn.disconnect()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,57 @@
+"""Small PAN-OS configs for the tests, in the shape show config running returns."""
+import os
+import tempfile
+from unittest import mock
+
+from Compare_final.object_closure import closure_store
+
+
+def in_scratch_dir(test):
+    """Runs the rest of a test in an empty working directory, with the object
+    closure cache in it too, so nothing is left in the source tree."""
+    directory = tempfile.TemporaryDirectory()
+    cwd = os.getcwd()
+    os.chdir(directory.name)
+    test.addCleanup(directory.cleanup)
+    test.addCleanup(os.chdir, cwd)
+    patcher = mock.patch.object(closure_store, "database", os.path.join(directory.name, "object_closure.db"))
+    patcher.start()
+    test.addCleanup(patcher.stop)
+
+
+def _members(values):
+    return "".join(f"<member>{value}</member>" for value in values)
+
+
+def rule(name, source=("any",), destination=("any",), application=("any",), service=("application-default",),
+         action="allow", from_zone=("trust",), to_zone=("untrust",), extra=""):
+    return (f"<entry name='{name}'><from>{_members(from_zone)}</from><to>{_members(to_zone)}</to>"
+            f"<source>{_members(source)}</source><destination>{_members(destination)}</destination>"
+            f"<application>{_members(application)}</application><service>{_members(service)}</service>"
+            f"<action>{action}</action>{extra}</entry>")
+
+
+ADDRESSES = """
+<address>
+  <entry name='web'><ip-netmask>10.1.0.0/24</ip-netmask></entry>
+  <entry name='db'><ip-range>10.2.0.1-10.2.0.9</ip-range></entry>
+  <entry name='partner'><fqdn>partner.example.com</fqdn></entry>
+</address>
+<address-group>
+  <entry name='servers'><static><member>web</member><member>db</member></static></entry>
+</address-group>
+<service>
+  <entry name='tcp-8080'><protocol><tcp><port>8080</port></tcp></protocol></entry>
+  <entry name='udp-range'><protocol><udp><port>5000-5010</port></udp></protocol></entry>
+</service>
+<service-group>
+  <entry name='web-ports'><members><member>tcp-8080</member><member>service-https</member></members></entry>
+</service-group>
+"""
+
+
+def config(rules, objects=ADDRESSES):
+    return ("<response status='success'><result><config><devices><entry name='localhost.localdomain'>"
+            f"<vsys><entry name='vsys1'>{objects}"
+            f"<rulebase><security><rules>{''.join(rules)}</rules></security></rulebase>"
+            "</entry></vsys></entry></devices></config></result></response>")
@@ -0,0 +1,103 @@
+import unittest
+
+from Compare_final.address_index import AddressIndex, IntervalTree
+from Compare_final.compiled_rules import compile_members
+
+
+def compiled(source=("any",), destination=("any",), negate_source=False, negate_destination=False):
+    return {"source": compile_members(source), "destination": compile_members(destination),
+            "negate_source": negate_source, "negate_destination": negate_destination}
+
+
+class IntervalTreeTests(unittest.TestCase):
+    def test_overlapping(self):
+        tree = IntervalTree([(0, 10, "a"), (5, 5, "b"), (11, 20, "c"), (2, 30, "d"), (40, 50, "e")])
+        self.assertEqual(sorted(tree.overlapping(10, 10)), ["a", "d"])
+        self.assertEqual(sorted(tree.overlapping(5, 11)), ["a", "b", "c", "d"])
+        self.assertEqual(sorted(tree.overlapping(31, 39)), [])
+        self.assertEqual(sorted(tree.overlapping(50, 60)), ["e"])
+        self.assertEqual(sorted(tree.overlapping(0, 100)), ["a", "b", "c", "d", "e"])
+
+    def test_empty(self):
+        self.assertEqual(IntervalTree([]).overlapping(0, 100), [])
+
+
+class AddressIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.index = AddressIndex([
+            compiled(source=["10.0.0.0/24"]),
+            compiled(source=["10.0.1.0/24"], destination=["192.0.2.0/24"]),
+            compiled(source=["10.0.2.1-10.0.2.9"]),
+            compiled(source=["partner.example.com"]),
+            compiled(source=["10.0.0.0/24"], negate_source=True),
+            compiled(destination=["2001:db8::/32"]),
+            compiled(),
+        ])
+
+    def test_prunes_by_source(self):
+        self.assertEqual(self.index.candidates("10.0.1.5", "192.0.2.1"), [1, 4, 6])
+        self.assertEqual(self.index.candidates("10.0.2.9", "192.0.2.1"), [2, 4, 6])
+        self.assertEqual(self.index.candidates("10.0.0.0/23", "192.0.2.1"), [0, 1, 4, 6])
+
+    def test_prunes_by_destination(self):
+        self.assertEqual(self.index.candidates("10.0.1.5", "198.51.100.1"), [4, 6])
+        self.assertEqual(self.index.candidates("10.9.9.9", "2001:db8::1"), [4, 5, 6])
+
+    def test_any_query(self):
+        # An unresolved name is still a candidate for an any query.
+        self.assertEqual(self.index.candidates("any", "any"), [0, 1, 2, 3, 4, 5, 6])
+        self.assertEqual(self.index.candidates("10.0.2.1", "any"), [2, 4, 5, 6])
+
+    def test_families_never_overlap(self):
+        self.assertEqual(self.index.candidates("::", "2001:db8::1"), [4, 5, 6])
+        index = AddressIndex([compiled(source=["255.255.255.255"])])
+        self.assertEqual(index.candidates("::", "any"), [])
+
+    def test_unparseable_query(self):
+        self.assertEqual(self.index.candidates("bogus", "any"), [4, 5, 6])
+
+
+class IndexUpdateTests(unittest.TestCase):
+    def setUp(self):
+        rules = {"a": compiled(source=["10.0.0.0/24"]), "b": compiled(source=["10.0.1.0/24"]),
+                 "c": compiled(destination=["192.0.2.0/24"])}
+        self.index = AddressIndex(list(rules.values()), keys=list(rules), rebuild_min=2)
+
+    def test_add_and_remove(self):
+        self.index.remove_rule("a")
+        self.index.add_rule("d", compiled(source=["10.0.0.128/25"]))
+        self.assertEqual(sorted(self.index.candidate_keys("10.0.0.200", "192.0.2.1")), ["c", "d"])
+        self.assertEqual(sorted(self.index.candidate_keys("10.0.1.1", "198.51.100.1")), ["b"])
+        self.assertEqual(sorted(self.index.candidate_keys("any", "any")), ["b", "c", "d"])
+
+    def test_replacing_a_rule(self):
+        self.index.add_rule("a", compiled(source=["10.9.0.0/16"]))
+        self.assertEqual(sorted(self.index.candidate_keys("10.0.0.1", "any")), ["c"])
+        self.assertEqual(sorted(self.index.candidate_keys("10.9.0.1", "any")), ["a", "c"])
+
+    def test_rebuild_keeps_the_order(self):
+        for i in range(5):
+            self.index.add_rule(f"new-{i}", compiled(source=[f"10.0.{i}.0/24"]))
+        self.index.remove_rule("b")
+        self.assertEqual(self.index.tombstones, set())
+        self.assertEqual(self.index.candidates("10.0.1.1", "any"), [1, 3])
+        self.assertEqual(sorted(self.index.candidate_keys("10.0.1.1", "any")), ["c", "new-1"])
+
+    def test_copy_is_independent(self):
+        clone = self.index.copy()
+        clone.remove_rule("a")
+        clone.add_rule("d", compiled(source=["10.0.0.0/8"]))
+        clone.reorder(["d", "b", "c"])
+        self.assertEqual(sorted(clone.candidate_keys("10.0.0.1", "any")), ["c", "d"])
+        self.assertEqual(sorted(self.index.candidate_keys("10.0.0.1", "any")), ["a", "c"])
+        self.assertEqual(self.index.candidates("any", "any"), [0, 1, 2])
+
+    def test_reorder(self):
+        self.index.reorder(["c", "b", "a"])
+        self.assertEqual(self.index.candidates("any", "any"), [0, 1, 2])
+        self.assertEqual(self.index.candidates("10.0.0.1", "any"), [0, 2])
+        self.assertEqual(self.index.candidates("10.0.0.1", "any", {"a": 5, "c": 7}), [5, 7])
+
+
+if __name__ == "__main__":
+    unittest.main()
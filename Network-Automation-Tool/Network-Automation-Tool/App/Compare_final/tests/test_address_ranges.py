@@ -0,0 +1,68 @@
+import unittest
+
+from Compare_final.address_ranges import (IPV4_SPACE, IPV6_OFFSET, IPV6_SPACE, any_contains, any_overlaps,
+                                          complement, contains, family_space, overlaps, parse_range, starts_of, union)
+
+
+class ParseRangeTests(unittest.TestCase):
+    def test_forms(self):
+        self.assertEqual(parse_range("10.0.0.5"), (167772165, 167772165))
+        self.assertEqual(parse_range("10.0.0.7/24"), (167772160, 167772415))
+        self.assertEqual(parse_range("10.0.0.1 - 10.0.0.9"), (167772161, 167772169))
+        self.assertEqual(parse_range("0.0.0.0/0"), IPV4_SPACE)
+
+    def test_ipv6_boundaries(self):
+        self.assertEqual(parse_range("255.255.255.255"), (IPV6_OFFSET - 1, IPV6_OFFSET - 1))
+        self.assertEqual(parse_range("::"), (IPV6_OFFSET, IPV6_OFFSET))
+        self.assertEqual(parse_range("::/0"), IPV6_SPACE)
+        self.assertEqual(parse_range("ffff:ffff:ffff:ffff:ffff:ffff:ffff:ffff"), (IPV6_SPACE[1], IPV6_SPACE[1]))
+        self.assertEqual(family_space(parse_range("::1")), IPV6_SPACE)
+        self.assertEqual(family_space(parse_range("255.255.255.255")), IPV4_SPACE)
+
+    def test_invalid(self):
+        for address in ("10.0.0.1-::1", "10.0.0.256", "partner.example.com", "10.0.0.1-10.0.0.2-10.0.0.3"):
+            with self.subTest(address=address), self.assertRaises(ValueError):
+                parse_range(address)
+
+
+class IntervalAlgebraTests(unittest.TestCase):
+    def test_union(self):
+        self.assertEqual(union([(5, 9), (1, 3), (4, 4), (12, 20), (13, 14)]), [(1, 9), (12, 20)])
+        self.assertEqual(union([(1, 3), (5, 9)]), [(1, 3), (5, 9)])
+        self.assertEqual(union([]), [])
+
+    def test_adjacent_families(self):
+        # The last IPv4 and the first IPv6 address are adjacent integers, so a
+        # union joins them; a parsed query never spans both families.
+        self.assertEqual(union([IPV4_SPACE, IPV6_SPACE]), [(IPV4_SPACE[0], IPV6_SPACE[1])])
+        self.assertFalse(any_contains([IPV4_SPACE], [IPV4_SPACE[0]], parse_range("::")))
+
+    def test_complement(self):
+        self.assertEqual(complement([(3, 5), (8, 10)], spaces=((0, 10),)), [(0, 2), (6, 7)])
+        self.assertEqual(complement([(0, 10)], spaces=((0, 10),)), [])
+        self.assertEqual(complement([]), [IPV4_SPACE, IPV6_SPACE])
+        self.assertEqual(complement([parse_range("0.0.0.0/1")]), [parse_range("128.0.0.0/1"), IPV6_SPACE])
+        self.assertEqual(complement([parse_range("::/0")]), [IPV4_SPACE])
+
+    def test_bisect_checks(self):
+        merged = union([(10, 20), (30, 40)])
+        starts = starts_of(merged)
+        self.assertEqual(starts, [10, 30])
+        self.assertTrue(any_overlaps(merged, starts, (20, 29)))
+        self.assertTrue(any_overlaps(merged, starts, (0, 10)))
+        self.assertFalse(any_overlaps(merged, starts, (21, 29)))
+        self.assertFalse(any_overlaps(merged, starts, (41, 50)))
+        self.assertTrue(any_contains(merged, starts, (30, 40)))
+        self.assertFalse(any_contains(merged, starts, (15, 35)))
+        self.assertFalse(any_contains(merged, starts, (5, 15)))
+        self.assertFalse(any_overlaps([], [], (0, 10)))
+
+    def test_pairwise(self):
+        self.assertTrue(contains((0, 10), (0, 10)))
+        self.assertFalse(contains((0, 10), (5, 11)))
+        self.assertTrue(overlaps((0, 10), (10, 20)))
+        self.assertFalse(overlaps((0, 9), (10, 20)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import concurrent.futures
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from Compare_final.app_catalog import (CHILD, CONTAINER, AppCatalog, Catalog, build_catalog, read_catalog,
+                                       read_csv_records, standard_port_ranges, write_catalog)
+
+HEADER = "App ID,Name,Category,Subcategory,Risk,Technology,Standard Ports,OnClick,OnClick_Last_Digit,Protocol,Ports\n"
+ROWS = [
+    "120,100bao,general-internet,file-sharing,,peer-to-peer,\"tcp/3468,6346\",,0,['tcp'],\"['3468', '6346']\"\n",
+    "165,2ch,,,,,N/A,,1,[],[]\n",
+    "781,2ch-base,collaboration,social-networking,,browser-based,\"tcp/80,443\",,2,['tcp'],\"['80', '443']\"\n",
+    "783,2ch-posting,collaboration,web-posting,,browser-based,\"tcp/80 udp/dynamic\",,2,\"['tcp', 'udp']\",\"['80', '49152-65535']\"\n",
+    "350,3pc,networking,ip-protocol,,network-protocol,,,0,[],[]\n",
+]
+
+
+def write_csv(path, rows=ROWS):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(HEADER + "".join(rows))
+
+
+def _write(args):
+    csv_path, db_path = args
+    for _ in range(5):
+        build_catalog(csv_path, db_path)
+    return True
+
+
+class StandardPortRangesTests(unittest.TestCase):
+    def test_ports_follow_the_last_protocol(self):
+        self.assertEqual(standard_port_ranges("tcp/80,8090-8092 udp/53"),
+                         (("tcp", 80, 80), ("tcp", 8090, 8092), ("udp", 53, 53)))
+
+    def test_ports_after_a_comma_and_space_are_kept(self):
+        self.assertEqual(standard_port_ranges("tcp/5432, 5434-5439"), (("tcp", 5432, 5432), ("tcp", 5434, 5439)))
+
+    def test_dynamic_and_placeholders(self):
+        self.assertEqual(standard_port_ranges("udp/dynamic"), (("udp", 49152, 65535),))
+        self.assertEqual(standard_port_ranges("N/A"), ())
+        self.assertEqual(standard_port_ranges("tcp/any"), ())
+        self.assertEqual(standard_port_ranges(None), ())
+
+
+class CatalogTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.csv_path = os.path.join(self.directory, "apps.csv")
+        self.db_path = os.path.join(self.directory, "apps.db")
+        write_csv(self.csv_path)
+
+    def test_containers_expand_to_the_rows_that_follow_them(self):
+        catalog = Catalog(read_csv_records(self.csv_path))
+        self.assertEqual(catalog.names, ("100bao", "2ch", "2ch-base", "2ch-posting", "3pc"))
+        container = catalog["2ch"]
+        self.assertEqual(container.level, CONTAINER)
+        self.assertEqual(catalog["2ch-base"].level, CHILD)
+        self.assertEqual(container.children, ("2ch-base", "2ch-posting"))
+        self.assertEqual(set(container.expanded_ports), {"80", "443", "49152-65535"})
+        self.assertEqual(set(container.expanded_protocols), {"tcp", "udp"})
+        self.assertEqual(catalog["3pc"].children, ())
+
+    def test_database_round_trip(self):
+        records = read_csv_records(self.csv_path)
+        build_catalog(self.csv_path, self.db_path)
+        loaded = read_catalog(self.db_path)
+        self.assertEqual([r.to_dict() for r in loaded], [r.to_dict() for r in records])
+
+    def test_database_built_from_another_csv_is_rebuilt_whatever_its_mtime(self):
+        build_catalog(self.csv_path, self.db_path)
+        write_csv(self.csv_path, ROWS[:2])
+        # As after a checkout that wrote the database last.
+        os.utime(self.csv_path, (0, 0))
+        catalog = AppCatalog(self.csv_path, self.db_path).get()
+        self.assertEqual(catalog.names, ("100bao", "2ch"))
+        self.assertEqual(len(read_catalog(self.db_path)), 2)
+
+    def test_unreadable_version_means_no_catalog(self):
+        build_catalog(self.csv_path, self.db_path)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("UPDATE meta SET value = 'x' WHERE key = 'format_version'")
+        conn.close()
+        self.assertIsNone(read_catalog(self.db_path))
+        self.assertEqual(len(AppCatalog(self.csv_path, self.db_path).get()), len(ROWS))
+
+    def test_concurrent_rebuilds_leave_a_complete_database(self):
+        with concurrent.futures.ProcessPoolExecutor(max_workers=4) as executor:
+            self.assertTrue(all(executor.map(_write, [(self.csv_path, self.db_path)] * 4)))
+        self.assertEqual(len(read_catalog(self.db_path)), len(ROWS))
+        self.assertEqual([name for name in os.listdir(self.directory) if name.endswith(".tmp")], [])
+
+    def test_failed_write_leaves_no_temporary_file(self):
+        with self.assertRaises(AttributeError):
+            write_catalog([object()], self.db_path)
+        self.assertEqual(sorted(os.listdir(self.directory)), ["apps.csv"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+
+from Compare_final.app_catalog import AppRecord, Catalog, standard_port_ranges
+from Compare_final.app_port_index import AppPortIndex
+
+APPS = [
+    ("web-browsing", "tcp/80"),
+    ("ssl", "tcp/443"),
+    ("dns", "tcp/53 udp/53"),
+    ("split", "tcp/5000 udp/5001"),
+    ("wide", "tcp/8000-8100"),
+    ("rtp", "udp/dynamic"),
+]
+
+
+def catalog(apps=APPS):
+    records = []
+    for position, (name, standard_ports) in enumerate(apps):
+        ranges = standard_port_ranges(standard_ports)
+        ports = [str(low) if low == high else f"{low}-{high}" for protocol, low, high in ranges]
+        records.append(AppRecord(str(position), name, "", "", "", "", standard_ports, 0,
+                                 sorted({protocol for protocol, low, high in ranges}), ports, ranges))
+    return Catalog(records)
+
+
+def port_range(port):
+    low, sep, high = port.partition("-")
+    return int(low), int(high if sep else low)
+
+
+def brute_force(apps, ports, protocol):
+    """Overlapping apps and their coverage, straight from the Standard Ports ranges."""
+    ports = list(ports)
+    found = []
+    for name, standard_ports in apps:
+        ranges = [r for r in standard_port_ranges(standard_ports) if protocol in ("any", r[0])]
+        if not any(low <= end and start <= high for start, end in ports for proto, low, high in ranges):
+            continue
+        protocols = {proto for proto, low, high in ranges}
+        covered = any(all(any(proto == p and low <= start and end <= high for proto, low, high in ranges)
+                          for start, end in ports) for p in protocols)
+        found.append((name, covered))
+    return found
+
+
+class AppPortIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.index = AppPortIndex(catalog())
+
+    def test_single_port(self):
+        self.assertEqual(self.index.lookup("443"), [("ssl", True)])
+        self.assertEqual(self.index.lookup("53", "udp"), [("dns", True)])
+
+    def test_protocol_is_case_insensitive(self):
+        self.assertEqual(self.index.lookup("443", "TCP"), [("ssl", True)])
+        self.assertEqual(self.index.lookup("443", "udp"), [])
+
+    def test_range_partly_inside_a_default_is_not_covered(self):
+        self.assertEqual(self.index.lookup("8050-8200"), [("wide", False)])
+        self.assertEqual(self.index.lookup("8050-8060"), [("wide", True)])
+
+    def test_ports_split_across_protocols_are_not_covered(self):
+        self.assertEqual(self.index.lookup(["5000", "5001"]), [("split", False)])
+        self.assertEqual(self.index.lookup(["53"]), [("dns", True)])
+
+    def test_matches_a_brute_force_scan(self):
+        queries = [["80"], ["53", "80"], ["5000-5001"], ["49152"], ["7999-8000"], ["1-65535"], ["443", "8080"]]
+        for ports in queries:
+            for protocol in ("any", "tcp", "udp"):
+                self.assertEqual(self.index.lookup(ports, protocol), brute_force(APPS, map(port_range, ports), protocol),
+                                 (ports, protocol))
+
+    def test_unknown_or_any_port(self):
+        self.assertEqual(self.index.lookup("any"), [])
+        self.assertEqual(self.index.lookup("9"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+
+from Compare_final.app_catalog import Catalog, clean_row, read_catalog
+from Compare_final.applipedia_ingest import (CHECKPOINT_NAME, Checkpoint, detail_key, detail_standard_ports,
+                                             ingest, ingest_details, listing_rows)
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "applipedia")
+LISTING = os.path.join(FIXTURES, "listing.html")
+SCRAPE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "scrape.html")
+
+
+def read(path):
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+def read_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+class ListingRowsTests(unittest.TestCase):
+    def test_rendered_page(self):
+        rows = listing_rows(read(LISTING))
+        self.assertEqual([(row["App ID"], row["Name"]) for row in rows],
+                         [("120", "100bao"), ("120", "iec-60870-5-104"), ("165", "2ch"), ("781", "2ch-base"),
+                          ("783", "2ch-posting"), ("1788", "1c-enterprise"), ("401", "postgres")])
+        self.assertEqual(rows[0]["Category"], "general-internet")
+        self.assertEqual(rows[0]["Technology"], "peer-to-peer")
+        self.assertEqual(rows[0]["Standard Ports"], "N/A")
+        self.assertEqual(rows[2]["OnClick"], "ShowApplicationDetail('165', '2ch', '1'); return false;")
+
+    def test_list_response_fragment(self):
+        fragment = ("<tr><td><a onclick=\"ShowApplicationDetail('781', '2ch-base', '2'); return false;\">2ch-base</a></td>"
+                    "<td>collaboration</td><td>social-networking</td><td>3</td><td>browser-based</td></tr>"
+                    "<tr><td>no link</td><td></td><td></td><td></td><td></td></tr>")
+        self.assertEqual([row["Name"] for row in listing_rows(fragment)], ["2ch-base"])
+
+    @unittest.skipUnless(os.path.exists(SCRAPE), "scrape.html is not in the tree")
+    def test_page_saved_before_the_list_loaded(self):
+        self.assertEqual(listing_rows(read(SCRAPE)), [])
+        with self.assertRaises(ValueError):
+            ingest(SCRAPE, raw_csv_path=None)
+
+
+class DetailTests(unittest.TestCase):
+    def test_standard_ports(self):
+        details = os.path.join(FIXTURES, "details")
+        self.assertEqual(detail_standard_ports(read(os.path.join(details, "120_100bao.html"))), "tcp/3468,6346,11300")
+        self.assertEqual(detail_standard_ports(read(os.path.join(details, "783.html"))), "tcp/80 udp/dynamic")
+        self.assertIsNone(detail_standard_ports(read(os.path.join(details, "1788_1c-enterprise.html"))))
+
+    def test_key(self):
+        self.assertEqual(detail_key("1788_1c-enterprise.html"), ("1788", "1c-enterprise"))
+        self.assertEqual(detail_key("/saved/783.html"), ("783", ""))
+        self.assertIsNone(detail_key("index.html"))
+
+
+class IngestTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.dir = directory.name
+        self.details = shutil.copytree(os.path.join(FIXTURES, "details"), os.path.join(self.dir, "details"))
+        self.paths = {name: os.path.join(self.dir, file) for name, file in
+                      (("raw_csv_path", "raw.csv"), ("csv_path", "cleaned.csv"), ("db_path", "catalog.db"))}
+
+    def ingest(self):
+        return ingest(LISTING, self.details, workers=1, **self.paths)
+
+    def test_rebuilds_the_csvs_and_catalog(self):
+        result = self.ingest()
+        self.assertEqual(result["applications"], 7)
+        self.assertEqual(result["details_parsed"], 6)
+        # The page without Standard Ports, the container, which has no page, and the
+        # application sharing id 120: the bare 120.html cannot be told apart.
+        self.assertEqual(sorted(result["missing"]), ["1c-enterprise", "2ch", "iec-60870-5-104"])
+
+        ports = {row["Name"]: row["Standard Ports"] for row in read_rows(self.paths["raw_csv_path"])}
+        self.assertEqual(ports["100bao"], "tcp/3468,6346,11300")
+        self.assertEqual(ports["2ch-posting"], "tcp/80 udp/dynamic")
+        self.assertEqual(ports["iec-60870-5-104"], "N/A")
+
+        catalog = Catalog(read_catalog(self.paths["db_path"]))
+        self.assertEqual(catalog["2ch"].children, ("2ch-base", "2ch-posting"))
+        self.assertEqual(catalog["2ch"].expanded_ports, ("80", "443", "49152-65535"))
+        self.assertEqual(catalog["postgres"].ports, ("5432", "5434-5439"))
+
+    def test_resumes_from_the_checkpoint(self):
+        self.ingest()
+        self.assertEqual(self.ingest()["details_parsed"], 0)
+
+        with open(os.path.join(self.details, "1788_1c-enterprise.html"), "a", encoding="utf-8") as f:
+            f.write('<table><tr><td>Standard Ports:</td><td>tcp/1541</td></tr></table>\n')
+        result = self.ingest()
+        self.assertEqual(result["details_parsed"], 1)
+        self.assertNotIn("1c-enterprise", result["missing"])
+
+    def test_forgets_deleted_pages(self):
+        self.ingest()
+        os.remove(os.path.join(self.details, "401_postgres.html"))
+        checkpoint = Checkpoint(os.path.join(self.details, CHECKPOINT_NAME))
+        self.assertIn("401_postgres.html", checkpoint.entries)
+
+        self.assertEqual(ingest_details(self.details, checkpoint, workers=1), 0)
+        self.assertNotIn("401_postgres.html", checkpoint.entries)
+        self.assertNotIn("401_postgres.html", Checkpoint(checkpoint.path).entries)
+        # Without the page, postgres keeps the ports of the earlier raw CSV.
+        result = self.ingest()
+        self.assertNotIn("postgres", result["missing"])
+
+
+class CleanRowTests(unittest.TestCase):
+    def test_ports_after_a_comma_and_space(self):
+        row = clean_row({"Standard Ports": "tcp/5432, 5434-5439",
+                         "OnClick": "ShowApplicationDetail('401', 'postgres', '0'); return false;"})
+        self.assertEqual((row["OnClick_Last_Digit"], row["Protocol"], row["Ports"]),
+                         ("0", "['tcp']", "['5432', '5434-5439']"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import unittest
+from unittest import mock
+
+from Compare_final import batch_matcher
+from Compare_final.Firewall_Rule_Parse import match_rule
+from Compare_final.batch_matcher import BatchMatcher
+
+
+def rule(name, action="allow", source=("any",), destination=("any",), from_zone=("trust",), to_zone=("untrust",),
+         entries=(("any", "any", "any"),), **extra):
+    """A rule in rules_write shape; entries are (application, protocol, port) triples."""
+    return dict({
+        "name": name, "action": action, "source": list(source), "destination": list(destination),
+        "from": list(from_zone), "to": list(to_zone),
+        "entries": [{"application": app, "protocol": protocol, "destination_port": port}
+                    for app, protocol, port in entries],
+    }, **extra)
+
+
+def flow(src="any", dest="any", src_zone="trust", dest_zone="untrust", port="any", protocol="any",
+         action="any", application="any"):
+    return {"src": src, "dest": dest, "src_zone": src_zone, "dest_zone": dest_zone, "port": port,
+            "protocol": protocol, "action": action, "application": application}
+
+
+RULES = [
+    rule("v4", source=["10.0.0.0/24"], destination=["192.0.2.0/24"]),
+    rule("v6", source=["2001:db8::/64"], destination=["ffff::/16"]),
+    rule("range", source=["10.0.1.5-10.0.1.20"], destination=["192.0.2.10-192.0.2.20"]),
+    rule("not-guest", action="deny", source=["192.168.1.0/24"], **{"negate-source": "yes"}),
+    rule("web", action="drop ", entries=[("web-browsing", "tcp", "80"), ("ssl", "tcp", "8000-8100")]),
+    rule("dmz", from_zone=["any"], to_zone=["DMZ"]),
+    rule("no-zones", from_zone=[]),
+]
+
+
+def matching(flows, rules=RULES):
+    matrix = BatchMatcher(rules).match_matrix(flows)
+    return [[rules[pos]["name"] for pos in row.nonzero()[0]] for row in matrix]
+
+
+class AddressTests(unittest.TestCase):
+    def test_ipv4(self):
+        self.assertEqual(matching([flow("10.0.0.5", "192.0.2.1"), flow("10.0.0.0/16", "192.0.2.0/25"),
+                                   flow("10.0.0.5", "192.0.2.0/23")]),
+                         [["v4", "not-guest", "web"], ["v4", "range", "not-guest", "web"], ["not-guest", "web"]])
+
+    def test_ipv6_halves(self):
+        # ffff::/16 puts the high 64 bits above 2**63 and 2001:db8::/64 fills the low ones.
+        self.assertEqual(matching([flow("2001:db8::ffff:ffff:ffff:ffff", "ffff:ffff::1"),
+                                   flow("2001:db8:0:1::", "ffff::1"),
+                                   flow("2001:db8::1", "fffe::1")]),
+                         [["v6", "not-guest", "web"], ["not-guest", "web"], ["not-guest", "web"]])
+
+    def test_families_never_overlap(self):
+        self.assertEqual(matching([flow("::", "192.0.2.1"), flow("10.0.0.5", "::ffff:c000:201")]),
+                         [["not-guest", "web"], ["not-guest", "web"]])
+
+    def test_destination_ranges_overlap(self):
+        self.assertEqual(matching([flow("10.0.1.20", "192.0.2.0/24"), flow("10.0.1.21", "192.0.2.15")]),
+                         [["range", "not-guest", "web"], ["not-guest", "web"]])
+
+    def test_negation_is_skipped_for_any(self):
+        self.assertEqual(matching([flow("192.168.1.7"), flow("any")]),
+                         [["web"], ["v4", "v6", "range", "not-guest", "web"]])
+
+
+class ZoneServiceActionTests(unittest.TestCase):
+    def test_zones(self):
+        self.assertEqual(matching([flow("192.168.1.7", src_zone="guest", dest_zone="dmz"),
+                                   flow("192.168.1.7", src_zone="TRUST", dest_zone="any")]),
+                         [["dmz"], ["web", "dmz"]])
+
+    def test_services(self):
+        flows = [flow("192.168.1.7", port="80", protocol="tcp", application="web-browsing"),
+                 flow("192.168.1.7", port="8050", protocol="tcp", application="ssl"),
+                 flow("192.168.1.7", port="80", protocol="udp", application="web-browsing"),
+                 flow("192.168.1.7", port="8090-8200", protocol="any", application="any"),
+                 flow("192.168.1.7", port="8000-8100", protocol="any", application="any"),
+                 flow("192.168.1.7", port=["53", "80"], protocol="tcp", application="any")]
+        self.assertEqual(matching(flows), [["web"], ["web"], [], [], ["web"], ["web"]])
+
+    def test_app_default_entries_match_any_port_only(self):
+        rules = [rule("default", entries=[("ssl", "tcp", "app-default")])]
+        self.assertEqual(matching([flow(application="ssl"), flow(port="443", application="ssl"),
+                                   flow(application="dns")], rules), [["default"], [], []])
+
+    def test_actions_are_stripped(self):
+        self.assertEqual(matching([flow("192.168.1.7", action="drop"), flow("10.0.0.5", action="deny")]),
+                         [["web"], ["not-guest"]])
+
+    def test_incomplete_rules_never_match(self):
+        rules = [rule("no-action"), rule("no-to")]
+        del rules[0]["action"], rules[1]["to"]
+        self.assertEqual(matching([flow()], rules), [[]])
+
+
+class MatchTests(unittest.TestCase):
+    def test_first_and_all_matches(self):
+        results = BatchMatcher(RULES).match([flow("10.0.0.5", "192.0.2.1"), flow("192.168.1.7", dest_zone="mgmt")])
+        self.assertEqual(results, [{"first": 0, "matches": [0, 3, 4]}, {"first": None, "matches": []}])
+
+    def test_same_answer_as_match_rule(self):
+        flows = [flow("10.0.0.5", "192.0.2.1"), flow("2001:db8::1", "ffff::1"), flow("192.168.1.7", dest_zone="dmz"),
+                 flow("10.0.1.9", "192.0.2.0/24", action="allow"), flow(port="8000-8010", application="ssl"),
+                 flow(port="70-90"), flow(application="ssl"), flow(port="443", application="ssl")]
+        rules = RULES + [rule("default", entries=[("ssl", "tcp", "app-default")])]
+        for row, query in zip(BatchMatcher(rules).match_matrix(flows), flows):
+            expected = [match_rule(r, query["src"], query["dest"], query["src_zone"], query["dest_zone"], query["port"],
+                                   query["protocol"], query["action"], query["application"])[0] for r in rules]
+            self.assertEqual(row.tolist(), expected, query)
+
+    def test_small_blocks(self):
+        flows = [flow("10.0.0.5", "192.0.2.1"), flow("2001:db8::1", "ffff::1", port="8000", application="ssl"),
+                 flow("192.168.1.7", port="any", protocol="tcp")]
+        expected = matching(flows)
+        with mock.patch.object(batch_matcher, "BLOCK_CELLS", 1):
+            self.assertEqual(matching(flows), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
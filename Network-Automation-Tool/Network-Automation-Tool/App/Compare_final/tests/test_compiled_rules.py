@@ -0,0 +1,163 @@
+import unittest
+from unittest import mock
+
+from Compare_final.compiled_rules import (address_flag, compile_address, compile_members, compile_ports, compile_rule,
+                                          compile_services, service_field_flags, service_flags)
+from Compare_final.rule_model import Rule
+
+
+def flag(members, query, **kwargs):
+    return address_flag(compile_members(members), compile_address(query), **kwargs)
+
+
+class AddressFlagTests(unittest.TestCase):
+    def test_source_subnets_overlap(self):
+        self.assertTrue(flag(["10.0.0.0/24"], "10.0.0.255"))
+        self.assertTrue(flag(["10.0.0.0/24"], "10.0.0.0/16"))
+        self.assertTrue(flag(["10.0.0.0/24"], "10.0.0.128/25"))
+        self.assertFalse(flag(["10.0.0.0/24"], "10.0.1.0"))
+
+    def test_destination_subnet_must_hold_the_query(self):
+        self.assertTrue(flag(["10.0.0.0/24"], "10.0.0.0/25", within=True))
+        self.assertTrue(flag(["10.0.0.0/24"], "10.0.0.0/24", within=True))
+        self.assertFalse(flag(["10.0.0.0/24"], "10.0.0.0/23", within=True))
+
+    def test_ranges_overlap_on_either_side(self):
+        members = ["10.0.0.10-10.0.0.20"]
+        self.assertTrue(flag(members, "10.0.0.20"))
+        self.assertFalse(flag(members, "10.0.0.21"))
+        self.assertTrue(flag(members, "10.0.0.0/24", within=True))
+        self.assertFalse(flag(members, "10.0.0.0/29", within=True))
+        self.assertFalse(flag(members, "10.0.0.0/24", range_within=True))
+        self.assertTrue(flag(members, "10.0.0.12/30", range_within=True))
+
+    def test_families_never_overlap(self):
+        # 255.255.255.255 and :: sit next to each other on the shared integer axis.
+        self.assertFalse(flag(["255.255.255.255"], "::"))
+        self.assertFalse(flag(["::"], "255.255.255.255"))
+        self.assertFalse(flag(["0.0.0.0/0"], "::1"))
+        self.assertFalse(flag(["::/0"], "10.0.0.1", within=True))
+        self.assertTrue(flag(["255.255.255.255", "::"], "::", within=True))
+
+    def test_ipv6(self):
+        self.assertTrue(flag(["2001:db8::/64"], "2001:db8::ffff", within=True))
+        self.assertTrue(flag(["2001:db8::/64"], "2001:db8::/48"))
+        self.assertFalse(flag(["2001:db8::/64"], "2001:db8::/48", within=True))
+        self.assertFalse(flag(["2001:db8::/64"], "2001:db8:0:1::1"))
+        self.assertTrue(flag(["2001:db8::1-2001:db8::9"], "2001:db8::9"))
+
+    def test_any(self):
+        self.assertTrue(flag(["any"], "192.0.2.1", within=True))
+        self.assertTrue(flag(["10.0.0.0/24"], "any"))
+        self.assertIsNone(compile_address("any"))
+
+    def test_unresolved_members(self):
+        # An FQDN that did not resolve still matches an any query but no address.
+        self.assertTrue(flag(["partner.example.com"], "any"))
+        self.assertFalse(flag(["partner.example.com"], "10.0.0.1"))
+        # An unparseable range matches nothing, and "..." is skipped.
+        self.assertFalse(flag(["10.0.0.9-bogus"], "any"))
+        self.assertFalse(flag(["..."], "any"))
+        self.assertTrue(flag(["...", "10.0.0.0/24"], "10.0.0.7"))
+        self.assertFalse(flag(["10.0.0.0/24"], "bogus"))
+        self.assertEqual(compile_address("bogus"), ())
+        self.assertEqual(compile_address("10.0.0.1-::1"), ())
+        self.assertTrue(compile_members(["...", "10.0.0.0/24"])["unresolved"])
+        self.assertTrue(compile_members(["partner.example.com"])["unresolved"])
+        self.assertFalse(compile_members(["any", "10.0.0.0/24"])["unresolved"])
+
+    def test_members_are_merged(self):
+        compiled = compile_members(["10.0.0.0/25", "10.0.0.128/25", "10.0.0.5", "10.0.2.0/24"])
+        self.assertEqual(compiled["networks"], [(167772160, 167772415), (167772672, 167772927)])
+        self.assertEqual(compiled["network_starts"], [167772160, 167772672])
+        self.assertEqual(compiled["ranges"], [])
+
+
+def services(*entries):
+    return compile_services([{"application": app, "protocol": protocol, "destination_port": port}
+                             for app, protocol, port in entries])
+
+
+class ServiceFlagsTests(unittest.TestCase):
+    def test_single_ports(self):
+        compiled = services(("ssl", "tcp", "443"), ("dns", "udp", "53"))
+        self.assertEqual(service_flags(compiled, compile_ports("53"), "udp", "dns"), (True, "udp", "dns"))
+        self.assertEqual(service_flags(compiled, compile_ports("53"), "tcp", "dns"), (False, False, False))
+        self.assertEqual(service_flags(compiled, compile_ports("443"), "tcp", "dns"), (False, False, False))
+        self.assertEqual(service_flags(compiled, compile_ports("443"), "any", "any"), (True, "tcp", "ssl"))
+
+    def test_port_ranges(self):
+        compiled = services(("ssl", "tcp", "8000-8100"), ("web-browsing", "tcp", "80"))
+        self.assertTrue(service_flags(compiled, compile_ports("8100"), "tcp", "ssl")[0])
+        self.assertFalse(service_flags(compiled, compile_ports("8101"), "tcp", "ssl")[0])
+        self.assertTrue(service_flags(compiled, compile_ports(["79", "80"]), "tcp", "web-browsing")[0])
+        # A range query has to fit inside what the rule opens.
+        self.assertTrue(service_flags(compiled, compile_ports("8000-8100"), "tcp", "ssl")[0])
+        self.assertFalse(service_flags(compiled, compile_ports("7990-8010"), "tcp", "ssl")[0])
+        self.assertFalse(service_flags(compiled, compile_ports("70-90"), "tcp", "web-browsing")[0])
+        self.assertFalse(service_flags(services(("ssl", "tcp", "8000")), compile_ports("8000-8100"), "tcp", "ssl")[0])
+
+    def test_overlap(self):
+        compiled = services(("ssl", "tcp", "8000-8100"), ("web-browsing", "tcp", "80"))
+        self.assertTrue(service_flags(compiled, compile_ports("7990-8010"), "tcp", "ssl", within=False)[0])
+        self.assertTrue(service_flags(compiled, compile_ports("70-90"), "tcp", "web-browsing", within=False)[0])
+        self.assertFalse(service_flags(compiled, compile_ports("81-90"), "tcp", "web-browsing", within=False)[0])
+
+    def test_field_flags(self):
+        compiled = services(("ssl", "tcp", "443"), ("dns", "udp", "53"))
+        self.assertEqual(service_flags(compiled, compile_ports("53"), "udp", "ntp"), (False, False, False))
+        # Each field on its own: the port and protocol exist, the application does not.
+        self.assertEqual(service_field_flags(compiled, compile_ports("53"), "udp", "ntp"), (True, "udp", False))
+        self.assertEqual(service_field_flags(compiled, compile_ports("80"), "any", "any"), (False, "tcp", "ssl"))
+        self.assertEqual(service_field_flags({}, None, "any", "any"), (False, False, False))
+
+    def test_any_entries(self):
+        compiled = services(("any", "any", "any"))
+        self.assertEqual(service_flags(compiled, compile_ports("65535"), "udp", "ssl"), (True, "any", "any"))
+        compiled = services(("ssl", "tcp", "any"))
+        self.assertTrue(service_flags(compiled, compile_ports("1"), "tcp", "ssl")[0])
+        self.assertTrue(service_flags(compiled, compile_ports("any"), "tcp", "ssl")[0])
+        self.assertIsNone(compile_ports(["80", "any"]))
+
+    def test_ports_are_merged(self):
+        compiled = services(*(("ssl", "tcp", port) for port in ("443", "444-450", "8443")))
+        self.assertEqual(compiled["ssl"]["tcp"], ([(443, 450), (8443, 8443)], [443, 8443]))
+
+    def test_unparsed_ports_match_only_any(self):
+        compiled = services(("ssl", "tcp", "app-default"), ("dns", "udp", ""), ("ntp", "udp", "bad"))
+        self.assertEqual(compiled["ssl"]["tcp"], ([], []))
+        for app, protocol in (("ssl", "tcp"), ("dns", "udp"), ("ntp", "udp")):
+            with self.subTest(app=app):
+                self.assertEqual(service_flags(compiled, compile_ports("any"), protocol, app), (True, protocol, app))
+                self.assertFalse(service_flags(compiled, compile_ports("443"), protocol, app)[0])
+        self.assertFalse(service_flags(compiled, compile_ports("any"), "udp", "ssl")[0])
+        self.assertEqual(service_field_flags(compiled, compile_ports("53"), "udp", "dns"), (False, "udp", "dns"))
+        self.assertEqual(compile_ports(["bad", "53"]), ((53, 53),))
+
+
+class CompileRuleTests(unittest.TestCase):
+    def test_negation_keys(self):
+        compiled = compile_rule({"name": "r", "index": 4, "source": ["10.0.0.0/24"], "destination": ["any"],
+                                 "negate-source": "yes", "negate-destination": "no"})
+        self.assertEqual(compiled["index"], 4)
+        self.assertTrue(compiled["negate_source"])
+        self.assertFalse(compiled["negate_destination"])
+        compiled = compile_rule({"name": "r", "negate-destination": "yes"})
+        self.assertFalse(compiled["negate_source"])
+        self.assertTrue(compiled["negate_destination"])
+        self.assertFalse(compiled["source"]["wild"])
+
+    def test_rule_records_compile_from_their_entry_tuples(self):
+        rule = {"name": "r", "index": 1, "indexdis": 1, "source": ["10.0.0.0/24"], "sourcedis": ["lan"],
+                "destination": ["any"], "destinationdis": ["any"],
+                "entries": [{"application": "ssl", "protocol": "tcp", "destination_port": "443"},
+                            {"application": "dns", "protocol": "udp", "destination_port": "app-default"}]}
+        record = Rule.from_dict(rule)
+        with mock.patch.object(Rule, "__getitem__", autospec=True, side_effect=Rule.__getitem__) as getitem:
+            compiled = compile_rule(record)
+        self.assertNotIn("entries", [call.args[1] for call in getitem.call_args_list])
+        self.assertEqual(compiled, compile_rule(rule))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import copy
+import unittest
+
+from Compare_final.config_diff import dirty_rules, entry_hashes
+
+CONFIG = {
+    "rules": {
+        "web": {"source": ["servers"], "destination": ["any"], "service": ["web-ports"], "application": ["apps"],
+                "action": "allow", "index": 1},
+        "db": {"source": ["any"], "destination": ["db"], "service": ["application-default"], "application": ["any"],
+               "action": "allow", "index": 2},
+        "pending": {"source": ["future"], "destination": ["any"], "action": "deny", "index": 3},
+        "to-partner": {"source": ["any"], "destination": ["partner"], "action": "allow", "index": 4},
+    },
+    "addresses": {
+        "web": {"ip-netmask": "10.1.0.0/24"},
+        "db": {"ip-range": "10.2.0.1-10.2.0.9"},
+        "servers": {"static": ["web-group"]},
+        "web-group": {"static": ["web"]},
+        "unused": {"ip-netmask": "10.3.0.0/24"},
+        "partner": {"fqdn": "partner.example.com"},
+    },
+    "services": {
+        "tcp-8080": {"protocol": "tcp", "port": "8080"},
+        "web-ports": {"members": {"tcp-8080": [], "service-https": []}},
+    },
+    "application_groups": {"apps": {"members": ["ssl", "web-browsing"]}},
+}
+
+
+def dirty_after(edit):
+    new = copy.deepcopy(CONFIG)
+    edit(new)
+    return dirty_rules(entry_hashes(CONFIG), entry_hashes(new), new)
+
+
+class DirtyRulesTests(unittest.TestCase):
+    def test_unchanged(self):
+        self.assertEqual(dirty_after(lambda config: None), set())
+
+    def test_moved_rules_are_not_dirty(self):
+        def move(config):
+            config["rules"] = {name: dict(config["rules"][name], index=i + 1)
+                               for i, name in enumerate(("to-partner", "pending", "db", "web"))}
+        self.assertEqual(dirty_after(move), set())
+
+    def test_edited_and_new_rules(self):
+        self.assertEqual(dirty_after(lambda config: config["rules"]["db"].update(action="deny")), {"db"})
+        self.assertEqual(dirty_after(lambda config: config["rules"].update(new={"source": ["any"], "index": 4})),
+                         {"new"})
+        self.assertEqual(dirty_after(lambda config: config["rules"].pop("db")), set())
+
+    def test_nested_address_change(self):
+        self.assertEqual(dirty_after(lambda config: config["addresses"]["web"].update({"ip-netmask": "10.1.1.0/24"})),
+                         {"web"})
+        self.assertEqual(dirty_after(lambda config: config["addresses"].pop("web")), {"web"})
+        self.assertEqual(dirty_after(lambda config: config["addresses"]["db"].update({"ip-range": "10.2.0.1-10.2.0.5"})),
+                         {"db"})
+        self.assertEqual(dirty_after(lambda config: config["addresses"]["unused"].update({"ip-netmask": "10.4.0.0/24"})),
+                         set())
+
+    def test_name_that_becomes_an_object(self):
+        self.assertEqual(dirty_after(lambda config: config["addresses"].update(future={"ip-netmask": "10.5.0.1"})),
+                         {"pending"})
+
+    def test_resolved_fqdn_change(self):
+        old = entry_hashes(CONFIG, {"partner.example.com": ["198.51.100.7"]})
+        same = entry_hashes(CONFIG, {"partner.example.com": ["198.51.100.7"]})
+        moved = entry_hashes(CONFIG, {"partner.example.com": ["203.0.113.5"]})
+        self.assertEqual(dirty_rules(old, same, CONFIG), set())
+        self.assertEqual(dirty_rules(old, moved, CONFIG), {"to-partner"})
+        self.assertEqual(dirty_rules(old, entry_hashes(CONFIG, {}), CONFIG), {"to-partner"})
+
+    def test_service_and_application_changes(self):
+        self.assertEqual(dirty_after(lambda config: config["services"]["tcp-8080"].update(port="8081")), {"web"})
+        self.assertEqual(dirty_after(lambda config: config["application_groups"]["apps"]["members"].append("dns")),
+                         {"web"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from Compare_final import config_loader
+from Compare_final.config_loader import load_config, load_config_string
+
+CONFIG = """<response status='success'><result><config>
+<shared>
+  <address><entry name='shared-dns'><ip-netmask>192.0.2.53</ip-netmask><description>resolver</description></entry></address>
+  <service><entry name='service-dns'><protocol><udp><port>53</port></udp></protocol></entry></service>
+  <application-group>
+    <entry name='web-apps'><members><member>ssl</member><member>web-browsing</member></members></entry>
+    <entry name='mail'><members><member>smtp</member></members></entry>
+  </application-group>
+</shared>
+<devices><entry name='localhost.localdomain'><vsys>
+<entry name='vsys1'>
+  <address>
+    <entry name='web'><ip-netmask>10.1.0.0/24</ip-netmask><tag><member>prod</member></tag></entry>
+    <entry name='partner'><fqdn>partner.example.com</fqdn></entry>
+  </address>
+  <address-group>
+    <entry name='servers'><static><member>web</member><member>shared-dns</member></static></entry>
+    <entry name='tagged'><dynamic><filter>'prod'</filter></dynamic></entry>
+  </address-group>
+  <service-group>
+    <entry name='web-ports'><members><member>tcp-8080</member><member>service-https</member></members></entry>
+  </service-group>
+  <service>
+    <entry name='tcp-8080'><protocol><tcp><port>8080</port><override><no/></override></tcp></protocol></entry>
+  </service>
+  <application-group>
+    <entry name='vsys-only'><members><member>dns</member></members></entry>
+  </application-group>
+  <rulebase><security><rules>
+    <entry name='allow-web' uuid='1'>
+      <from><member>trust</member></from><to><member>untrust</member></to>
+      <source><member>any</member></source><destination><member>servers</member></destination>
+      <application><member>web-apps</member></application><service><member>web-ports</member></service>
+      <action>allow</action><negate-destination>yes</negate-destination>
+      <profile-setting><group><member>default</member></group></profile-setting>
+      <description>  web  </description>
+      <target><devices><entry name='0123456789'/></devices><negate>no</negate></target>
+    </entry>
+    <entry name='deny-all'>
+      <from><member>any</member></from><to><member>any</member></to>
+      <source><member>any</member></source><destination><member>any</member></destination>
+      <application><member>any</member></application><service><member>any</member></service>
+      <action>deny</action><negate-source>no</negate-source><disabled>no</disabled>
+    </entry>
+  </rules></security></rulebase>
+</entry>
+<entry name='vsys2'>
+  <address><entry name='vsys2-host'><ip-netmask>10.9.0.1</ip-netmask></entry></address>
+  <rulebase><security><rules>
+    <entry name='vsys2-rule'><from><member>any</member></from><action>allow</action></entry>
+  </rules></security></rulebase>
+</entry>
+</vsys></entry></devices></config></result></response>"""
+
+# What the recursive walks in rules_write made of CONFIG, quirks included.
+EXPECTED = {
+    "rules": {
+        "allow-web": {
+            "from": ["trust"], "index": 1, "to": ["untrust"], "source": ["any"], "destination": ["servers"],
+            "application": ["web-apps"], "service": ["web-ports"], "action": "allow", "negate-destination": "yes",
+            "profile-setting": [""], "description": [], "target": ["", "no"],
+        },
+        # The target device entry is an entry under the rulebase too; vsys2's
+        # rulebase is not read at all.
+        "0123456789": {},
+        "deny-all": {
+            "from": ["any"], "index": 3, "to": ["any"], "source": ["any"], "destination": ["any"],
+            "application": ["any"], "service": ["any"], "action": "deny", "negate-source": "no", "disabled": [],
+        },
+    },
+    "addresses": {
+        "shared-dns": {"ip-netmask": "192.0.2.53", "description": []},
+        "web": {"ip-netmask": "10.1.0.0/24", "tag": ["prod"]},
+        "partner": {"fqdn": "partner.example.com"},
+        "servers": {"static": ["web", "shared-dns"]},
+        "tagged": {"dynamic": ["'prod'"]},
+        "vsys2-host": {"ip-netmask": "10.9.0.1"},
+    },
+    "services": {
+        "service-dns": {"protocol": "udp", "port": "53"},
+        "web-ports": {"members": {"tcp-8080": [], "service-https": []}},
+        "tcp-8080": {"protocol": "tcp", "port": "8080"},
+    },
+    # Only the first application-group element, the shared one, is read.
+    "application_groups": {"web-apps": {"members": ["ssl", "web-browsing"]}, "mail": {"members": ["smtp"]}},
+}
+
+
+def ordered(result):
+    """The dictionaries with their order made part of the comparison."""
+    return {kind: list(entries.items()) for kind, entries in result.items()}
+
+
+class LoadConfigTests(unittest.TestCase):
+    def test_sections(self):
+        self.assertEqual(ordered(load_config_string(CONFIG)), ordered(EXPECTED))
+
+    def test_chunk_boundaries(self):
+        for chunk_size in (1, 7, 64):
+            with mock.patch.object(config_loader, "CHUNK_SIZE", chunk_size):
+                self.assertEqual(ordered(load_config_string(CONFIG)), ordered(EXPECTED))
+
+    def test_file_sources(self):
+        self.assertEqual(ordered(load_config(io.BytesIO(CONFIG.encode()))), ordered(EXPECTED))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "running-config.xml")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(CONFIG)
+            self.assertEqual(ordered(load_config(path)), ordered(EXPECTED))
+
+    def test_empty_sections(self):
+        result = load_config_string("<response status='success'><result><config><shared/></config></result></response>")
+        self.assertEqual(result, {"rules": {}, "addresses": {}, "services": {}, "application_groups": {}})
+
+    def test_blank_text(self):
+        result = load_config_string(CONFIG.replace("<member>trust</member>", "<member/>"))
+        self.assertEqual(result["rules"]["allow-web"]["from"], [""])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+from unittest import mock
+
+from Compare_final import Firewall_Rule_Parse
+from Compare_final.Firewall_Rule_Parse import first_match_rule, parallel_check_rules
+
+
+def rule(name, action="allow", source=("any",), destination=("any",), from_zone=("trust",), to_zone=("untrust",),
+         entries=(("any", "any", "any"),), **extra):
+    """A rule in rules_write shape; entries are (application, protocol, port) triples."""
+    return dict({
+        "name": name, "action": action, "source": list(source), "destination": list(destination),
+        "from": list(from_zone), "to": list(to_zone),
+        "entries": [{"application": app, "protocol": protocol, "destination_port": port}
+                    for app, protocol, port in entries],
+    }, **extra)
+
+
+RULES = [
+    rule("deny-guest", action="deny", source=["192.168.1.0/24"]),
+    rule("web", source=["10.0.0.0/8"], destination=["10.1.0.0/24"], entries=[("web-browsing", "tcp", "8080")]),
+    rule("not-guest", source=["192.168.1.0/24"], destination=["10.2.0.1-10.2.0.9"], **{"negate-source": "yes"}),
+    rule("dmz", action="drop ", from_zone=["any"], to_zone=["dmz"]),
+    rule("catch-all", action="deny", from_zone=["any"]),
+]
+
+
+def names(matches):
+    return [match["name"] for match in matches]
+
+
+class FirstMatchTests(unittest.TestCase):
+    def first(self, src, dest, src_zone, dest_zone, port="any", protocol="any", application="any"):
+        return first_match_rule(RULES, src, dest, src_zone, dest_zone, port, protocol, application)
+
+    def test_first_rule_wins(self):
+        first = self.first("192.168.1.7", "10.1.0.5", "trust", "untrust")
+        self.assertEqual((first["name"], first["verdict"]), ("deny-guest", "deny"))
+        first = self.first("10.9.0.1", "10.1.0.5", "trust", "untrust", "8080", "tcp", "web-browsing")
+        self.assertEqual((first["name"], first["verdict"]), ("web", "allow"))
+
+    def test_later_rule_when_an_earlier_one_misses(self):
+        # Wrong port for web, so the catch-all is the first hit.
+        first = self.first("10.9.0.1", "10.1.0.5", "trust", "untrust", "443", "tcp", "web-browsing")
+        self.assertEqual(first["name"], "catch-all")
+
+    def test_negated_source(self):
+        self.assertEqual(self.first("172.16.0.1", "10.2.0.4", "trust", "untrust")["name"], "not-guest")
+        self.assertEqual(self.first("192.168.1.7", "10.2.0.4", "trust", "untrust")["name"], "deny-guest")
+
+    def test_verdict_is_stripped(self):
+        first = self.first("172.16.0.1", "198.51.100.1", "untrust", "dmz")
+        self.assertEqual((first["name"], first["verdict"]), ("dmz", "drop"))
+
+    def test_no_match(self):
+        self.assertIsNone(self.first("172.16.0.1", "198.51.100.1", "trust", "mgmt"))
+
+    def test_stops_at_the_first_hit(self):
+        with mock.patch.object(Firewall_Rule_Parse, "check_if_rule_exists",
+                               wraps=Firewall_Rule_Parse.check_if_rule_exists) as check:
+            self.first("10.9.0.1", "10.1.0.5", "trust", "untrust", "8080", "tcp", "web-browsing")
+        self.assertEqual(check.call_count, 2)
+
+
+class AllMatchesTests(unittest.TestCase):
+    def test_policy_order(self):
+        query = ("10.9.0.1", "10.1.0.5", "trust", "untrust", "8080", "tcp")
+        self.assertEqual(names(parallel_check_rules(RULES, *query, "any", "web-browsing")), ["web", "catch-all"])
+        self.assertEqual(names(parallel_check_rules(RULES, *query, "deny", "web-browsing")), ["catch-all"])
+        self.assertEqual(names(parallel_check_rules(RULES, "any", "any", "any", "any", "any", "any", "any", "any")),
+                         ["deny-guest", "web", "not-guest", "dmz", "catch-all"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import threading
+import time
+import unittest
+
+from Compare_final.fleet_poller import FleetPoller
+from Compare_final.snapshot_cache import SnapshotCache
+
+
+class Device:
+    """Fake firewall: every load returns the next config generation, optionally slowly or failing first."""
+
+    def __init__(self, delay=0, failures=0):
+        self.generation = 0
+        self.delay = delay
+        self.failures = failures
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def load(self, firewall):
+        self.started.set()
+        self.release.wait()
+        if self.delay:
+            time.sleep(self.delay)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("device unreachable")
+        self.generation += 1
+        return {"firewall": firewall, "generation": self.generation, "rules": []}
+
+    def version(self, firewall):
+        return None
+
+
+def poller(device, **kwargs):
+    cache = SnapshotCache(device.load, device.version)
+    options = dict(workers=2, timeout=1, retries=2, backoff=0)
+    options.update(kwargs)
+    return cache, FleetPoller(cache, lambda: ["fw1"], **options)
+
+
+class FleetPollerTests(unittest.TestCase):
+    def test_poll_publishes_a_new_snapshot(self):
+        device = Device()
+        cache, fleet = poller(device)
+        cache.get("fw1")
+        fleet.poll()
+        self.assertEqual(cache.get("fw1")["generation"], 2)
+        self.assertIsNone(fleet.status()["firewalls"]["fw1"]["error"])
+
+    def test_failures_are_retried(self):
+        device = Device(failures=2)
+        cache, fleet = poller(device)
+        fleet.poll()
+        self.assertEqual(cache.snapshots["fw1"]["rulebase"]["generation"], 1)
+
+    def test_late_refresh_is_not_published(self):
+        device = Device()
+        cache, fleet = poller(device, timeout=0.2, retries=0)
+        cache.get("fw1")
+        device.delay = 0.5
+        fleet.poll()
+        self.assertEqual(cache.snapshots["fw1"]["rulebase"]["generation"], 1)
+        self.assertIsNotNone(fleet.status()["firewalls"]["fw1"]["error"])
+        time.sleep(0.5)
+        # The abandoned refresh finished meanwhile but must not have been swapped in.
+        self.assertEqual(cache.snapshots["fw1"]["rulebase"]["generation"], 1)
+
+    def test_readers_get_the_old_snapshot_during_a_refresh(self):
+        device = Device()
+        cache, fleet = poller(device)
+        cache.get("fw1")
+        cache.passive = True
+        device.started.clear()
+        device.release.clear()
+        refresh = threading.Thread(target=fleet.poll)
+        refresh.start()
+        self.assertTrue(device.started.wait(1))
+        self.assertEqual(cache.get("fw1")["generation"], 1)
+        device.release.set()
+        refresh.join()
+        self.assertEqual(cache.get("fw1")["generation"], 2)
+
+    def test_stop_restores_the_cache_mode(self):
+        device = Device()
+        cache, fleet = poller(device, interval=60)
+        fleet.start()
+        self.assertTrue(cache.passive)
+        fleet.stop()
+        self.assertFalse(cache.passive)
+        cache.passive = True
+        fleet.start()
+        fleet.stop()
+        self.assertTrue(cache.passive)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+import queue
+import threading
+import unittest
+from unittest import mock
+
+from Compare_final import Firewall_Rule_Parse
+from Compare_final.fqdn_resolver import FqdnResolver, expand_fqdns, fqdn_names
+from Compare_final.query_cache import QueryCache
+from Compare_final.snapshot_cache import SnapshotCache
+from Compare_final.tests.configs import config, in_scratch_dir, rule
+
+
+class StubDns:
+    """Local resolver: answers from a table, raises for unknown names and counts the calls."""
+
+    def __init__(self, table=None):
+        self.table = dict(table or {})
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, fqdn):
+        with self.lock:
+            self.calls.append(fqdn)
+        if fqdn not in self.table:
+            raise OSError(f"{fqdn}: name not known")
+        return self.table[fqdn]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FqdnResolverTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        patcher = mock.patch("Compare_final.fqdn_resolver.time.monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_answers_are_cached_for_the_ttl(self):
+        dns = StubDns({"a.example.com": ["192.0.2.2", "192.0.2.1", "192.0.2.1"]})
+        resolver = FqdnResolver(resolve=dns, ttl=300)
+        self.assertEqual(resolver.resolve("a.example.com"), ["192.0.2.1", "192.0.2.2"])
+        self.clock.now += 299
+        resolver.resolve("a.example.com")
+        self.assertEqual(len(dns.calls), 1)
+        dns.table["a.example.com"] = ["192.0.2.9"]
+        self.clock.now += 2
+        self.assertEqual(resolver.resolve("a.example.com"), ["192.0.2.9"])
+        self.assertEqual(len(dns.calls), 2)
+
+    def test_failures_are_cached_for_the_negative_ttl(self):
+        dns = StubDns()
+        resolver = FqdnResolver(resolve=dns, ttl=300, negative_ttl=60)
+        self.assertEqual(resolver.resolve("dead.example.com"), [])
+        self.clock.now += 59
+        self.assertEqual(resolver.resolve("dead.example.com"), [])
+        self.assertEqual(len(dns.calls), 1)
+        self.clock.now += 2
+        resolver.resolve("dead.example.com")
+        self.assertEqual(len(dns.calls), 2)
+        self.assertEqual(resolver.stats()["failures"], 2)
+
+    def test_concurrent_lookups_of_a_name_share_one_call(self):
+        release = threading.Event()
+        dns = StubDns({"a.example.com": ["192.0.2.1"]})
+
+        def slow(fqdn):
+            release.wait(5)
+            return dns(fqdn)
+
+        resolver = FqdnResolver(resolve=slow, timeout=5)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(resolver.resolve_all(["a.example.com"])))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        while not resolver.inflight:
+            threading.Event().wait(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(dns.calls, ["a.example.com"])
+        self.assertEqual(results, [{"a.example.com": ["192.0.2.1"]}] * 4)
+
+    def test_slow_lookup_counts_as_failed_for_the_call(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def hang(fqdn):
+            release.wait(5)
+            return ["192.0.2.1"]
+
+        resolver = FqdnResolver(resolve=hang, timeout=0.1)
+        # Deadlines use the real clock here.
+        with mock.patch("Compare_final.fqdn_resolver.time.monotonic", __import__("time").monotonic):
+            self.assertEqual(resolver.resolve_all(["slow.example.com"]), {"slow.example.com": []})
+
+    def test_bulk_resolution_and_expansion(self):
+        resolver = FqdnResolver(resolve=StubDns({"a.example.com": ["192.0.2.1"]}))
+        addresses = {"a": {"fqdn": "a.example.com"}, "b": {"fqdn": "b.example.com"}, "c": {"ip-netmask": "10.0.0.1"}}
+        resolved = resolver.resolve_all(fqdn_names(addresses))
+        self.assertEqual(resolved, {"a.example.com": ["192.0.2.1"], "b.example.com": []})
+        self.assertEqual(expand_fqdns(["a.example.com", "b.example.com", "10.0.0.1"], resolved),
+                         ["192.0.2.1", "b.example.com", "10.0.0.1"])
+
+
+CONFIG = config([
+    rule("to-partner", destination=["partner"]),
+    rule("to-web", destination=["web"]),
+])
+
+
+class FqdnRefreshTests(unittest.TestCase):
+    def setUp(self):
+        in_scratch_dir(self)
+        self.clock = Clock()
+        self.dns = StubDns({"partner.example.com": ["198.51.100.7"]})
+        resolver = FqdnResolver(resolve=self.dns, ttl=300)
+        for target, name, value in ((Firewall_Rule_Parse, "fqdn_resolver", resolver),
+                                    (Firewall_Rule_Parse, "fetch_config", lambda firewall: CONFIG)):
+            patcher = mock.patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch("Compare_final.fqdn_resolver.time.monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = SnapshotCache(lambda firewall: Firewall_Rule_Parse.load_rulebase(firewall, CONFIG),
+                                   lambda firewall: "unchanged", updater=Firewall_Rule_Parse.update_rulebase,
+                                   stale=Firewall_Rule_Parse.fqdns_stale)
+
+    def destinations(self, rulebase):
+        return {rule["name"]: set(rule["destination"]) for rule in rulebase["rules"]}
+
+    def test_expired_fqdn_is_resolved_again_with_the_config_unchanged(self):
+        first = self.cache.refresh("fw", incremental=True)
+        self.assertEqual(self.destinations(first)["to-partner"], {"198.51.100.7"})
+        self.dns.table["partner.example.com"] = ["203.0.113.5"]
+        self.assertIs(self.cache.refresh("fw", incremental=True), first)
+        self.clock.now += 301
+        second = self.cache.refresh("fw", incremental=True)
+        self.assertEqual(self.destinations(second)["to-partner"], {"203.0.113.5"})
+        self.assertIs(second["rules"][1], first["rules"][1])
+        rules = second["rules"]
+        self.assertEqual([rules[i]["name"] for i in second["index"].candidates("any", "203.0.113.5")],
+                         ["to-partner"])
+
+    def test_cached_results_follow_the_dns_answer(self):
+        def lookup(destination):
+            return Firewall_Rule_Parse.main("fw", "10.9.0.1", destination, "trust", "untrust", "any", "any", "allow",
+                                            "any", queue.Queue())
+
+        for name, value in (("snapshot_cache", self.cache), ("query_cache", QueryCache())):
+            patcher = mock.patch.object(Firewall_Rule_Parse, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.cache.refresh("fw", incremental=True)
+        self.assertEqual([rule["name"] for rule in lookup("198.51.100.7")], ["to-partner"])
+        self.dns.table["partner.example.com"] = ["203.0.113.5"]
+        self.clock.now += 301
+        self.cache.refresh("fw", incremental=True)
+        self.assertEqual(lookup("198.51.100.7"), ["No rule Found"])
+        self.assertEqual([rule["name"] for rule in lookup("203.0.113.5")], ["to-partner"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+from unittest import mock
+
+from Compare_final import Firewall_Rule_Parse
+from Compare_final.fqdn_resolver import FqdnResolver
+from Compare_final.tests.configs import config, in_scratch_dir, rule
+
+FIRST = config([
+    rule("a", source=["10.0.0.0/8"], destination=["web"], service=["tcp-8080"]),
+    rule("b", destination=["servers"], application=["ssl"]),
+    rule("c", source=["192.168.1.1"], action="deny"),
+])
+SECOND = config([
+    rule("c", source=["192.168.1.1"], action="deny"),
+    rule("b", destination=["servers"], application=["ssl"]),
+    rule("d", source=["10.9.0.0/16"], destination=["db"]),
+])
+
+
+def names(rulebase, source_ip, dest_ip):
+    rules = rulebase["rules"]
+    return [rules[i]["name"] for i in rulebase["index"].candidates(source_ip, dest_ip, rulebase["positions"])]
+
+
+class UpdateRulebaseTests(unittest.TestCase):
+    def setUp(self):
+        in_scratch_dir(self)
+        resolver = FqdnResolver(resolve=lambda fqdn: ["198.51.100.7"])
+        patcher = mock.patch.object(Firewall_Rule_Parse, "fqdn_resolver", resolver)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_matches_a_full_load(self):
+        previous = Firewall_Rule_Parse.load_rulebase("fw", FIRST)
+        updated = Firewall_Rule_Parse.update_rulebase("fw", previous, SECOND)
+        full = Firewall_Rule_Parse.load_rulebase("fw", SECOND)
+        self.assertEqual([r.to_dict() for r in updated["rules"]], [r.to_dict() for r in full["rules"]])
+        for source_ip, dest_ip in (("10.9.0.1", "10.2.0.5"), ("192.168.1.1", "8.8.8.8"), ("any", "10.1.0.7")):
+            self.assertEqual(names(updated, source_ip, dest_ip), names(full, source_ip, dest_ip))
+
+    def test_previous_snapshot_is_left_untouched(self):
+        previous = Firewall_Rule_Parse.load_rulebase("fw", FIRST)
+        queries = (("10.0.0.5", "10.1.0.3"), ("10.9.0.1", "10.2.0.5"), ("any", "any"))
+        before = [names(previous, *q) for q in queries]
+        Firewall_Rule_Parse.update_rulebase("fw", previous, SECOND)
+        self.assertEqual([names(previous, *q) for q in queries], before)
+        self.assertIn("a", names(previous, "10.0.0.5", "10.1.0.3"))
+
+    def test_unchanged_config_returns_the_previous_snapshot(self):
+        previous = Firewall_Rule_Parse.load_rulebase("fw", FIRST)
+        self.assertIs(Firewall_Rule_Parse.update_rulebase("fw", previous, FIRST), previous)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import os
+import tempfile
+import unittest
+
+from Compare_final.object_closure import (ClosureStore, LazyClosure, address_closure, resolve_closures,
+                                          service_closure)
+
+
+class AddressClosureTests(unittest.TestCase):
+    def test_nested_groups(self):
+        memo, cycles = address_closure({
+            "web": {"ip-netmask": "10.1.0.0/24"},
+            "db": {"ip-range": "10.2.0.1-10.2.0.9"},
+            "partner": {"fqdn": "partner.example.com"},
+            "pair": {"ip-netmask": "10.3.0.1,10.3.0.2"},
+            "servers": {"static": ["web", "db"]},
+            "all": {"static": ["servers", "partner", "pair", "192.0.2.1"]},
+            "tagged": {"dynamic": ["'prod'"]},
+        })
+        self.assertEqual(memo["servers"], {"10.1.0.0/24", "10.2.0.1-10.2.0.9"})
+        self.assertEqual(memo["all"], {"10.1.0.0/24", "10.2.0.1-10.2.0.9", "partner.example.com", "10.3.0.1",
+                                       "10.3.0.2", "192.0.2.1"})
+        self.assertEqual(memo["tagged"], set())
+        self.assertEqual(cycles, [])
+        self.assertEqual(list(memo), ["web", "db", "partner", "pair", "servers", "all", "tagged"])
+
+    def test_cycles(self):
+        memo, cycles = address_closure({
+            "a": {"static": ["b", "10.0.0.1"]},
+            "b": {"static": ["a", "c"]},
+            "c": {"ip-netmask": "10.0.0.2"},
+            "self": {"static": ["self", "10.0.0.3"]},
+            "outer": {"static": ["a"]},
+        })
+        self.assertEqual(memo["a"], {"10.0.0.1", "10.0.0.2"})
+        self.assertEqual(memo["b"], memo["a"])
+        self.assertIsNot(memo["b"], memo["a"])
+        self.assertEqual(memo["self"], {"10.0.0.3"})
+        self.assertEqual(memo["outer"], {"10.0.0.1", "10.0.0.2"})
+        self.assertEqual(sorted(cycles), [["a", "b"], ["self"]])
+
+    def test_deep_nesting(self):
+        address_dict = {f"g{i}": {"static": [f"g{i + 1}"]} for i in range(5000)}
+        address_dict["g5000"] = {"ip-netmask": "10.0.0.1"}
+        memo, cycles = address_closure(address_dict)
+        self.assertEqual(memo["g0"], {"10.0.0.1"})
+        self.assertEqual(cycles, [])
+
+
+class ServiceClosureTests(unittest.TestCase):
+    def test_nested_groups(self):
+        memo1, cycles = service_closure({
+            "tcp-8080": {"protocol": "tcp", "port": "8080"},
+            "dns": {"protocol": "udp", "port": "53,5353"},
+            "web-ports": {"members": {"tcp-8080": [], "service-https": []}},
+            "all": {"members": {"web-ports": [], "dns": [], "tcp-8080": []}},
+        })
+        self.assertEqual(memo1["tcp-8080"], {"port": ["8080"], "protocol": ["tcp"], "service": []})
+        self.assertEqual(memo1["web-ports"], {"port": ["8080"], "protocol": ["tcp"],
+                                              "service": ["tcp-8080", "service-https"]})
+        # Reachable ports and protocols once each; only the direct members as services.
+        self.assertEqual(memo1["all"], {"port": ["8080", "53", "5353"], "protocol": ["tcp", "udp"],
+                                        "service": ["web-ports", "dns", "tcp-8080"]})
+        self.assertEqual(cycles, [])
+
+    def test_cycles(self):
+        memo1, cycles = service_closure({
+            "a": {"members": {"b": []}},
+            "b": {"members": {"a": [], "tcp-80": []}},
+            "tcp-80": {"protocol": "tcp", "port": "80"},
+        })
+        self.assertEqual(memo1["a"], {"port": ["80"], "protocol": ["tcp"], "service": ["b"]})
+        self.assertEqual(memo1["b"], {"port": ["80"], "protocol": ["tcp"], "service": ["a", "tcp-80"]})
+        self.assertEqual(cycles, [["a", "b"]])
+
+
+class ClosureStoreTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = ClosureStore(os.path.join(directory.name, "object_closure.db"))
+        self.addresses = {"web": {"ip-netmask": "10.1.0.0/24"}, "servers": {"static": ["web", "10.2.0.1"]}}
+        self.services = {"web-ports": {"members": {"tcp-8080": []}}, "tcp-8080": {"protocol": "tcp", "port": "8080"}}
+
+    def test_resolved_once_per_config_hash(self):
+        memo, memo1 = resolve_closures("fw", "v1", self.addresses, self.services, self.store)
+        self.assertIsInstance(memo, dict)
+        cached, cached1 = resolve_closures("fw", "v1", {}, {}, self.store)
+        self.assertIsInstance(cached, LazyClosure)
+        self.assertEqual(dict(cached), memo)
+        self.assertEqual(dict(cached1), memo1)
+
+    def test_new_version_replaces_the_old(self):
+        resolve_closures("fw", "v1", self.addresses, self.services, self.store)
+        resolve_closures("fw", "v2", {"web": {"ip-netmask": "10.9.0.0/24"}}, {}, self.store)
+        self.assertFalse(self.store.has("fw", "v1"))
+        self.assertIsNone(self.store.load("fw", "v1", "address"))
+        self.assertEqual(self.store.load("fw", "v2", "address"), {"web": {"10.9.0.0/24"}})
+
+    def test_version_replaced_before_the_lazy_load(self):
+        resolve_closures("fw", "v1", self.addresses, self.services, self.store)
+        memo, memo1 = resolve_closures("fw", "v1", self.addresses, self.services, self.store)
+        resolve_closures("fw", "v2", {"web": {"ip-netmask": "10.9.0.0/24"}}, {}, self.store)
+        self.assertEqual(memo["servers"], {"10.1.0.0/24", "10.2.0.1"})
+        self.assertEqual(memo1["web-ports"], {"port": ["8080"], "protocol": ["tcp"], "service": ["tcp-8080"]})
+
+    def test_unusable_store(self):
+        broken = ClosureStore(os.path.dirname(self.store.database))
+        with self.assertLogs("Compare_final.object_closure", "WARNING"):
+            memo, memo1 = resolve_closures("fw", "v1", self.addresses, self.services, broken)
+        self.assertEqual(memo["servers"], {"10.1.0.0/24", "10.2.0.1"})
+        self.assertEqual(memo1["web-ports"], {"port": ["8080"], "protocol": ["tcp"], "service": ["tcp-8080"]})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from Compare_final import Firewall_Rule_Parse, offline_configs
+from Compare_final.fqdn_resolver import FqdnResolver
+from Compare_final.snapshot_cache import SnapshotCache
+from Compare_final.tests.configs import config, in_scratch_dir, rule
+
+CONFIG = config([rule("allow-web", destination=["web"], service=["tcp-8080"])])
+
+
+class OfflineConfigTests(unittest.TestCase):
+    def setUp(self):
+        in_scratch_dir(self)
+        self.cache = SnapshotCache(mock.Mock(side_effect=AssertionError("no device access")),
+                                   mock.Mock(side_effect=AssertionError("no device access")))
+        patcher = mock.patch.object(offline_configs, "snapshot_cache", self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(Firewall_Rule_Parse, "fqdn_resolver", FqdnResolver(resolve=lambda fqdn: []))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_firewall_name_drops_the_address_suffix(self):
+        self.assertEqual(offline_configs.firewall_from_path("/x/pa-ngfw1_10.0.1.4.xml"), "pa-ngfw1")
+        self.assertEqual(offline_configs.firewall_from_path("edge_fw.xml"), "edge_fw")
+
+    def test_cli_capture_is_unwrapped(self):
+        text = "admin@fw> show config running\n" + CONFIG + "\nadmin@fw> exit"
+        self.assertTrue(offline_configs.config_text(text).startswith("<response"))
+        self.assertIsNone(offline_configs.config_text("no config here"))
+
+    def test_imported_firewalls_are_pinned_without_making_the_cache_passive(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "edge_192.0.2.1.xml"), "w") as f:
+                f.write(CONFIG)
+            with open(os.path.join(directory, "Interface_edge.xml"), "w") as f:
+                f.write("<response><result><ifnet/></result></response>")
+            result = offline_configs.load_path(directory)
+        self.assertEqual(result["loaded"], {"edge": 1})
+        self.assertEqual([os.path.basename(path) for path in result["skipped"]], ["Interface_edge.xml"])
+        self.assertTrue(self.cache.pinned("edge"))
+        self.assertFalse(self.cache.passive)
+        self.assertEqual(self.cache.get("edge")["rules"][0]["name"], "allow-web")
+
+
+if __name__ == "__main__":
+    unittest.main()
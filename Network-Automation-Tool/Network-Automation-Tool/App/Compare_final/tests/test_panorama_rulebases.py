@@ -0,0 +1,93 @@
+import unittest
+
+from Compare_final.config_loader import load_config_string
+from Compare_final.panorama_rulebases import PanoramaConfig, device_group_chain
+from Compare_final.tests.configs import config, rule
+
+BRANCH_FW = "0001"
+REGION_FW = "0002"
+
+
+def rules(side, *entries):
+    return f"<{side}-rulebase><security><rules>{''.join(entries)}</rules></security></{side}-rulebase>"
+
+
+def target(*serials, negate=False):
+    devices = "".join(f"<entry name='{serial}'/>" for serial in serials)
+    return f"<target><devices>{devices}</devices><negate>{'yes' if negate else 'no'}</negate></target>"
+
+
+PANORAMA = f"""<response status='success'><result><config>
+<shared>
+  <address>
+    <entry name='dns'><ip-netmask>192.0.2.53</ip-netmask></entry>
+    <entry name='web'><ip-netmask>10.0.0.0/24</ip-netmask></entry>
+  </address>
+  {rules("pre", rule("shared-pre"))}
+  {rules("post", rule("shared-post", action="deny"))}
+</shared>
+<devices><entry name='localhost.localdomain'><device-group>
+  <entry name='region'>
+    <address><entry name='web'><ip-netmask>10.1.0.0/24</ip-netmask></entry></address>
+    <devices><entry name='{REGION_FW}'/></devices>
+    {rules("pre", rule("region-pre"), rule("region-branch-only", extra=target(BRANCH_FW)))}
+    {rules("post", rule("region-post"), rule("not-on-branch", extra=target(BRANCH_FW, negate=True)))}
+  </entry>
+  <entry name='branch'>
+    <parent-dg>region</parent-dg>
+    <address><entry name='web'><ip-netmask>10.2.0.0/24</ip-netmask></entry></address>
+    <devices><entry name='{BRANCH_FW}'/></devices>
+    {rules("pre", rule("branch-pre"), rule("shared-pre", action="deny"))}
+    {rules("post", rule("branch-post"))}
+  </entry>
+</device-group></entry></devices>
+</config></result></response>"""
+
+LOCAL = load_config_string(config([rule("local-1"), rule("local-2")],
+                                  objects="<address><entry name='web'><ip-netmask>10.3.0.0/24</ip-netmask></entry></address>"))
+
+
+class EffectiveConfigTests(unittest.TestCase):
+    def setUp(self):
+        self.panorama = PanoramaConfig(PANORAMA)
+
+    def test_rule_order(self):
+        with self.assertLogs("Compare_final.panorama_rulebases", "WARNING"):
+            effective = self.panorama.effective_config(BRANCH_FW, LOCAL)
+        self.assertEqual(list(effective["rules"]), [
+            "shared-pre", "region-pre", "region-branch-only", "branch-pre", "local-1", "local-2",
+            "branch-post", "region-post", "shared-post",
+        ])
+        self.assertEqual([entry["index"] for entry in effective["rules"].values()], list(range(1, 10)))
+        # The first definition wins: the shared pre-rule, not the device group's deny.
+        self.assertEqual(effective["rules"]["shared-pre"]["action"], "allow")
+
+    def test_targets(self):
+        effective = self.panorama.effective_config(REGION_FW)
+        self.assertEqual(list(effective["rules"]), ["shared-pre", "region-pre", "region-post", "not-on-branch",
+                                                    "shared-post"])
+
+    def test_object_shadowing(self):
+        self.assertEqual(self.panorama.effective_config(REGION_FW)["addresses"]["web"]["ip-netmask"], "10.1.0.0/24")
+        with self.assertLogs("Compare_final.panorama_rulebases", "WARNING"):
+            self.assertEqual(self.panorama.effective_config(BRANCH_FW)["addresses"]["web"]["ip-netmask"], "10.2.0.0/24")
+            effective = self.panorama.effective_config(BRANCH_FW, LOCAL)
+        self.assertEqual(effective["addresses"]["web"]["ip-netmask"], "10.3.0.0/24")
+        self.assertEqual(effective["addresses"]["dns"]["ip-netmask"], "192.0.2.53")
+
+    def test_rules_read_like_load_config(self):
+        local = load_config_string(config([rule("shared-pre")]))
+        panorama = PanoramaConfig(PANORAMA).effective_config(REGION_FW)
+        self.assertEqual(panorama["rules"]["shared-pre"], local["rules"]["shared-pre"])
+
+    def test_unmanaged_firewall_gets_shared_only(self):
+        self.assertEqual(self.panorama.chain("9999"), ["shared"])
+        self.assertEqual(list(self.panorama.effective_config("9999")["rules"]), ["shared-pre", "shared-post"])
+
+    def test_parent_cycle_is_cut(self):
+        self.assertEqual(device_group_chain("a", {"a": "b", "b": "a"}), ["b", "a"])
+        self.assertEqual(self.panorama.chain(BRANCH_FW), ["shared", "region", "branch"])
+
+
+if __name__ == "__main__":
+    unittest.main()
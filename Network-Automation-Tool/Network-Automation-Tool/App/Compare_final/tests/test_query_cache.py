@@ -0,0 +1,95 @@
+import unittest
+from unittest import mock
+
+from Compare_final.query_cache import QueryCache, normalize_query
+
+
+def query(source_ip="10.0.0.1", dest_ip="10.0.1.1", src_zone="trust", dest_zone="untrust",
+          port="443", protocol="tcp", action="allow", application="any", mode="all"):
+    return normalize_query(source_ip, dest_ip, src_zone, dest_zone, port, protocol, action, application, mode)
+
+
+class NormalizeQueryTests(unittest.TestCase):
+    def test_equivalent_spellings_share_a_key(self):
+        self.assertEqual(query(port="443"), query(port=["443", "443"]))
+        self.assertEqual(query(src_zone="Trust"), query(src_zone="trust"))
+        self.assertEqual(query(source_ip="10.0.0.1"), query(source_ip="10.0.0.1/32"))
+
+    def test_missing_values_do_not_raise(self):
+        key = normalize_query(None, None, None, None, "any", None, None, None)
+        self.assertEqual(key, query("", "", "", "", "any", "", "", ""))
+
+    def test_empty_and_any_addresses_differ(self):
+        # The matcher treats "" as matching nothing and "any" as anything.
+        self.assertNotEqual(query(source_ip=""), query(source_ip="any"))
+        self.assertNotEqual(query(dest_ip=""), query(dest_ip="any"))
+
+    def test_mode_is_part_of_the_key(self):
+        self.assertNotEqual(query(mode="all"), query(mode="first"))
+
+
+class QueryCacheTests(unittest.TestCase):
+    def test_hit_after_put(self):
+        cache = QueryCache()
+        self.assertIsNone(cache.get("fw1", "v1", query()))
+        cache.put("fw1", "v1", query(), ["rule"])
+        self.assertEqual(cache.get("fw1", "v1", query()), ["rule"])
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_new_version_drops_the_firewalls_entries(self):
+        cache = QueryCache()
+        cache.put("fw1", "v1", query(), ["old"])
+        cache.put("fw2", "v1", query(), ["other"])
+        self.assertIsNone(cache.get("fw1", "v2", query()))
+        self.assertEqual(cache.get("fw2", "v1", query()), ["other"])
+        self.assertEqual(cache.stats()["invalidations"], 1)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = QueryCache(maxsize=2)
+        cache.put("fw1", "v1", query(port="1"), 1)
+        cache.put("fw1", "v1", query(port="2"), 2)
+        cache.get("fw1", "v1", query(port="1"))
+        cache.put("fw1", "v1", query(port="3"), 3)
+        self.assertEqual(cache.get("fw1", "v1", query(port="1")), 1)
+        self.assertIsNone(cache.get("fw1", "v1", query(port="2")))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_total_rows_are_bounded(self):
+        cache = QueryCache(max_rows=5)
+        cache.put("fw1", "v1", query(port="1"), ["a", "b"])
+        cache.put("fw1", "v1", query(port="2"), [])
+        cache.put("fw1", "v1", query(port="3"), ["c", "d"])
+        self.assertEqual(cache.stats()["rows"], 5)
+        cache.put("fw1", "v1", query(port="4"), ["e"])
+        self.assertIsNone(cache.get("fw1", "v1", query(port="1")))
+        self.assertEqual(cache.get("fw1", "v1", query(port="2")), [])
+        self.assertEqual(cache.stats()["rows"], 4)
+        # A result larger than the whole budget is not cached at all.
+        cache.put("fw1", "v1", query(port="5"), list("abcdef"))
+        self.assertIsNone(cache.get("fw1", "v1", query(port="5")))
+        self.assertEqual(cache.stats()["rows"], 4)
+
+    def test_replacing_and_dropping_entries_keeps_the_row_count(self):
+        cache = QueryCache()
+        cache.put("fw1", "v1", query(), ["a", "b", "c"])
+        cache.put("fw1", "v1", query(), ["a"])
+        cache.put("fw2", "v1", query(), ["b", "c"])
+        self.assertEqual(cache.stats()["rows"], 3)
+        cache.get("fw1", "v2", query())
+        self.assertEqual(cache.stats()["rows"], 2)
+        cache.clear("fw2")
+        self.assertEqual(cache.stats()["rows"], 0)
+
+    def test_entries_expire_after_the_ttl(self):
+        cache = QueryCache(ttl=10)
+        with mock.patch("Compare_final.query_cache.time.monotonic", return_value=100.0):
+            cache.put("fw1", "v1", query(), 1)
+        with mock.patch("Compare_final.query_cache.time.monotonic", return_value=105.0):
+            self.assertEqual(cache.get("fw1", "v1", query()), 1)
+        with mock.patch("Compare_final.query_cache.time.monotonic", return_value=111.0):
+            self.assertIsNone(cache.get("fw1", "v1", query()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+
+from Compare_final.rule_analysis import analyze
+
+ANY_SERVICE = (("any", "any", "any"),)
+
+
+def rule(name, action="allow", source=("any",), destination=("any",), from_zone=("any",), to_zone=("any",),
+         entries=ANY_SERVICE, **extra):
+    """A rule in rules_write shape; entries are (application, protocol, port) triples."""
+    return dict({
+        "name": name, "index": int(name[1:]), "action": action, "source": list(source),
+        "destination": list(destination), "from": list(from_zone), "to": list(to_zone),
+        "entries": [{"application": app, "protocol": protocol, "destination_port": port}
+                    for app, protocol, port in entries],
+    }, **extra)
+
+
+def findings(*rules):
+    return [(f["name"], f["kind"], f["by"]) for f in analyze(list(rules))]
+
+
+class CoverageTests(unittest.TestCase):
+    def test_shadowed_and_redundant(self):
+        self.assertEqual(findings(rule("r1", "deny", source=["10.0.0.0/8"]), rule("r2", source=["10.1.0.0/16"])),
+                         [("r2", "shadowed", "r1")])
+        self.assertEqual(findings(rule("r1", source=["10.0.0.0/8"]), rule("r2", source=["10.1.0.0/16"])),
+                         [("r2", "redundant", "r1")])
+        # The first covering rule decides.
+        self.assertEqual(findings(rule("r1", source=["10.0.0.0/8"]), rule("r2", "deny"), rule("r3", source=["10.0.0.1"])),
+                         [("r3", "redundant", "r1")])
+
+    def test_partial_overlap_is_not_coverage(self):
+        self.assertEqual(findings(rule("r1", "deny", source=["10.0.0.0/25"]), rule("r2", source=["10.0.0.0/24"])), [])
+        # Nor is a union of earlier rules.
+        self.assertEqual(findings(rule("r1", "deny", source=["10.0.0.0/25"]), rule("r2", "deny", source=["10.0.0.128/25"]),
+                                  rule("r3", source=["10.0.0.0/24"])), [])
+
+    def test_later_cover_stops_at_a_conflicting_rule(self):
+        self.assertEqual(findings(rule("r0", source=["10.0.0.3"]), rule("r1", source=["10.0.0.0/28"])),
+                         [("r0", "redundant", "r1")])
+        self.assertEqual(findings(rule("r0", source=["10.0.0.3"]), rule("r2", "deny", source=["10.0.0.0/30"]),
+                                  rule("r1", source=["10.0.0.0/28"])), [])
+        # A conflicting rule that does not touch r0 is no obstacle.
+        self.assertEqual(findings(rule("r0", source=["10.0.0.3"]), rule("r2", "deny", source=["10.0.0.8/30"]),
+                                  rule("r1", source=["10.0.0.0/28"])), [("r0", "redundant", "r1")])
+
+    def test_ipv6(self):
+        self.assertEqual(findings(rule("r1", "deny", destination=["::/0"]), rule("r2", destination=["2001:db8::/32"])),
+                         [("r2", "shadowed", "r1")])
+        self.assertEqual(findings(rule("r1", "deny", destination=["0.0.0.0/0"]), rule("r2", destination=["2001:db8::/32"])),
+                         [])
+        self.assertEqual(findings(rule("r1", "deny", destination=["0.0.0.0/0"]), rule("r2", destination=["::"])), [])
+
+    def test_negated_sides(self):
+        negated = rule("r1", "deny", source=["10.0.0.0/8"], **{"negate-source": "yes"})
+        self.assertEqual(findings(negated, rule("r2", source=["192.168.1.0/24"])), [("r2", "shadowed", "r1")])
+        self.assertEqual(findings(negated, rule("r2", source=["10.1.0.0/16"])), [])
+        self.assertEqual(findings(negated, rule("r2", source=["2001:db8::1"])), [("r2", "shadowed", "r1")])
+        # A negated any leaves nothing, so the rule takes no part.
+        self.assertEqual(findings(rule("r1", source=["0.0.0.0/0", "::/0"]),
+                                  rule("r2", **{"negate-source": "yes"})), [])
+
+    def test_zones(self):
+        self.assertEqual(findings(rule("r1", "deny", from_zone=["Trust", "dmz"]), rule("r2", from_zone=["trust"])),
+                         [("r2", "shadowed", "r1")])
+        self.assertEqual(findings(rule("r1", "deny", from_zone=["trust"]), rule("r2")), [])
+
+    def test_services(self):
+        tcp = (("ssl", "tcp", "443"),)
+        self.assertEqual(findings(rule("r1", "deny", entries=[("any", "tcp", "1-1024")]), rule("r2", entries=tcp)),
+                         [("r2", "shadowed", "r1")])
+        self.assertEqual(findings(rule("r1", "deny", entries=[("ssl", "udp", "443")]), rule("r2", entries=tcp)), [])
+        self.assertEqual(findings(rule("r1", "deny", entries=[("ssl", "any", "443")]), rule("r2", entries=tcp)),
+                         [("r2", "shadowed", "r1")])
+        self.assertEqual(findings(rule("r1", "deny", entries=[("dns", "any", "any")]), rule("r2", entries=tcp)), [])
+        self.assertEqual(findings(rule("r1", "deny", entries=tcp), rule("r2")), [])
+
+    def test_app_default_entries_take_no_part(self):
+        self.assertEqual(findings(rule("r1", "deny", entries=[("ssl", "tcp", "app-default")]), rule("r2", entries=[("ssl", "tcp", "443")])),
+                         [])
+
+    def test_non_product_services_never_cover(self):
+        # ssl on tcp/443 and dns on udp/53 do not let ssl through on udp/53.
+        split = rule("r1", "deny", entries=[("ssl", "tcp", "443"), ("dns", "udp", "53")])
+        self.assertEqual(findings(split, rule("r2", entries=[("ssl", "udp", "53")])), [])
+        self.assertEqual(findings(split, rule("r2", entries=[("ssl", "tcp", "443")])), [])
+        # It can still be covered itself.
+        self.assertEqual(findings(rule("r0", "deny"), split), [("r1", "redundant", "r0")])
+
+    def test_unresolved_members(self):
+        fqdn = rule("r2", source=["partner.example.com"])
+        # Nothing is known to be inside an unresolved member, so its rule is never reported as covered...
+        self.assertEqual(findings(rule("r1"), fqdn), [])
+        # ...but everything outside it may be, so a negated one can be.
+        self.assertEqual(findings(dict(fqdn, **{"negate-source": "yes"}), rule("r1")), [("r2", "redundant", "r1")])
+
+    def test_incomplete_rules_take_no_part(self):
+        incomplete = rule("r2")
+        del incomplete["from"]
+        self.assertEqual(findings(rule("r1"), incomplete), [])
+        self.assertEqual(findings(incomplete, rule("r1")), [])
+
+    def test_indexes(self):
+        self.assertEqual(analyze([rule("r4", source=["10.0.0.1"]), rule("r7")]),
+                         [{"name": "r4", "index": 4, "kind": "redundant", "by": "r7", "by_index": 7}])
+
+
+if __name__ == "__main__":
+    unittest.main()
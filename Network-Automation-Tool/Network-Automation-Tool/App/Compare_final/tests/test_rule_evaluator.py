@@ -0,0 +1,106 @@
+import unittest
+from collections import OrderedDict
+
+from Compare_final.rule_evaluator import (evaluate_rules, first_index, is_candidate, is_match, missing_fields,
+                                          rule_flags, select)
+
+
+def rule(name, index, action="allow", source=("any",), destination=("any",), from_zone=("trust",),
+         to_zone=("untrust",), entries=(("ssl", "tcp", "443"),), **extra):
+    """A rule in rules_write shape; entries are (application, protocol, port) triples."""
+    return dict({
+        "name": name, "index": index, "action": action, "source": list(source), "destination": list(destination),
+        "from": list(from_zone), "to": list(to_zone),
+        "entries": [{"application": app, "protocol": protocol, "destination_port": port}
+                    for app, protocol, port in entries],
+    }, **extra)
+
+
+def flags(rule, src="any", dest="any", src_zone="trust", dest_zone="untrust", port="443", protocol="tcp",
+          application="ssl"):
+    return rule_flags(rule, src, dest, src_zone, dest_zone, port, protocol, application)
+
+
+class RuleFlagsTests(unittest.TestCase):
+    def test_all_flags(self):
+        self.assertEqual(flags(rule("r", 1)), [True, True, "trust", "untrust", True, "tcp", "ssl"])
+
+    def test_source_subnet_overlaps_and_range_holds(self):
+        self.assertTrue(flags(rule("r", 1, source=["10.0.0.0/24"]), src="10.0.0.0/16")[0])
+        self.assertTrue(flags(rule("r", 1, source=["10.0.0.5-10.0.0.20"]), src="10.0.0.8/30")[0])
+        self.assertFalse(flags(rule("r", 1, source=["10.0.0.5-10.0.0.20"]), src="10.0.0.0/28")[0])
+
+    def test_destination_must_hold_the_query(self):
+        self.assertTrue(flags(rule("r", 1, destination=["10.0.0.0/24"]), dest="10.0.0.128/25")[1])
+        self.assertFalse(flags(rule("r", 1, destination=["10.0.0.0/24"]), dest="10.0.0.0/16")[1])
+        self.assertFalse(flags(rule("r", 1, destination=["2001:db8::/64"]), dest="2001:db8::/63")[1])
+
+    def test_negation(self):
+        negated = rule("r", 1, source=["10.0.0.0/24"], destination=["192.0.2.0/24"],
+                       **{"negate-source": "yes", "negate-destination": "yes"})
+        self.assertEqual(flags(negated, src="10.0.0.1", dest="192.0.2.1")[:2], [False, False])
+        self.assertEqual(flags(negated, src="10.0.1.1", dest="198.51.100.1")[:2], [True, True])
+        # An any query is never negated.
+        self.assertEqual(flags(negated)[:2], [True, True])
+
+    def test_port_must_fit_the_rule_range(self):
+        ranged = rule("r", 1, entries=[("ssl", "tcp", "8000-8100")])
+        self.assertTrue(flags(ranged, port="8000-8100")[4])
+        self.assertFalse(flags(ranged, port="8050-8200")[4])
+        self.assertTrue(flags(ranged, port="any")[4])
+
+    def test_fields_are_checked_one_at_a_time(self):
+        self.assertEqual(flags(rule("r", 1), port="53", protocol="udp", application="ssl")[4:],
+                         [False, False, "ssl"])
+        self.assertEqual(flags(rule("r", 1, entries=[("any", "any", "any")]), port="53", application="dns")[4:],
+                         [True, "any", "any"])
+
+    def test_zones(self):
+        self.assertEqual(flags(rule("r", 1, from_zone=["Trust"]), src_zone="TRUST")[2], "Trust")
+        self.assertFalse(flags(rule("r", 1), dest_zone="dmz")[3])
+        self.assertEqual(flags(rule("r", 1), dest_zone="any")[3], "untrust")
+
+    def test_incomplete_rule(self):
+        incomplete = rule("r", 1)
+        del incomplete["to"]
+        self.assertIsNone(flags(incomplete))
+
+
+class VerdictTests(unittest.TestCase):
+    def setUp(self):
+        self.rules = [
+            rule("ssl", 1),
+            # Port, protocol and application each exist but never in one entry.
+            rule("split", 2, entries=[("ssl", "udp", "53"), ("dns", "tcp", "443")]),
+            rule("wrong-zone", 3, to_zone=["dmz"]),
+            rule("negated", 4, source=["192.0.2.0/24"], to_zone=["dmz"], **{"negate-source": "yes"}),
+            rule("deny", 5, action="deny", entries=[("ssl", "tcp", "444")]),
+            rule("ssl-again", 6),
+        ]
+        self.results = evaluate_rules(self.rules, "10.0.0.1", "any", "trust", "untrust", "443", "tcp", "ssl")
+
+    def test_matches(self):
+        self.assertEqual([r["name"] for r in select(self.results, is_match, "any")], ["ssl", "ssl-again"])
+        self.assertEqual(select(self.results, is_match, "deny"), [])
+        self.assertIsInstance(select(self.results, is_match, "allow")[0], OrderedDict)
+        self.assertEqual(first_index(self.results, is_match, "allow"), 1)
+        self.assertEqual(first_index(self.results, is_match, "deny"), float("inf"))
+
+    def test_candidates(self):
+        # The split rule has every flag but no single entry: neither a match nor one field off.
+        self.assertEqual([r["name"] for r in select(self.results, is_candidate, "allow")], ["wrong-zone"])
+        self.assertEqual([r["name"] for r in select(self.results, is_candidate, "deny")], ["deny"])
+        self.assertEqual(missing_fields(self.results[2]), ["Destination Zone"])
+        self.assertEqual(missing_fields(self.results[4]), ["Port"])
+        self.assertEqual(first_index(self.results, is_candidate, "any"), 3)
+
+    def test_split_rule(self):
+        split = self.results[1]
+        self.assertTrue(all(split["flags"]))
+        self.assertFalse(split["service"])
+        self.assertFalse(is_match(split, "any"))
+        self.assertFalse(is_candidate(split, "any"))
+
+
+if __name__ == "__main__":
+    unittest.main()
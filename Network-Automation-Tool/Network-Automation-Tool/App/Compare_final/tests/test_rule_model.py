@@ -0,0 +1,83 @@
+import copy
+import unittest
+
+from Compare_final.rule_model import AddressObject, Rule, ServiceObject, compact_rulebase
+
+# rules_write output for one rule: display copies under "dis" keys, resolved
+# addresses and service entries, and keys rules_write adds without a copy.
+RULE = {
+    "from": ["trust"], "fromdis": ["trust"], "to": ["untrust"], "todis": ["untrust"],
+    "source": ["10.1.0.0/24", "10.9.0.0/16"], "sourcedis": ["servers", "10.9.0.0/16"],
+    "destination": ["198.51.100.7"], "destinationdis": ["partner"],
+    "application": ["ssl", "web-browsing"], "applicationdis": ["ssl", "web-browsing"],
+    "service": ["web-ports"], "servicedis": ["web-ports"],
+    "action": "allow", "actiondis": "allow",
+    "negate-source": "yes", "negate-sourcedis": "yes",
+    "description": ["web"], "descriptiondis": ["web"],
+    "index": 1, "indexdis": 1,
+    "entries": [{"application": "ssl", "protocol": "tcp", "destination_port": "443"},
+                {"application": "web-browsing", "protocol": "tcp", "destination_port": "8080"}],
+    "port": ["443", "8080"], "protocol": ["tcp"],
+    "name": "web",
+}
+
+
+class RuleTests(unittest.TestCase):
+    def test_round_trip(self):
+        record = Rule.from_dict(copy.deepcopy(RULE))
+        self.assertEqual(record.to_dict(), RULE)
+        self.assertEqual(dict(record), {key: record[key] for key in RULE})
+        self.assertEqual(len(record), len(RULE))
+
+    def test_tuples_and_display_copies(self):
+        record = Rule.from_dict(RULE)
+        self.assertEqual(record["source"], ("10.1.0.0/24", "10.9.0.0/16"))
+        self.assertEqual(record["sourcedis"], ("servers", "10.9.0.0/16"))
+        self.assertEqual(record["actiondis"], "allow")
+        self.assertEqual(record["negate-source"], "yes")
+        self.assertEqual(record["entries"], RULE["entries"])
+
+    def test_missing_keys(self):
+        record = Rule.from_dict({"name": "r", "index": 3, "indexdis": 3, "action": "deny", "actiondis": "deny"})
+        for key in ("source", "sourcedis", "negate-source", "port"):
+            with self.subTest(key=key):
+                self.assertNotIn(key, record)
+                with self.assertRaises(KeyError):
+                    record[key]
+        self.assertEqual(record["entries"], [])
+        self.assertEqual(record.to_dict(), {"action": "deny", "actiondis": "deny", "index": 3, "indexdis": 3,
+                                            "name": "r", "entries": []})
+
+    def test_moved(self):
+        record = Rule.from_dict(RULE)
+        moved = record.moved(7)
+        self.assertEqual((moved["index"], moved["indexdis"]), (7, 7))
+        self.assertEqual((record["index"], record["indexdis"]), (1, 1))
+        self.assertIs(moved["source"], record["source"])
+        self.assertEqual(dict(moved, index=1, indexdis=1), dict(record))
+
+    def test_equal_values_are_shared(self):
+        other = dict(copy.deepcopy(RULE), name="web-2", index=2, indexdis=2)
+        first, second = compact_rulebase([copy.deepcopy(RULE), other], {}, {})[0]
+        self.assertIs(first["from"], second["from"])
+        self.assertIs(first["from"], first["fromdis"])
+        self.assertIs(first.keys_, second.keys_)
+        self.assertIs(first["action"], second["action"])
+        self.assertIs(first.entries, second.entries)
+
+
+class ObjectTests(unittest.TestCase):
+    def test_memos(self):
+        memo = {"servers": {"10.1.0.0/24"}, "partner": {"198.51.100.7"}}
+        memo1 = {"web-ports": {"port": ["8080", "443"], "protocol": ["tcp"], "service": ["tcp-8080", "service-https"]},
+                 "empty": {"port": [], "protocol": [], "service": []}}
+        rules, addresses, services = compact_rulebase([], memo, memo1)
+        self.assertEqual(rules, [])
+        self.assertEqual({name: set(a.to_list()) for name, a in addresses.items()}, memo)
+        self.assertEqual({name: s.to_dict() for name, s in services.items()}, memo1)
+        self.assertEqual(ServiceObject.from_dict("x", {}).to_dict(), {"port": [], "protocol": [], "service": []})
+        self.assertEqual(AddressObject("x", []).to_list(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+from unittest import mock
+
+from Compare_final.snapshot_cache import SnapshotCache
+
+
+class Device:
+    def __init__(self):
+        self.config_version = 1
+        self.loads = 0
+        self.updates = 0
+        self.version_calls = 0
+
+    def load(self, firewall):
+        self.loads += 1
+        return {"firewall": firewall, "version": self.config_version, "rules": []}
+
+    def update(self, firewall, previous):
+        self.updates += 1
+        return dict(previous, version=self.config_version)
+
+    def version(self, firewall):
+        self.version_calls += 1
+        return self.config_version
+
+
+def at(seconds):
+    return mock.patch("Compare_final.snapshot_cache.time.monotonic", return_value=float(seconds))
+
+
+class SnapshotCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.device = Device()
+        self.cache = SnapshotCache(self.device.load, self.device.version, ttl=60, updater=self.device.update)
+
+    def test_fresh_snapshot_is_served_without_a_version_call(self):
+        with at(0):
+            first = self.cache.get("fw1")
+        with at(30):
+            self.assertIs(self.cache.get("fw1"), first)
+        self.assertEqual(self.device.version_calls, 1)
+
+    def test_old_snapshot_is_kept_while_the_version_is_unchanged(self):
+        with at(0):
+            first = self.cache.get("fw1")
+        with at(100):
+            self.assertIs(self.cache.get("fw1"), first)
+        self.assertEqual((self.device.loads, self.device.updates), (1, 0))
+
+    def test_version_change_updates_incrementally(self):
+        with at(0):
+            self.cache.get("fw1")
+        self.device.config_version = 2
+        with at(100):
+            self.assertEqual(self.cache.get("fw1")["version"], 2)
+        self.assertEqual((self.device.loads, self.device.updates), (1, 1))
+
+    def test_failed_update_falls_back_to_a_full_load(self):
+        with at(0):
+            self.cache.get("fw1")
+        self.device.config_version = 2
+        self.device.update = mock.Mock(side_effect=ValueError("bad diff"))
+        self.cache.updater = self.device.update
+        with at(100):
+            self.assertEqual(self.cache.get("fw1")["version"], 2)
+        self.assertEqual(self.device.loads, 2)
+
+    def test_passive_cache_skips_version_checks(self):
+        with at(0):
+            first = self.cache.get("fw1")
+        self.cache.passive = True
+        self.device.config_version = 2
+        with at(1000):
+            self.assertIs(self.cache.get("fw1"), first)
+        self.assertEqual(self.device.version_calls, 1)
+
+    def test_pinned_snapshot_skips_version_checks_for_that_firewall_only(self):
+        imported = {"firewall": "offline", "rules": []}
+        with at(0):
+            self.cache.publish("offline", imported, "hash", pinned=True)
+            self.cache.get("fw1")
+        self.assertFalse(self.cache.passive)
+        self.device.config_version = 2
+        with at(1000):
+            self.assertIs(self.cache.get("offline"), imported)
+            self.assertEqual(self.cache.get("fw1")["version"], 2)
+        self.assertTrue(self.cache.pinned("offline"))
+        self.assertFalse(self.cache.pinned("fw1"))
+
+    def test_late_refresh_raises_and_keeps_the_snapshot(self):
+        with at(0):
+            first = self.cache.get("fw1")
+        with at(10), self.assertRaises(TimeoutError):
+            self.cache.refresh("fw1", deadline=5)
+        self.assertIs(self.cache.snapshots["fw1"]["rulebase"], first)
+
+
+if __name__ == "__main__":
+    unittest.main()
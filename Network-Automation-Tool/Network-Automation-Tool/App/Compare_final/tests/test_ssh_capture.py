@@ -0,0 +1,71 @@
+import threading
+import unittest
+from unittest import mock
+
+from Compare_final import ssh_capture
+from Compare_final.ssh_capture import CapturedSession, xml_response
+
+
+class FakeConnection:
+    """Stands in for a netmiko connection: answers every command with an XML response."""
+
+    def __init__(self, host, **kwargs):
+        self.host = host
+        self.kwargs = kwargs
+        self.disconnected = False
+
+    def find_prompt(self):
+        return f"admin@{self.host}>"
+
+    def send_command(self, command, **kwargs):
+        return f"{command}\n<response status='success'><result>{self.host} {command}</result></response>\n"
+
+    def disconnect(self):
+        self.disconnected = True
+
+
+class CapturedSessionTests(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(ssh_capture, "ConnectHandler", FakeConnection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_run_returns_that_command_only(self):
+        with CapturedSession({"host": "fw1"}) as session:
+            session.run("set cli pager off")
+            output = session.run("show system info")
+        self.assertEqual(xml_response(output), "<response status='success'><result>fw1 show system info</result></response>")
+        self.assertNotIn("pager", output)
+        self.assertNotIn("session_log", session.conn.kwargs)
+        self.assertTrue(session.conn.disconnected)
+
+    def test_parallel_sessions_stay_apart(self):
+        outputs = {}
+
+        def poll(host):
+            with CapturedSession({"host": host}) as session:
+                outputs[host] = [xml_response(session.run(f"show {i}")) for i in range(50)]
+
+        hosts = [f"fw{i}" for i in range(8)]
+        threads = [threading.Thread(target=poll, args=(host,)) for host in hosts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for host in hosts:
+            self.assertEqual(outputs[host], [f"<response status='success'><result>{host} show {i}</result></response>"
+                                             for i in range(50)])
+
+
+class XmlResponseTests(unittest.TestCase):
+    def test_strips_echo_and_prompt(self):
+        output = "show config\n<response status='success'><result><config/></result></response>\nadmin@fw> "
+        self.assertEqual(xml_response(output), "<response status='success'><result><config/></result></response>")
+
+    def test_missing_response(self):
+        with self.assertRaises(ValueError):
+            xml_response("Invalid syntax.")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,33 @@
+import os
+import sys
+
 from django.apps import AppConfig
+from django.conf import settings
+
+
+def _serving():
+    """Whether this process answers requests, as opposed to running a manage.py
+    command or being the autoreloader's parent process."""
+    if os.path.basename(sys.argv[0]) != "manage.py":
+        return True
+    if len(sys.argv) < 2 or sys.argv[1] != "runserver":
+        return False
+    return os.environ.get("RUN_MAIN") == "true" or "--noreload" in sys.argv
 
 
 class MyappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'myapp'
+
+    def ready(self):
+        if not _serving():
+            return
+        from Compare_final import offline_configs
+        from Compare_final.Firewall_Rule_Parse import fleet_poller
+
+        if settings.OFFLINE_CONFIG_DIR:
+            offline_configs.load_path(settings.OFFLINE_CONFIG_DIR)
+        if settings.FLEET_POLL_INTERVAL:
+            fleet_poller.workers = settings.FLEET_POLL_WORKERS
+            fleet_poller.timeout = settings.FLEET_POLL_TIMEOUT
+            fleet_poller.start(settings.FLEET_POLL_INTERVAL)
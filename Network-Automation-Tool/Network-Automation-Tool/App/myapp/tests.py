@@ -1,3 +1,97 @@
-from django.test import TestCase
+import json
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.test import RequestFactory, SimpleTestCase
+
+from Compare_final.compiled_rules import compile_rules
+from Compare_final.snapshot_cache import SnapshotCache
+from myapp import views
+
+
+def rule(name, action="allow", destination=("any",), entries=(("any", "any", "any"),)):
+    return {"name": name, "action": action, "source": ["any"], "destination": list(destination),
+            "from": ["trust"], "to": ["untrust"],
+            "entries": [{"application": app, "protocol": protocol, "destination_port": port}
+                        for app, protocol, port in entries]}
+
+
+RULES = [
+    rule("web", destination=["192.0.2.0/24"], entries=[("ssl", "tcp", "443"), ("web-browsing", "tcp", "80")]),
+    rule("block-dns", action="deny", entries=[("dns", "udp", "53")]),
+    rule("default-deny", action="deny"),
+]
+
+
+class FirewallBulkTests(SimpleTestCase):
+    def setUp(self):
+        rulebase = {"rules": RULES, "compiled": compile_rules(RULES)}
+        catalog = {"ssl": SimpleNamespace(ports=["443"])}
+        self.flow_path = mock.Mock(return_value={"fw1": {"src": "trust", "dest": "untrust"}})
+        for name, value in (("_flow_path", self.flow_path),
+                            ("snapshot_cache", SimpleNamespace(get=lambda name: rulebase)),
+                            ("app_catalog", SimpleNamespace(get=lambda: catalog))):
+            patcher = mock.patch.object(views, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def check(self, flows):
+        request = RequestFactory().post("/firewall_bulk/", json.dumps(flows), content_type="application/json")
+        response = views.firewall_bulk(request)
+        return [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+
+    def test_verdicts(self):
+        lines = self.check([
+            {"sourceIP": "10.0.0.1", "destinationIP": "192.0.2.10", "destinationPort": "443", "protocol": "tcp",
+             "application": "ssl"},
+            {"sourceIP": "10.0.0.1", "destinationIP": "198.51.100.1", "destinationPort": "53", "protocol": "udp",
+             "application": "dns", "Action": "deny"},
+            {"sourceIP": "10.0.0.1", "destinationIP": "192.0.2.10", "application": "ssl", "Action": "any"},
+        ])
+        self.assertEqual([line["flow"] for line in lines], [0, 1, 2])
+        self.assertEqual([line["results"] for line in lines], [
+            [{"firewall": "fw1", "matches": ["web"], "first": "web", "verdict": "allow"}],
+            [{"firewall": "fw1", "matches": ["block-dns", "default-deny"], "first": "block-dns", "verdict": "deny"}],
+            [{"firewall": "fw1", "matches": ["web", "default-deny"], "first": "web", "verdict": "allow"}],
+        ])
+        self.assertEqual(self.flow_path.call_count, 2)
+
+    def test_blocks(self):
+        flows = [{"sourceIP": "10.0.0.1", "destinationIP": "192.0.2.10", "destinationPort": str(port),
+                  "protocol": "tcp"} for port in (443, 22, 80)]
+        with mock.patch.object(views, "BULK_BLOCK", 2):
+            lines = self.check(flows)
+        self.assertEqual([line["results"][0]["first"] for line in lines], ["web", "default-deny", "web"])
+
+    def test_numeric_ports(self):
+        flows = [{"sourceIP": "10.0.0.1", "destinationIP": "192.0.2.10", "destinationPort": port, "protocol": "tcp"}
+                 for port in (443, [22, 80], "22,443")]
+        lines = self.check(flows)
+        self.assertEqual([line.get("error") for line in lines], [None] * 3)
+        self.assertEqual([line["results"][0]["first"] for line in lines], ["web", "web", "web"])
+
+    def test_bad_flows(self):
+        with self.assertLogs("myapp.views", "ERROR"):
+            lines = self.check(["not a flow", {"sourceIP": "10.0.0.1", "sourceZone": "dmz"}])
+        self.assertEqual(lines[0]["error"], "A flow must be an object")
+        self.assertEqual(lines[1]["results"], [{"firewall": "fw1", "error": "Given zones don't match the firewall path"}])
+
+
+class FirewallRefreshTests(SimpleTestCase):
+    def setUp(self):
+        self.loads = []
+        self.cache = SnapshotCache(lambda name: self.loads.append(name) or {"rules": []}, lambda name: "v1")
+        patcher = mock.patch.object(views, "snapshot_cache", self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache.publish("fw1", {"rules": []}, "v1")
+        self.cache.publish("imported", {"rules": []}, "v1", pinned=True)
+
+    def test_refresh_all_skips_pinned_firewalls(self):
+        response = views.firewall_refresh(RequestFactory().post("/firewall_refresh/"))
+        self.assertEqual(json.loads(response.content)["errors"], {})
+        self.assertEqual(self.loads, ["fw1"])
+
+    def test_named_firewall_is_refreshed(self):
+        views.firewall_refresh(RequestFactory().post("/firewall_refresh/", {"firewallName": "imported"}))
+        self.assertEqual(self.loads, ["imported"])
@@ -1,7 +1,7 @@
 from django.urls import path
 from .views import (
-    home, home_check, firewall, firewall_update, fw_firewall, zones,
-    resolve_fqdn_to_ip, fetch_all_apps, Add, Firewall_names, App,
+    home, home_check, firewall, firewall_bulk, firewall_analysis, query_cache_stats, firewall_refresh, firewall_import, panorama_import, fleet_poll, firewall_update, fw_firewall, zones,
+    resolve_fqdn_to_ip, fetch_all_apps, apps_by_port, Add, Firewall_names, App,
     check_object, create_object, check_object_name, check_service, create_service,
     search_address_group, list_address_objects, create_address_group, check_address_group_name,
     list_address_groups, list_service_groups, search_service_group, list_service_objects,
@@ -15,10 +15,18 @@ urlpatterns = [
     path('home/', home, name='home'),
     path('home_check/', home_check, name='home_check'),
     path('firewall/', firewall, name='firewall'),
+    path('firewall_bulk/', firewall_bulk, name='firewall_bulk'),
+    path('firewall_analysis/', firewall_analysis, name='firewall_analysis'),
+    path('query_cache/', query_cache_stats, name='query_cache'),
+    path('firewall_refresh/', firewall_refresh, name='firewall_refresh'),
+    path('firewall_import/', firewall_import, name='firewall_import'),
+    path('panorama_import/', panorama_import, name='panorama_import'),
+    path('fleet_poll/', fleet_poll, name='fleet_poll'),
     path("firewall_fetch/", firewall_update, name="firewall_fetch"),
     path("firewall_search/", fw_firewall, name="firewall_search"),
     path("zones/", zones, name="zones"),
     path("apps/", fetch_all_apps, name="fetch_all_apps"),
+    path("apps/by_port/", apps_by_port, name="apps_by_port"),
     path("fqdn/", resolve_fqdn_to_ip, name="fqdn"),
     path("Add/", Add, name="add"),
     path("Firewall_name/", Firewall_names, name="Firewall_name"),
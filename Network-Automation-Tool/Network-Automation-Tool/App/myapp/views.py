@@ -1,14 +1,14 @@
-from django.http import HttpResponse, JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
+from django.conf import settings
 from Compare_final.main import files
 from Compare_final.pre import main
 from Compare_final.update_db import update_db
 from Compare_final.Addition import Addition
-from Compare_final.Modified import main as Modified
 import threading
 import time
 import zipfile
-from io import BytesIO
+from io import BytesIO, StringIO
 import os
 import sqlite3
 import json
@@ -17,12 +17,20 @@ import json
 from Compare_final.Firewall_Fetch import main as Firewall_Fetch
 from Compare_final.database_creation_interface import main as interface_creation
 from Compare_final.database_creation_xml import main as xml_creation
-from Compare_final.Firewall_Rule_Parse import main as detect_rule
-from Compare_final.Negate_Rules import main as negate
+from Compare_final.Firewall_Rule_Parse import main as detect_rule, snapshot_cache, fleet_poller
+from Compare_final.batch_matcher import BatchMatcher
+from Compare_final.query_cache import query_cache
+from Compare_final import offline_configs
+from Compare_final.fqdn_resolver import fqdn_resolver
+from Compare_final.app_catalog import app_catalog
+from Compare_final.app_port_index import port_index as app_port_index
+from Compare_final.rule_analysis import analyze as analyze_rules
+from Compare_final.rule_evaluator import evaluate_rules, is_match, is_candidate, first_index, missing_fields
 from Compare_final.Firewall_input_Tested import search_firewalls as input_search_firewalls
 import socket
 import ipaddress 
 import queue
+import csv
 import pandas as pd
 import json
 from Compare_final.objectcheckerpanorama import PanoramaObjectChecker
@@ -932,31 +940,19 @@ def firewall(request):
         dest_zone=request.POST.get("destinationZone")
         port=request.POST.get("destinationPort")
         firewall_names=str(request.POST.get("firewallName"))
-        app_defaults = pd.read_csv( r"Compare_final\applipedia_data_cleaned.csv"
-        )
+        catalog = app_catalog.get()
         print(src_zone,dest_zone)
-    # Convert the app_defaults to a dictionary for faster access
-        app_defaults_dict = app_defaults.set_index('Name').T.to_dict('list')
         print("firewall",str(firewall_names))
         if "," in port:
             port=port.split(",")
         application=request.POST.get("application") 
         action=request.POST.get("Action")
+        mode=request.POST.get("mode") or "all"
         if action is None:
             action="allow"
         if application is None:
             application="any"
-        if (port is None or port=="" or port=="any") and application!="any":
-            port=app_defaults_dict[application][-1]
-            r=[]
-            port=port[port.index("[")+1:port.index("]")]
-            for p in port.split(","):
-                p=p[1:]
-                p=p[:len(p)-1]
-                r.append(p)
-            port=r
-        if application=="any" and port=="":
-            port="any"
+        port=_application_port(port, application, catalog)
         print(port)
         data=set()
         fire={}
@@ -997,7 +993,7 @@ def firewall(request):
             if item in fire:
                 print((fire[item]["src"]==src_zone,src_zone=="any"),fire[item]["src"],src_zone)
                 if (fire[item]["src"]==src_zone or src_zone=="any") and (fire[item]["dest"]==dest_zone or dest_zone=="any"):
-                    thread = threading.Thread(target=detect_rule, args=(item,source_ip, dest_ip, fire[item]["src"] or src_zone, fire[item]["dest"] or dest_zone, port, protocol,action,application,q))
+                    thread = threading.Thread(target=detect_rule, args=(item,source_ip, dest_ip, fire[item]["src"] or src_zone, fire[item]["dest"] or dest_zone, port, protocol,action,application,q,mode))
                     threads.append(thread)
                     thread.start()
                 else:
@@ -1010,7 +1006,7 @@ def firewall(request):
                         if fire[item]["dest"]!=dest_zone and dest_zone!="any" and dest_ip!="any":
                             other_cases[item]+=(" "*20+" Given "+dest_ip+" Doesn't belong to "+dest_zone)
             else:
-                    thread = threading.Thread(target=detect_rule, args=(item,source_ip, dest_ip, fire[item]["src"], fire[item]["dest"], port, protocol,action,application,q))
+                    thread = threading.Thread(target=detect_rule, args=(item,source_ip, dest_ip, fire[item]["src"], fire[item]["dest"], port, protocol,action,application,q,mode))
                     threads.append(thread)
                     thread.start()
         print(other_cases)
@@ -1057,6 +1053,280 @@ def firewall(request):
         for o in other_cases:
             final_res.append([o,other_cases[o]])
         return JsonResponse({"data":final_res or ["No firewalls Found"],"memo":memo,"all_rules":all_rules})
+
+
+def _application_port(port, application, catalog):
+    """Destination port of a check: the application's default ports when none was given."""
+    if (port is None or port == "" or port == "any") and application != "any":
+        return list(catalog[application].ports)
+    if application == "any" and port == "":
+        return "any"
+    return port
+
+
+def _bulk_flows(request):
+    """Flows of a bulk request: a JSON list (or {"flows": [...]}) or a CSV upload/body."""
+    upload = request.FILES.get("file")
+    if upload is not None:
+        text = upload.read().decode("utf-8-sig")
+    else:
+        text = request.body.decode("utf-8-sig")
+    if upload is None and text.lstrip()[:1] in ("[", "{"):
+        data = json.loads(text)
+        if isinstance(data, dict):
+            data = data.get("flows", [])
+        return data
+    return list(csv.DictReader(StringIO(text)))
+
+
+def _flow_path(source_ip, dest_ip, firewall_names):
+    """Firewalls on the path of a flow with the zones the flow enters and leaves them by."""
+    fire = {}
+    if firewall_names:
+        for name in firewall_names.split(","):
+            output = input_search_firewalls(source_ip, dest_ip, name)
+            fire[name] = {"src": output[0], "dest": output[1] if len(output) > 1 else None}
+        return fire
+    data = search_firewalls(source_ip, dest_ip)
+    if len(data) <= 3:
+        return fire
+    if data[0] != "Not Found":
+        for i in data[0]:
+            fire[i] = {"src": data[1], "dest": data[2]}
+    if data[3] != "Not Found":
+        for i in data[3]:
+            fire[i] = {"src": data[4], "dest": data[5]}
+    return fire
+
+
+# Flows matched together per firewall before their lines are streamed
+BULK_BLOCK = 1024
+
+
+@csrf_exempt
+def firewall_bulk(request):
+    """Checks a list of flows and streams one NDJSON verdict line per flow.
+
+    Firewall paths are resolved once per source/destination pair. Flows are
+    taken in blocks, and each firewall checks the block's flows in one
+    BatchMatcher pass over its rulebase snapshot, built once per request.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+    try:
+        flows = _bulk_flows(request)
+    except (ValueError, csv.Error) as e:
+        return JsonResponse({"error": f"Invalid flow list: {e}"}, status=400)
+
+    def stream():
+        paths = {}
+        matchers = {}
+        catalog = app_catalog.get()
+        for block in range(0, len(flows), BULK_BLOCK):
+            lines = []
+            checks = {}
+            for n, flow in enumerate(flows[block:block + BULK_BLOCK], block):
+                line = {"flow": n, "input": flow, "results": []}
+                lines.append(line)
+                try:
+                    if not isinstance(flow, dict):
+                        raise ValueError("A flow must be an object")
+                    source_ip = flow.get("sourceIP") or "any"
+                    dest_ip = flow.get("destinationIP") or "any"
+                    src_zone = flow.get("sourceZone") or "any"
+                    dest_zone = flow.get("destinationZone") or "any"
+                    protocol = flow.get("protocol") or "any"
+                    application = flow.get("application") or "any"
+                    action = flow.get("Action") or "allow"
+                    # JSON flows may give ports as numbers or a list of them
+                    port = flow.get("destinationPort") or ""
+                    if isinstance(port, list):
+                        port = [str(item) for item in port]
+                    else:
+                        port = str(port)
+                        if "," in port:
+                            port = port.split(",")
+                    port = _application_port(port, application, catalog)
+                    key = (source_ip, dest_ip, flow.get("firewallName") or "")
+                    if key not in paths:
+                        paths[key] = _flow_path(*key)
+                    if not paths[key]:
+                        line["error"] = "No Matching Firewalls found"
+                    for name, zones in paths[key].items():
+                        if (src_zone != "any" and zones["src"] != src_zone) or (dest_zone != "any" and zones["dest"] != dest_zone):
+                            line["results"].append({"firewall": name, "error": "Given zones don't match the firewall path"})
+                            continue
+                        result = {"firewall": name}
+                        line["results"].append(result)
+                        # One pass whatever the action: the first hit is the verdict,
+                        # the hits with the requested action are the matches.
+                        checks.setdefault(name, []).append((result, action, {
+                            "src": source_ip, "dest": dest_ip, "src_zone": zones["src"] or src_zone,
+                            "dest_zone": zones["dest"] or dest_zone, "port": port, "protocol": protocol,
+                            "action": "any", "application": application,
+                        }))
+                except Exception as e:
+                    logger.error(f"Error checking bulk flow {n}: {str(e)}", exc_info=True)
+                    line["error"] = str(e)
+            for name, firewall_checks in checks.items():
+                try:
+                    if name not in matchers:
+                        rulebase = snapshot_cache.get(name)
+                        matchers[name] = BatchMatcher(rulebase["rules"], rulebase["compiled"])
+                    found = matchers[name].match([query for result, action, query in firewall_checks])
+                except Exception as e:
+                    logger.error(f"Error checking bulk flows against {name}: {str(e)}", exc_info=True)
+                    for result, action, query in firewall_checks:
+                        result["error"] = str(e)
+                    continue
+                rules = matchers[name].rules
+                for (result, action, query), hits in zip(firewall_checks, found):
+                    first = rules[hits["first"]] if hits["matches"] else None
+                    result["matches"] = [rules[pos]["name"] for pos in hits["matches"]
+                                         if action == "any" or rules[pos]["action"].strip() == action]
+                    result["first"] = first["name"] if first else None
+                    result["verdict"] = first["action"].strip() if first else None
+            for line in lines:
+                yield json.dumps(line, default=list) + "\n"
+
+    return StreamingHttpResponse(stream(), content_type="application/x-ndjson")
+
+
+@csrf_exempt
+def firewall_analysis(request):
+    """Shadowed and redundant rules of one firewall's rulebase."""
+    if request.method != "POST":
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+    name = request.POST.get("firewallName")
+    if not name:
+        return JsonResponse({"error": "firewallName is required"}, status=400)
+    try:
+        rulebase = snapshot_cache.get(name)
+        findings = analyze_rules(rulebase["rules"], rulebase["compiled"])
+    except Exception as e:
+        logger.error(f"Error analysing rulebase of {name}: {str(e)}", exc_info=True)
+        return JsonResponse({"error": str(e)}, status=500)
+    return JsonResponse({"data": findings})
+
+
+@csrf_exempt
+def query_cache_stats(request):
+    """Hit/miss counters of the flow lookup cache; POST {"clear": "yes"} empties it."""
+    if request.method == "POST" and request.POST.get("clear") == "yes":
+        query_cache.clear(request.POST.get("firewallName") or None)
+    return JsonResponse(query_cache.stats())
+
+
+@csrf_exempt
+def firewall_refresh(request):
+    """Reloads rulebase snapshots (one firewall or every loaded one) and reports their state.
+
+    Without a firewallName, firewalls pinned to an imported config are left
+    alone: there is no device to reload them from.
+    """
+    if request.method == "POST":
+        name = request.POST.get("firewallName")
+        incremental = request.POST.get("mode") == "incremental"
+        errors = {}
+        if name:
+            firewall_names = [name]
+        else:
+            firewall_names = [firewall for firewall in snapshot_cache.firewalls() if not snapshot_cache.pinned(firewall)]
+        for firewall_name in firewall_names:
+            try:
+                snapshot_cache.refresh(firewall_name, incremental)
+            except Exception as e:
+                logger.error(f"Error refreshing rulebase of {firewall_name}: {str(e)}", exc_info=True)
+                errors[firewall_name] = str(e)
+        return JsonResponse({"data": snapshot_cache.status(), "errors": errors})
+    return JsonResponse({"data": snapshot_cache.status()})
+
+
+def _offline_path(path):
+    """path resolved inside settings.OFFLINE_CONFIG_DIR, or None for anything outside it (or when it is unset)."""
+    if not path or not settings.OFFLINE_CONFIG_DIR:
+        return None
+    root = os.path.realpath(settings.OFFLINE_CONFIG_DIR)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if resolved != root and not resolved.startswith(root + os.sep):
+        return None
+    return resolved
+
+
+@csrf_exempt
+def firewall_import(request):
+    """Loads rulebases from saved configs: an uploaded file (with firewallName) or a file or
+    directory under OFFLINE_CONFIG_DIR."""
+    if request.method != "POST":
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+    upload = request.FILES.get("file")
+    try:
+        if upload is not None:
+            name = request.POST.get("firewallName") or offline_configs.firewall_from_path(upload.name)
+            rulebase = offline_configs.load_content(upload.read().decode("utf-8", errors="replace"), name)
+            if rulebase is None:
+                return JsonResponse({"error": "No rules or objects found in the uploaded config"}, status=400)
+            offline_configs.publish(rulebase)
+            return JsonResponse({"data": {"loaded": {name: len(rulebase["rules"])}, "skipped": [], "errors": {}}})
+        path = _offline_path(request.POST.get("path"))
+        if path is None or not os.path.exists(path):
+            return JsonResponse({"error": "A config file upload or an existing path under OFFLINE_CONFIG_DIR is required"},
+                                status=400)
+        return JsonResponse({"data": offline_configs.load_path(path, request.POST.get("firewallName") or None)})
+    except Exception as e:
+        logger.error(f"Error importing configs: {str(e)}", exc_info=True)
+        return JsonResponse({"error": str(e)}, status=500)
+
+
+@csrf_exempt
+def panorama_import(request):
+    """Builds the effective rulebase of every Panorama-managed firewall from one config export.
+
+    The export is an uploaded file, a file under OFFLINE_CONFIG_DIR, or
+    (with neither) fetched from Panorama together with the firewalls'
+    hostnames.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+    try:
+        upload = request.FILES.get("file")
+        path = request.POST.get("path")
+        hostnames = {}
+        if upload is not None:
+            xml_content = upload.read().decode("utf-8", errors="replace")
+        elif path:
+            path = _offline_path(path)
+            if path is None or not os.path.isfile(path):
+                return JsonResponse({"error": "The path must name a file under OFFLINE_CONFIG_DIR"}, status=400)
+            with open(path, encoding="utf-8", errors="replace") as f:
+                xml_content = f.read()
+        else:
+            manager = RuleManager()
+            hostnames = manager.device_hostnames()
+            xml_content = manager.export_config()
+        return JsonResponse({"data": offline_configs.load_panorama(xml_content, hostnames)})
+    except Exception as e:
+        logger.error(f"Error importing the Panorama config: {str(e)}", exc_info=True)
+        return JsonResponse({"error": str(e)}, status=500)
+
+
+@csrf_exempt
+def fleet_poll(request):
+    """State of the background fleet poller; POST action=start|stop|poll controls it."""
+    if request.method == "POST":
+        action = request.POST.get("action")
+        if action == "start":
+            interval = request.POST.get("interval")
+            fleet_poller.start(int(interval) if interval else None)
+        elif action == "stop":
+            fleet_poller.stop()
+        elif action == "poll":
+            threading.Thread(target=fleet_poller.poll, daemon=True).start()
+        else:
+            return JsonResponse({"error": "action must be start, stop or poll"}, status=400)
+    return JsonResponse({"data": fleet_poller.status(), "snapshots": snapshot_cache.status()})
+
+
 @csrf_exempt
 def firewall_update(request):
     if request.method=="POST":
@@ -1116,15 +1386,43 @@ def resolve_fqdn_to_ip(request):
         try:
             fqdn="Error"
             fqdn=request.POST.get("data")
-            ip_addresses = socket.gethostbyname_ex(fqdn)[2]
-            return JsonResponse({"data":ip_addresses[0]})
+            ip_addresses = fqdn_resolver.resolve(fqdn)
+            return JsonResponse({"data":ip_addresses[0] if ip_addresses else fqdn})
         except Exception as e:
             print(e)
             return JsonResponse({"data":fqdn})
 def fetch_all_apps(request):
     if request.method=="GET":
-        df=pd.read_csv(r"Compare_final\applipedia_data_cleaned.csv")
-        return JsonResponse({"data": list(df["Name"])+["any"]})
+        return JsonResponse({"data": list(app_catalog.get().names)+["any"]})
+def apps_by_port(request):
+    """App-ID applications that default to a port (or range, or comma list) and optional protocol.
+
+    "covered" apps hold every requested port among their defaults for one
+    protocol, so a rule for them can use application-default instead of a
+    port service.
+    """
+    if request.method!="GET":
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+    port=request.GET.get("port") or request.GET.get("destinationPort")
+    protocol=request.GET.get("protocol") or "any"
+    if not port or port=="any":
+        return JsonResponse({"error": "port is required"}, status=400)
+    if "," in port:
+        port=port.split(",")
+    # The index's own catalog: a reload in between cannot drop a name it returns.
+    index=app_port_index()
+    data=[]
+    for name, covered in index.lookup(port, protocol):
+        record=index.catalog[name]
+        data.append({
+            "name": name,
+            "category": record.category,
+            "subcategory": record.subcategory,
+            "risk": record.risk,
+            "standard_ports": record.standard_ports,
+            "covered": covered,
+        })
+    return JsonResponse({"data": data})
 @csrf_exempt
 def Add(request):
     if request.method=="POST":
@@ -1137,270 +1435,38 @@ def Add(request):
         if form["Action"]=="allow":
             pass_action="deny"
         res=[]
+        src = form.get("sourceIP", "any")
+        dest = form.get("destinationIP", "any")
+        src_zone = form.get("sourceZone", "any")
+        dest_zone = form.get("destinationZone", "any")
+        Protocol = form.get("protocol", "any")
+        application = form.get("application", "any")
+        port = form.get("destinationPort", "any")
         for ind in range(len(rules)):
-            src = form.get("sourceIP", "any")
-            dest = form.get("destinationIP", "any")
-            src_zone = form.get("sourceZone", "any")
-            dest_zone = form.get("destinationZone", "any")
-            Protocol = form.get("protocol", "any")
-            application = form.get("application", "any")
-            port = form.get("destinationPort", "any")
-            negate_rules = negate(
-                src,
-                dest,
-                src_zone,
-                dest_zone,
-                port,
-                Protocol,
-                pass_action,
-                application,
-                allrules[ind]
-            )
-            found_index = float("inf")
-            for i in rules[ind][1]:
-                found_index = min(found_index, i["index"])
-            mini_index = float("inf")
-            for i in negate_rules:
-                mini_index = min(mini_index, i["index"])
-            print(found_index, mini_index)
+            # One pass per rulebase; blocking rules, exact matches and
+            # modification candidates all come from the same flags.
+            results = evaluate_rules(allrules[ind], src, dest, src_zone, dest_zone, port, Protocol, application)
+            mini_index = first_index(results, is_match, pass_action)
+            found_index = first_index(results, is_match, form["Action"])
             if found_index < mini_index:
                 res.append("Rule already Exists for " + str(ind))
                 continue
-            modified_rules = Modified(
-                src,
-                dest,
-                src_zone,
-                dest_zone,
-                port,
-                Protocol,
-                pass_action,
-                application,
-                allrules[ind]
-            )
-            found_index = float("inf")
-            for i in modified_rules:
-                found_index = min(found_index, i["index"])
-            print(found_index, mini_index)
-            if found_index == float("inf"):
+            candidates = [r for r in results if is_candidate(r, form["Action"])]
+            if not candidates:
                 res.append("New rule has to be added before " + str(mini_index))
                 continue
-            rule = modified_rules[found_index]
+            candidate = min(candidates, key=lambda r: r["rule"]["index"])
+            found_index = candidate["rule"]["index"]
             if found_index < mini_index:
                 res.append("Rule " + str(found_index) + " has to be modified")
-                src_flag = False
-                dest_flag = False
-                dest_zone_flag = False
-                src_zone_flag = False
-                port_flag = False
-                protocol_flag = False
-                application_flag = False
-                arr = ["source", "destination", "to", "from"]
-                for i in arr:
-                    if i not in rule:
-                        return False, rule["name"], []
-                for s in rule["source"]:
-                    if src_flag:
-                        continue
-                    if s == "...":
-                        continue
-                    try:
-                        if "-" in s:
-                            start_ip, end_ip = s.split("-")
-                            start_ip = ipaddress.ip_address(start_ip)
-                            end_ip = ipaddress.ip_address(end_ip)
-                            # Check if IP falls within the range
-                            if src == "any" or ("/" not in src and start_ip <= ipaddress.ip_address(src) <= end_ip):
-                                src_flag = True
-                            else:
-                                subnet = ipaddress.ip_network(src, strict=False)
-                                # Check if IP falls within the subnet
-                                if start_ip <= subnet.network_address <= end_ip and start_ip <= subnet.broadcast_address <= end_ip:
-                                    src_flag = True
-                    except Exception:
-                        continue
-                if 'negate-source' in rule and rule['negate-source'] and src != "any":
-                    src_flag = not src_flag
-                for d in rule["destination"]:
-                    if dest_flag:
-                        continue
-                    if d == "...":
-                        continue
-                    try:
-                        if "-" in d:
-                            start_ip, end_ip = d.split("-")
-                            start_ip = ipaddress.ip_address(start_ip)
-                            end_ip = ipaddress.ip_address(end_ip)
-                            # Check if IP falls within the range
-                            if dest == "any" or start_ip <= ipaddress.ip_address(dest) <= end_ip:
-                                dest_flag = True
-                        else:
-                            dest_flag = (
-                                d == "any" or dest == "any" or
-                                (
-                                    ipaddress.ip_network(d, strict=False).version == ipaddress.ip_network(dest, strict=False).version and
-                                    (
-                                        ipaddress.ip_network(d, strict=False).supernet_of(ipaddress.ip_network(dest, strict=False)) or
-                                        ipaddress.ip_network(dest, strict=False).subnet_of(ipaddress.ip_network(d, strict=False))
-                                    )
-                                )
-                            )
-                    except Exception:
-                        continue
-                if 'negate-destination' in rule and rule['negate-destination'] == "yes" and dest != "any":
-                    dest_flag = not dest_flag
-                for s in rule["from"]:
-                    if src_zone_flag:
-                        continue
-                    if s.lower() == src_zone.lower() or s.lower() == "any" or src_zone.lower() == "any":
-                        src_zone_flag = s
-                for d in rule["to"]:
-                    if dest_zone_flag:
-                        continue
-                    if d.lower() == dest_zone.lower() or d.lower() == "any" or dest_zone.lower() == "any":
-                        dest_zone_flag = d
-                for entry in rule["entries"]:
-                    try:
-                        if isinstance(port, list):
-                            p = port
-                            for port_item in p:
-                                if "-" in port_item:
-                                    s1, e1 = port_item.split("-")
-                                    s1 = int(s1)
-                                    e1 = int(e1)
-                                    if "-" in entry["destination_port"]:
-                                        start_port, end_port = entry["destination_port"].split("-")
-                                        start_port = int(start_port)
-                                        end_port = int(end_port)
-                                        if s1 >= start_port and e1 <= end_port:
-                                            if (
-                                                entry["protocol"] == "any" or Protocol == "any" or entry["protocol"] == Protocol
-                                            ) and (
-                                                entry["application"] == "any" or application == "any" or entry["application"] == application
-                                            ):
-                                                protocol_flag = entry["protocol"]
-                                                port_flag = entry["destination_port"]
-                                                application_flag = entry["application"]
-                                    else:
-                                        if (
-                                            entry["destination_port"] == "any" or port_item == "any" or entry["destination_port"] == port_item or s1 <= int(entry["destination_port"]) <= e1
-                                        ) and (
-                                            entry["protocol"] == "any" or Protocol == "any" or entry["protocol"] == Protocol
-                                        ) and (
-                                            entry["application"] == "any" or application == "any" or entry["application"] == application
-                                        ):
-                                            port_flag = entry["destination_port"]
-                                            protocol_flag = entry["protocol"]
-                                            application_flag = entry["application"]
-                                if "-" in entry["destination_port"] and entry["destination_port"] != "app-default" and port_item != "any":
-                                    start_port, end_port = entry["destination_port"].split("-")
-                                    start_port = int(start_port)
-                                    end_port = int(end_port)
-                                    check_port = int(port_item)
-                                    if start_port <= check_port <= end_port:
-                                        if (
-                                            entry["protocol"] == "any" or Protocol == "any" or entry["protocol"] == Protocol
-                                        ) and (
-                                            entry["application"] == "any" or application == "any" or entry["application"] == application
-                                        ):
-                                            protocol_flag = entry["protocol"]
-                                            port_flag = entry["destination_port"]
-                                            application_flag = entry["application"]
-                                else:
-                                    if port_flag:
-                                        continue
-                                    if (
-                                        entry["destination_port"] == "any" or port_item == "any" or entry["destination_port"] == port_item
-                                    ) and (
-                                        entry["protocol"] == "any" or Protocol == "any" or entry["protocol"] == Protocol
-                                    ) and (
-                                        entry["application"] == "any" or application == "any" or entry["application"] == application
-                                    ):
-                                        port_flag = entry["destination_port"]
-                                        protocol_flag = entry["protocol"]
-                                        application_flag = entry["application"]
-                        else:
-                            if not isinstance(port, list) and "-" in port:
-                                s1, e1 = port.split("-")
-                                s1 = int(s1)
-                                e1 = int(e1)
-                                if "-" in entry["destination_port"]:
-                                    start_port, end_port = entry["destination_port"].split("-")
-                                    start_port = int(start_port)
-                                    end_port = int(end_port)
-                                    if s1 >= start_port and e1 <= end_port:
-                                        if (
-                                            entry["protocol"] == "any" or Protocol == "any" or entry["protocol"] == Protocol
-                                        ) and (
-                                            entry["application"] == "any" or application == "any" or entry["application"] == application
-                                        ):
-                                            protocol_flag = entry["protocol"]
-                                            port_flag = entry["destination_port"]
-                                            application_flag = entry["application"]
-                                else:
-                                    if (
-                                        entry["destination_port"] == "any" or port == "any" or entry["destination_port"] == port or s1 <= int(entry["destination_port"]) <= e1
-                                    ) and (
-                                        entry["protocol"] == "any" or Protocol == "any" or entry["protocol"] == Protocol
-                                    ) and (
-                                        entry["application"] == "any" or application == "any" or entry["application"] == application
-                                    ):
-                                        port_flag = entry["destination_port"]
-                                        protocol_flag = entry["protocol"]
-                                        application_flag = entry["application"]
-                            else:
-                                if "-" in entry["destination_port"] and entry["destination_port"] != "app-default" and port != "any":
-                                    start_port, end_port = entry["destination_port"].split("-")
-                                    start_port = int(start_port)
-                                    end_port = int(end_port)
-                                    check_port = int(port)
-                                    if start_port <= check_port <= end_port:
-                                        if (
-                                            entry["protocol"] == "any" or Protocol == "any" or entry["protocol"] == Protocol
-                                        ) and (
-                                            entry["application"] == "any" or application == "any" or entry["application"] == application
-                                        ):
-                                            protocol_flag = entry["protocol"]
-                                            port_flag = entry["destination_port"]
-                                            application_flag = entry["application"]
-                                else:
-                                    if port_flag:
-                                        continue
-                                    if (
-                                        entry["destination_port"] == "any" or port == "any" or entry["destination_port"] == port
-                                    ) and (
-                                        entry["protocol"] == "any" or Protocol == "any" or entry["protocol"] == Protocol
-                                    ) and (
-                                        entry["application"] == "any" or application == "any" or entry["application"] == application
-                                    ):
-                                        port_flag = entry["destination_port"]
-                                        protocol_flag = entry["protocol"]
-                                        application_flag = entry["application"]
-                    except Exception:
-                        print(f"Invalid port: {entry}", " Error")
-                if src_flag is False:
-                    res.append("Source IP has to be modified")
-                if dest_flag is False:
-                    res.append("Destination IP has to be modified")
-                if src_zone_flag is False:
-                    res.append("Source Zone has to be modified")
-                if dest_zone_flag is False:
-                    res.append("Destination Zone has to be modified")
-                if application_flag:
-                    res.append("Application flag has to be modified")
-                if port_flag:
-                    res.append("Port has to be modified")
+                for field in missing_fields(candidate):
+                    res.append(field + " has to be modified")
                 res[-1] = res[-1] + " " + str(ind)
-        print(res)
-        return JsonResponse({})
+        return JsonResponse({"data": res})
 @csrf_exempt
 def App(request):
     if request.method=="GET":
-        app_defaults = pd.read_csv( r"Compare_final\applipedia_data_cleaned.csv"
-        )
-    # Convert the app_defaults to a dictionary for faster access
-        app_defaults_dict = app_defaults.set_index('Name').T.to_dict('list')
-        print(list(app_defaults["Name"]))
-        return JsonResponse({"data": list(set(app_defaults["Name"]))})
+        return JsonResponse({"data": list(app_catalog.get().names)})
 @csrf_exempt
 def Firewall_names(request):
     if request.method=="GET":